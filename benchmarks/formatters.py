@@ -0,0 +1,76 @@
+"""formatters.py
+
+Throughput of FastFormatter and JSONFormatter against stock logging.Formatter
+with ReportingFormats.DEFAULT.
+
+Formats records and writes them to os.devnull through a StreamHandler, so the
+numbers cover formatting + the handler path but not disk speed
+
+Usage:
+    python benchmarks/formatters.py [--records N] [--repeat N]
+
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import prosper.common.prosper_logging as p_logging
+
+def build_logger(formatter, stream):
+    """isolated logger writing to stream through formatter"""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter)
+    logger = logging.Logger('benchmark')
+    logger.addHandler(handler)
+    return logger
+
+def log_records(logger, records):
+    """the workload: plain INFO, INFO with extras, an exception"""
+    for index in range(records):
+        logger.info('processed order %d for %s', index, 'customer')
+        logger.info('cache stats', extra={'hits': index, 'misses': 3})
+    try:
+        raise ValueError('benchmark')
+    except ValueError:
+        logger.exception('failed order')
+
+def main(args=None):
+    """print records/sec per formatter as JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--records', type=int, default=10000, help='log calls per run (x2)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per formatter, best is kept')
+    options = parser.parse_args(args)
+
+    formatters = {
+        'default_text': logging.Formatter(p_logging.ReportingFormats.DEFAULT.value),
+        'default_fast': p_logging.FastFormatter(p_logging.ReportingFormats.DEFAULT.value),
+        'json_stdlib': p_logging.JSONFormatter(encoder=json.JSONEncoder(
+            default=str, ensure_ascii=False, separators=(',', ':')
+        ).encode),
+    }
+    if p_logging.orjson is not None:
+        formatters['json_orjson'] = p_logging.JSONFormatter()
+
+    results = {'encoder': 'orjson' if p_logging.orjson else 'json'}
+    with open(os.devnull, 'w') as devnull:
+        for name, formatter in formatters.items():
+            logger = build_logger(formatter, devnull)
+            best = min(timeit.repeat(
+                lambda: log_records(logger, options.records),
+                number=1,
+                repeat=options.repeat
+            ))
+            results[name] = {
+                'records_per_sec': round((options.records * 2 + 1) / best),
+                'best_seconds': round(best, 4),
+            }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
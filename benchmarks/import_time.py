@@ -0,0 +1,86 @@
+"""import_time.py
+
+Measure the startup cost of `import prosper.common.prosper_logging`.
+
+Each sample runs in a fresh interpreter.  `file_logger` is what a cron/CLI script
+that only logs to file pays; `webhook_logger` adds the deferred webhook stack
+(`requests`, urllib3, ...) that is now imported on first webhook handler.
+`common_config` adds parsing the bundled config, `common_config_cached` reads it
+through the on-disk config cache instead
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+SCENARIOS = {
+    'file_logger': 'import prosper.common.prosper_logging',
+    'webhook_logger': (
+        'import prosper.common.prosper_logging as p_log;'
+        'p_log.get_webhook_session("https://discordapp.com/api/webhooks/")'
+    ),
+    'common_config': (
+        'import prosper.common.prosper_logging as p_log;'
+        'p_log.get_common_config()'
+    ),
+    'common_config_cached': (   #first run writes common_config.cfg.cache, the rest are warm
+        'import os; os.environ["PROSPER_CONFIG_CACHE"] = "1";'
+        'import prosper.common.prosper_logging as p_log;'
+        'p_log.get_common_config()'
+    ),
+}
+
+TIMER = (
+    'import time; _start = time.perf_counter(); {statement}; '
+    'print(time.perf_counter() - _start)'
+)
+
+def time_statement(statement, runs):
+    """run statement in `runs` fresh interpreters
+
+    Args:
+        statement (str): python source to time
+        runs (int): samples to take
+
+    Returns:
+        (:obj:`dict`): min/median in milliseconds
+
+    """
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', TIMER.format(statement=statement)],
+            cwd=ROOT
+        )
+        samples.append(float(output) * 1000)
+    return {
+        'runs': runs,
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+    }
+
+def main(args=None):
+    """print import timings as JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--runs', type=int, default=20, help='interpreters per scenario')
+    options = parser.parse_args(args)
+
+    results = {
+        name: time_statement(statement, options.runs)
+        for name, statement in SCENARIOS.items()
+    }
+    results['deferred_ms'] = round(
+        results['webhook_logger']['median_ms'] - results['file_logger']['median_ms'], 3
+    )
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""level_gating.py
+
+Cost of a disabled logger.debug() call, with and without level gating.
+
+`ungated` raises the DEBUG handler's level by hand, leaving the logger at DEBUG:
+every call builds a LogRecord only for the handler to drop it.  `gated` makes the
+same change through ProsperLogger.set_handler_level(), which raises the logger
+level too, so the call returns at isEnabledFor().  `removed` detaches the handler
+through ProsperLogger.remove_handler().  `baseline` is a logger that never had a
+DEBUG handler
+
+Usage:
+    python benchmarks/level_gating.py [--calls N] [--repeat N]
+
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import prosper.common.prosper_logging as p_logging
+import prosper.common.prosper_config as p_config
+
+def build(log_path, name, debug_handler=True):
+    """ProsperLogger at INFO, optionally with a DEBUG stream handler to /dev/null"""
+    config_path = path.join(log_path, name + '.cfg')
+    with open(config_path, 'w') as config_file:
+        config_file.write('[LOGGING]\n    log_level = INFO\n')
+    log_builder = p_logging.ProsperLogger(
+        'bench.gating.' + name, log_path, p_config.ProsperConfig(config_path)
+    )
+    if debug_handler:
+        log_builder.configure_debug_logger()
+        log_builder.log_handlers[-1].setStream(open(os.devnull, 'w'))
+    return log_builder
+
+def main(args=None):
+    """print ns per disabled debug() call as JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--calls', type=int, default=200000, help='debug() calls per run')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case, best is kept')
+    options = parser.parse_args(args)
+
+    log_path = tempfile.mkdtemp(prefix='prosper_bench_')
+    try:
+        ungated = build(log_path, 'ungated')
+        ungated.log_handlers[-1].setLevel('INFO')
+
+        gated = build(log_path, 'gated')
+        gated.set_handler_level(gated.log_handlers[-1], 'INFO')
+
+        removed = build(log_path, 'removed')
+        removed.remove_handler(removed.log_handlers[-1])
+
+        cases = {
+            'baseline': build(log_path, 'baseline', debug_handler=False),
+            'ungated': ungated,
+            'gated': gated,
+            'removed': removed,
+        }
+        results = {}
+        for name, log_builder in cases.items():
+            logger = log_builder.get_logger()
+            best = min(timeit.repeat(
+                lambda: logger.debug('tick %d', 1),
+                number=options.calls,
+                repeat=options.repeat
+            ))
+            results[name] = {
+                'logger_level': logging.getLevelName(logger.level),
+                'ns_per_call': round(best / options.calls * 1e9, 1),
+            }
+            log_builder.close_handles()
+        results['speedup_gated_vs_ungated'] = round(
+            results['ungated']['ns_per_call'] / results['gated']['ns_per_call'], 1
+        )
+    finally:
+        shutil.rmtree(log_path, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""logging_throughput.py
+
+Per-call cost of ProsperLogger handlers: records/sec and p50/p99 emit latency.
+
+Webhook cases post to a local stub HTTP server (no network), with client-side
+rate limiting opened up so the numbers measure the handler, not the throttle.
+Results are JSON so runs can be diffed between releases
+
+Usage:
+    python benchmarks/logging_throughput.py [--records N] [--cases a,b] [--output FILE] [--baseline FILE]
+
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import prosper.common.prosper_logging as p_logging
+import prosper.common.prosper_config as p_config
+
+WEBHOOK_SCALE = 10  #webhook cases run records/WEBHOOK_SCALE calls: each one is a real HTTP post
+UNTHROTTLED = {'rate_limit': 1e9, 'rate_burst': 1e9}
+
+class StubWebhook(BaseHTTPRequestHandler):
+    """local webhook endpoint, always 204"""
+    protocol_version = 'HTTP/1.1'   #keep-alive, like the real webhooks
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class Workspace(object):
+    """temp log dir + stub server shared by all cases"""
+    def __init__(self):
+        self.log_path = tempfile.mkdtemp(prefix='prosper_bench_')
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubWebhook)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.webhook_url = 'http://127.0.0.1:{0}/webhook'.format(self.server.server_port)
+
+    def config(self, **options):
+        """write a [LOGGING] config for this run"""
+        options.setdefault('log_level', 'INFO')
+        config_path = path.join(self.log_path, 'bench_{0}.cfg'.format(len(os.listdir(self.log_path))))
+        with open(config_path, 'w') as config_file:
+            config_file.write('[LOGGING]\n')
+            for key, value in options.items():
+                config_file.write('    {0} = {1}\n'.format(key, value))
+        return p_config.ProsperConfig(config_path)
+
+    def builder(self, name, **options):
+        """ProsperLogger with only the default file handler"""
+        return p_logging.ProsperLogger('bench.' + name, self.log_path, self.config(**options))
+
+    def discord_webhook(self):
+        """DiscordWebhook pointed at the stub server"""
+        webhook = p_logging.DiscordWebhook()
+        webhook.api_keys(1, 'benchmark')
+        webhook.webhook_url = self.webhook_url
+        return webhook
+
+    def close(self):
+        self.server.shutdown()
+        shutil.rmtree(self.log_path, ignore_errors=True)
+
+def attach(log_builder, handler, level='ERROR'):
+    """add an extra handler to a builder's logger, ProsperLogger style"""
+    handler.setFormatter(p_logging.build_formatter(p_logging.ReportingFormats.PRETTY_PRINT.value))
+    handler.setLevel(level)
+    log_builder.logger.addHandler(handler)
+    log_builder.log_handlers.append(handler)
+    return log_builder
+
+## cases: name -> build(workspace) -> (log_builder, call(index), scale) ##
+def case_file_default(workspace):
+    log_builder = workspace.builder('file_default')
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.info('order %d processed', index), 1
+
+def case_file_queued(workspace):
+    log_builder = workspace.builder('file_queued', log_queued=True)
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.info('order %d processed', index), 1
+
+def case_file_json(workspace):
+    log_builder = workspace.builder('file_json', log_format='JSON')
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.info('order %d', index, extra={'shard': 3}), 1
+
+def case_debug_stream(workspace):
+    log_builder = workspace.builder('debug_stream')
+    log_builder.configure_debug_logger()
+    log_builder.log_handlers[-1].setStream(open(os.devnull, 'w'))
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.debug('tick %d', index), 1
+
+def case_debug_filtered(workspace):
+    log_builder = workspace.builder('debug_filtered')
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.debug('tick %d', index), 1
+
+def case_exception(workspace):
+    log_builder = workspace.builder('exception')
+    logger = log_builder.get_logger()
+    def call(index):
+        try:
+            raise ValueError(index)
+        except ValueError:
+            logger.exception('order %d failed', index)
+    return log_builder, call, 1
+
+def case_discord(workspace):
+    log_builder = attach(
+        workspace.builder('discord'),
+        p_logging.HackyDiscordHandler(workspace.discord_webhook(), **UNTHROTTLED)
+    )
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.error('alert %d', index), WEBHOOK_SCALE
+
+def case_discord_queued(workspace):
+    log_builder = attach(
+        workspace.builder('discord_queued'),
+        p_logging.QueuedHandler(
+            p_logging.HackyDiscordHandler(workspace.discord_webhook(), **UNTHROTTLED),
+            overflow_policy=p_logging.OverflowPolicy.BLOCK
+        )
+    )
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.error('alert %d', index), WEBHOOK_SCALE
+
+def case_slack(workspace):
+    log_builder = attach(
+        workspace.builder('slack'),
+        p_logging.HackySlackHandler(workspace.webhook_url, **UNTHROTTLED)
+    )
+    logger = log_builder.get_logger()
+    return log_builder, lambda index: logger.error('alert %d', index), WEBHOOK_SCALE
+
+CASES = {
+    name[len('case_'):]: function
+    for name, function in sorted(globals().items()) if name.startswith('case_')
+}
+
+def percentile(sorted_samples, fraction):
+    """nearest-rank percentile"""
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+def run_case(build, workspace, records):
+    """time every call of one case
+
+    Returns:
+        (:obj:`dict`): records, records_per_sec, p50/p99/max latency in microseconds
+
+    """
+    log_builder, call, scale = build(workspace)
+    calls = max(1, records // scale)
+    for index in range(min(100, calls)):    #warm up connections/caches
+        call(index)
+
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    started = perf_counter_ns()
+    for index in range(calls):
+        call_start = perf_counter_ns()
+        call(index)
+        samples.append(perf_counter_ns() - call_start)
+    elapsed = perf_counter_ns() - started
+    log_builder.close_handles()
+    for handler in log_builder.log_handlers:
+        log_builder.logger.removeHandler(handler)
+
+    samples.sort()
+    return {
+        'records': calls,
+        'records_per_sec': round(calls / (elapsed / 1e9)),
+        'p50_us': round(percentile(samples, 0.50) / 1000, 2),
+        'p99_us': round(percentile(samples, 0.99) / 1000, 2),
+        'max_us': round(samples[-1] / 1000, 2),
+    }
+
+def main(args=None):
+    """run cases, print/save JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--records', type=int, default=20000, help='log calls per case')
+    parser.add_argument('--cases', default=','.join(CASES), help='comma separated subset of: ' + ','.join(CASES))
+    parser.add_argument('--output', help='also write results to this file')
+    parser.add_argument('--baseline', help='earlier results file: adds throughput ratio per case')
+    options = parser.parse_args(args)
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'records': options.records,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'cases': {},
+    }
+    workspace = Workspace()
+    try:
+        for name in options.cases.split(','):
+            results['cases'][name] = run_case(CASES[name], workspace, options.records)
+    finally:
+        workspace.close()
+
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['cases']
+        for name, case in results['cases'].items():
+            if name in baseline:
+                case['throughput_vs_baseline'] = round(
+                    case['records_per_sec'] / baseline[name]['records_per_sec'], 3
+                )
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            output_file.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""prosper_async_logging.py
+
+asyncio-native versions of the prosper_logging webhook handlers.  emit() never blocks:
+records are handed to a delivery task owned by the event loop
+
+Example:
+    import prosper.common.prosper_logging as p_log
+
+    LogBuilder = p_log.ProsperLogger('log_name', 'desired/log/path', configuration_object)
+    LogBuilder.configure_discord_logger(async_loop=asyncio.get_event_loop())
+
+    ...
+    await LogBuilder.aclose_handles()   # drain pending webhook posts before loop shuts down
+
+"""
+
+import asyncio
+import json
+import logging
+import urllib.request
+import warnings
+
+import prosper.common.prosper_logging as p_logging
+
+try:
+    import aiohttp
+except ImportError: #pragma: no cover
+    aiohttp = None  #fall back to urllib in the default executor
+
+_SENTINEL = None
+
+class _AsyncWebhookMixin(object):
+    """Shared loop-owned delivery for async webhook handlers
+
+    Subclasses provide build_payload(record) and webhook url in self.delivery_url
+
+    Attributes:
+        loop (:obj:`asyncio.AbstractEventLoop`): loop that owns delivery
+        dropped (int): records discarded because the delivery queue was full
+
+    """
+    def _init_async(self, loop, queue_size):
+        """set up delivery state
+
+        Args:
+            loop (:obj:`asyncio.AbstractEventLoop`): loop to deliver on
+            queue_size (int): max payloads waiting on delivery
+
+        """
+        self.loop = loop
+        self.queue_size = int(queue_size)
+        self.dropped = 0
+        self._queue = None
+        self._task = None
+        self._http_session = None
+        self._closed = False
+
+    def emit(self, record):
+        """format on the calling thread, hand payload to the loop.  Never blocks"""
+        if self._closed:
+            return
+        payload = self.build_payload(record)
+        self.loop.call_soon_threadsafe(self._enqueue, payload)
+
+    def _enqueue(self, payload):
+        """(loop thread) queue payload, starting the delivery task on first use"""
+        if self._closed:    #handed off after aclose() started draining
+            self.dropped += 1
+            return
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = self.loop.create_task(self._deliver())
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _deliver(self):
+        """(loop thread) post payloads until the sentinel shows up"""
+        while True:
+            payload = await self._queue.get()
+            if payload is _SENTINEL:
+                break
+            try:
+                await self._post(payload)
+            except Exception as error_msg:
+                warnings.warn(
+                    'EXCEPTION: UNABLE TO COMMIT LOG MESSAGE' +
+                    '\n\texception={0}'.format(error_msg) +
+                    '\n\tmessage={0}'.format(payload),
+                    RuntimeWarning
+                )
+
+    async def _post(self, payload):
+        """POST payload with aiohttp if installed, else urllib in the default executor"""
+        if aiohttp is None:
+            await self.loop.run_in_executor(None, self._post_blocking, payload)
+            return
+
+        if self._http_session is None:  #pragma: no cover
+            self._http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.timeout[0],
+                    sock_read=self.timeout[1]
+                )
+            )
+        async with self._http_session.post(self.delivery_url, json=payload) as response: #pragma: no cover
+            response.raise_for_status()
+
+    def _post_blocking(self, payload):
+        """pure-stdlib POST, run off-loop"""
+        request = urllib.request.Request(
+            self.delivery_url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=sum(self.timeout)) as response:
+            response.read()
+
+    async def aclose(self):
+        """drain pending payloads and stop delivery.  Call from the owning loop"""
+        # let call_soon_threadsafe() hand-offs already scheduled land in the queue first
+        await asyncio.sleep(0)
+        self._closed = True
+        if self._task is not None:
+            await self._queue.put(_SENTINEL)
+            await self._task
+            self._task = None
+        if self._http_session is not None:  #pragma: no cover
+            await self._http_session.close()
+            self._http_session = None
+        logging.Handler.close(self)
+
+    def close(self):
+        """synchronous close: drain if the loop can be waited on, else schedule the drain
+
+        Note:
+            From inside the running loop, use `await handler.aclose()` to guarantee the drain
+
+        """
+        if self._closed or self.loop.is_closed():
+            self._closed = True
+            logging.Handler.close(self)
+            return
+
+        if not self.loop.is_running():
+            self.loop.run_until_complete(self.aclose())
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            self.loop.create_task(self.aclose())
+            return
+
+        future = asyncio.run_coroutine_threadsafe(self.aclose(), self.loop)
+        try:
+            future.result(p_logging.QUEUE_TIMEOUT)
+        except Exception:
+            warnings.warn(
+                'WARNING: unable to drain async webhook handler before close',
+                RuntimeWarning
+            )
+
+class AsyncDiscordHandler(_AsyncWebhookMixin, p_logging.HackyDiscordHandler):
+    """HackyDiscordHandler that delivers from a task on an asyncio loop"""
+    def __init__(
+            self,
+            webhook_obj,
+            alert_recipient=None,
+            loop=None,
+            queue_size=p_logging.DEFAULT_QUEUE_SIZE,
+            **kwargs
+    ):
+        """AsyncDiscordHandler init
+
+        Args:
+            webhook_obj (:obj:`DiscordWebhook`): discord webhook has all the info for connection
+            alert_recipients (`str`:<@int>, optional): user/group to notify
+            loop (:obj:`asyncio.AbstractEventLoop`, optional): delivery loop (default: current event loop)
+            queue_size (int, optional): max messages waiting on delivery
+            kwargs: connection options for HackyDiscordHandler
+
+        """
+        p_logging.HackyDiscordHandler.__init__(self, webhook_obj, alert_recipient, **kwargs)
+        self.delivery_url = self.api_url
+        self._init_async(loop or asyncio.get_event_loop(), queue_size)
+
+    def build_payload(self, record):
+        """discord webhook json"""
+        return {'content': self.build_message(record)}
+
+class AsyncSlackHandler(_AsyncWebhookMixin, p_logging.HackySlackHandler):
+    """HackySlackHandler that delivers from a task on an asyncio loop"""
+    def __init__(
+            self,
+            webhook_url,
+            loop=None,
+            queue_size=p_logging.DEFAULT_QUEUE_SIZE,
+            **kwargs
+    ):
+        """AsyncSlackHandler init
+
+        Args:
+            webhook_url (str): slack bot webhook (full URL)
+            loop (:obj:`asyncio.AbstractEventLoop`, optional): delivery loop (default: current event loop)
+            queue_size (int, optional): max messages waiting on delivery
+            kwargs: connection options for HackySlackHandler
+
+        """
+        p_logging.HackySlackHandler.__init__(self, webhook_url, **kwargs)
+        self.delivery_url = self.webhook_url
+        self._init_async(loop or asyncio.get_event_loop(), queue_size)
+
+    def build_payload(self, record):
+        """slack webhook json"""
+        attachment, log_msg = self.build_message(record)
+        return {
+            'text': log_msg,
+            'attachments': [attachment]
+        }
@@ -4,17 +4,26 @@ Unified config parsing and option picking against config objects
 
 """
 
-from os import path, getenv
+from os import path, getenv, environ, stat, fstat, getpid, replace, remove
 import configparser
 from configparser import ExtendedInterpolation
+import hashlib
+import marshal
 import warnings
 import logging
+import threading
 
 DEFAULT_LOGGER = logging.getLogger('NULL')
 DEFAULT_LOGGER.addHandler(logging.NullHandler())
 
 HERE = path.abspath(path.dirname(__file__))
 
+DEFAULT_WATCH_INTERVAL = 2.0    #seconds between config file polls
+
+CONFIG_CACHE_ENVNAME = 'PROSPER_CONFIG_CACHE'   #opt-in for every ProsperConfig, e.g. cron hosts
+CACHE_EXTENSION = '.cache'
+CACHE_VERSION = (1, marshal.version)
+
 class ProsperConfig(object):
     """configuration handler for all prosper projects
 
@@ -31,6 +40,9 @@ class ProsperConfig(object):
         local_config (:obj:`configparser.ConfigParser`)
         config_filename (str): filename of global/tracked/default .cfg file
         local_config_filename (str): filename for local/custom .cfg file
+        frozen (bool): get_option() reads from a precomputed snapshot (see reload())
+        cache (bool): reuse resolved values from a `.cfg.cache` file while sources are unchanged
+        reload_callbacks (:obj:`list` of :obj:`callable`): called with the config after each reload()
     """
     _debug_mode = False
     def __init__(
@@ -38,7 +50,10 @@ class ProsperConfig(object):
             config_filename,
             local_filepath_override=None,
             logger=DEFAULT_LOGGER,
-            debug_mode=_debug_mode
+            debug_mode=_debug_mode,
+            frozen=False,
+            watch_interval=None,
+            cache=None
     ):
         """get the config filename for initializing data structures
 
@@ -47,6 +62,9 @@ class ProsperConfig(object):
             local_filepath_override (str, optional): path to alternate private config file
             logger (:obj:`logging.Logger`, optional): capture messages to logger
             debug_mode (bool, optional): enable debug modes for config helper
+            frozen (bool, optional): resolve local > global > environment once, for O(1) get_option()
+            watch_interval (float, optional): poll config files every N seconds and reload on change
+            cache (bool, optional): use the on-disk config cache (default: PROSPER_CONFIG_CACHE env value)
 
         """
         self.logger = logger
@@ -55,10 +73,126 @@ class ProsperConfig(object):
         if local_filepath_override:
             self.local_config_filename = local_filepath_override
             #TODO: force filepaths to abspaths?
-        self.global_config, self.local_config = get_configs(
-            config_filename,
-            self.local_config_filename
+        self.frozen = frozen
+        self.cache = use_config_cache(cache)
+        self.reload_callbacks = []
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watch_stop = threading.Event()
+        self._state = None
+        self._file_signatures = None
+        self.reload()
+        if watch_interval:
+            self.watch(watch_interval)
+
+    @property
+    def global_config(self):
+        """(:obj:`configparser.ConfigParser`): tracked config, as of the last reload()"""
+        return self._state[0]
+
+    @property
+    def local_config(self):
+        """(:obj:`configparser.ConfigParser`): untracked config, as of the last reload()"""
+        return self._state[1]
+
+    def reload(self):
+        """re-read config files from disk (and rebuild the frozen snapshot)
+
+        Notes:
+            Everything is parsed before being swapped in as a single `_state` tuple:
+            readers see the old config or the new one, never a mix.
+            Raises (and keeps the old config) if either file fails to parse
+
+        """
+        with self._reload_lock:
+            signatures = (
+                get_file_signature(self.config_filename),
+                get_file_signature(self.local_config_filename)
+            )
+            global_config, local_config = get_configs(
+                self.config_filename,
+                self.local_config_filename,
+                cache=self.cache
+            )
+            snapshot = None
+            if self.frozen:
+                snapshot = build_config_snapshot(global_config, local_config)
+            self._state = (global_config, local_config, snapshot, {})
+            self._file_signatures = signatures
+
+        for callback in list(self.reload_callbacks):
+            try:
+                callback(self)
+            except Exception:
+                self.logger.error('EXCEPTION - config reload callback failed', exc_info=True)
+
+    def add_reload_callback(self, callback):
+        """register a function to call after each reload()
+
+        Args:
+            callback (:obj:`callable`): callback(config_obj)
+
+        """
+        self.reload_callbacks.append(callback)
+
+    def check_for_changes(self):
+        """reload() if either config file changed on disk since the last reload()
+
+        Returns:
+            (bool): config was reloaded
+
+        """
+        signatures = (
+            get_file_signature(self.config_filename),
+            get_file_signature(self.local_config_filename)
+        )
+        if signatures == self._file_signatures:
+            return False
+
+        self.reload()
+        return True
+
+    def watch(self, interval=DEFAULT_WATCH_INTERVAL):
+        """start a background thread polling config files for changes
+
+        Notes:
+            Polls (inode, mtime, size) with os.stat(): stdlib has no inotify binding,
+            and a stat every few seconds is cheap.  A file that fails to parse
+            (editor mid-write) keeps the old config and is retried next poll
+
+        Args:
+            interval (float, optional): seconds between polls
+
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop,
+            args=(float(interval),),
+            name='ProsperConfigWatcher',
+            daemon=True
         )
+        self._watcher.start()
+
+    def stop_watching(self):
+        """stop the watch() thread"""
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch_loop(self, interval):
+        """(watch thread) poll until stop_watching()"""
+        while not self._watch_stop.wait(interval):
+            try:
+                if self.check_for_changes():
+                    self.logger.info('config reloaded: ' + self.config_filename)
+            except Exception as error_msg:
+                self.logger.warning(
+                    'WARNING - unable to reload config, keeping previous values' +
+                    '\r\texception={0}'.format(error_msg)
+                )
 
     def get(
             self,
@@ -75,15 +209,16 @@ class ProsperConfig(object):
             (str): do not check defaults, only return local value
 
         """
+        global_config, local_config, _, _ = self._state
         value = None
         try:
-            value = self.local_config.get(section_name, key_name)
+            value = local_config.get(section_name, key_name)
         except Exception as error_msg:
             self.logger.warning(
                 '{0}.{1} not found in local config'.format(section_name, key_name)
             )
             try:
-                value = self.global_config.get(section_name, key_name)
+                value = global_config.get(section_name, key_name)
             except Exception as error_msg:
                 self.logger.error(
                     '{0}.{1} not found in global config'.format(section_name, key_name)
@@ -119,6 +254,13 @@ class ProsperConfig(object):
             (str) appropriate response as per priority order
 
         """
+        global_config, local_config, snapshot, _ = self._state
+        if snapshot is not None:    #frozen: no interpolation, no logging
+            if args_option != args_default and\
+               args_option is not None:
+                return args_option
+            return snapshot.get((section_name, key_name.lower()), args_default)
+
         self.logger.debug('picking config')
         if args_option != args_default and\
            args_option is not None:
@@ -129,7 +271,7 @@ class ProsperConfig(object):
 
         local_option = None
         try:
-            local_option = self.local_config[section_name][key_name]
+            local_option = local_config[section_name][key_name]
         except KeyError:
             self.logger.debug(section_info + 'not found in local config')
         if local_option:
@@ -138,7 +280,7 @@ class ProsperConfig(object):
 
         global_option = None
         try:
-            global_option = self.global_config[section_name][key_name]
+            global_option = global_config[section_name][key_name]
         except KeyError:# as error_msg:
             self.logger.warning(section_info + 'not found in global config')
         if global_option:
@@ -152,11 +294,212 @@ class ProsperConfig(object):
         self.logger.debug('-- using default argument')
         return args_default #If all esle fails return the given default
 
+    def get_int(
+            self,
+            section_name,
+            key_name,
+            args_option=None,
+            args_default=None
+    ):
+        """get_option() parsed as int.  See _get_typed()"""
+        return self._get_typed(section_name, key_name, args_option, args_default, 'int', int)
+
+    def get_float(
+            self,
+            section_name,
+            key_name,
+            args_option=None,
+            args_default=None
+    ):
+        """get_option() parsed as float.  See _get_typed()"""
+        return self._get_typed(section_name, key_name, args_option, args_default, 'float', float)
+
+    def get_bool(
+            self,
+            section_name,
+            key_name,
+            args_option=None,
+            args_default=None
+    ):
+        """get_option() parsed as bool (1/yes/true/on, 0/no/false/off).  See _get_typed()"""
+        return self._get_typed(section_name, key_name, args_option, args_default, 'bool', parse_bool)
+
+    def get_list(
+            self,
+            section_name,
+            key_name,
+            args_option=None,
+            args_default=None,
+            delimiter=','
+    ):
+        """get_option() split on delimiter, whitespace stripped, blanks dropped.  See _get_typed()
+
+        Returns:
+            (:obj:`list` of str): fresh list each call, safe to modify
+
+        """
+        value = self._get_typed(
+            section_name, key_name, args_option, args_default,
+            'list' + delimiter, lambda raw: parse_list(raw, delimiter)
+        )
+        return list(value) if value is not None else value
+
+    def _get_typed(
+            self,
+            section_name,
+            key_name,
+            args_option,
+            args_default,
+            type_name,
+            converter
+    ):
+        """get_option() with conversion, cached per (section, key, type)
+
+        Notes:
+            Config values are parsed once and cached until reload().
+            args_option/args_default follow get_option() priority and are converted but not cached
+
+        Args:
+            section_name (str): section level name in config
+            key_name (str): key name for option in config
+            args_option (any): arg option given by a function
+            args_default (any): arg default given by a function
+            type_name (str): cache key/error label for the conversion
+            converter (:obj:`callable`): raw str -> typed value
+
+        Returns:
+            (any): converted value, or args_default if option is not set anywhere
+
+        Raises:
+            ValueError: option is set but cannot be converted
+
+        """
+        if args_option != args_default and\
+           args_option is not None:
+            return _convert(section_name, key_name, args_option, type_name, converter)
+
+        typed_cache = self._state[3]
+        cache_key = (section_name, key_name, type_name)
+        try:
+            value = typed_cache[cache_key]
+        except KeyError:
+            raw_value = self.get_option(section_name, key_name, None, None)
+            value = None
+            if raw_value is not None:
+                value = _convert(section_name, key_name, raw_value, type_name, converter)
+            typed_cache[cache_key] = value
+
+        if value is None:
+            if args_default is None:
+                return None
+            return _convert(section_name, key_name, args_default, type_name, converter)
+        return value
+
     def attach_logger(self, logger):
         """because load orders might be weird, add logger later"""
         self.logger = logger
 
+def _convert(section_name, key_name, value, type_name, converter):
+    """apply converter, re-raising failures with the offending option named"""
+    if not isinstance(value, str):  #args values may already be typed
+        if type_name.startswith('list') and isinstance(value, (list, tuple)):
+            return list(value)
+        if type_name != 'bool' or isinstance(value, bool):
+            value = str(value)
+    try:
+        return converter(value)
+    except (TypeError, ValueError) as error_msg:
+        raise ValueError(
+            '{0}.{1}={2!r} is not a valid {3}: {4}'.format(
+                section_name, key_name, value, type_name.rstrip(','), error_msg
+            )
+        )
+
+BOOLEAN_STATES = configparser.ConfigParser.BOOLEAN_STATES
+def parse_bool(value):
+    """configparser-style bool parsing
+
+    Args:
+        value (str or bool): 1/yes/true/on, 0/no/false/off (case-insensitive)
+
+    Returns:
+        (bool)
+
+    """
+    if isinstance(value, bool):
+        return value
+    try:
+        return BOOLEAN_STATES[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError('expected one of ' + '/'.join(sorted(BOOLEAN_STATES)))
+
+def parse_list(value, delimiter=','):
+    """split delimited config string
+
+    Args:
+        value (str): raw config value
+        delimiter (str, optional): separator
+
+    Returns:
+        (:obj:`tuple` of str): stripped, non-blank items
+
+    """
+    return tuple(item.strip() for item in value.split(delimiter) if item.strip())
+
 ENVNAME_PAD = 'PROSPER'
+def build_config_snapshot(
+        global_config,
+        local_config,
+        envname_pad=ENVNAME_PAD
+):
+    """flatten global/local/environment config into one resolved lookup table
+
+    Notes:
+        Same priority as ProsperConfig.get_option(): local > global > environment.
+        Blank values fall through to the next source, like get_option()
+
+    Args:
+        global_config (:obj:`configparser.ConfigParser`): tracked config
+        local_config (:obj:`configparser.ConfigParser`): untracked config
+        envname_pad (str, optional): namespace padding for environment values
+
+    Returns:
+        (:obj:`dict`): {(section, key): value} with interpolation already applied
+
+    """
+    snapshot = {}
+
+    env_prefix = envname_pad + '_'
+    for var_name, value in environ.items():
+        if not var_name.startswith(env_prefix) or '__' not in var_name or not value:
+            continue
+        section_name, key_name = var_name[len(env_prefix):].split('__', 1)
+        snapshot[(section_name, key_name.lower())] = value
+
+    for config in (global_config, local_config):    #later configs win
+        for section_name in config.sections():
+            for key_name, value in config.items(section_name):
+                if value:
+                    snapshot[(section_name, key_name)] = value
+
+    return snapshot
+
+def get_file_signature(filepath):
+    """cheap change detection for watched config files
+
+    Args:
+        filepath (str): path to file
+
+    Returns:
+        (tuple): (inode, mtime_ns, size), or None if file is missing
+
+    """
+    try:
+        file_stat = stat(filepath)
+    except OSError:
+        return None
+    return (file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+
 def get_value_from_environment(
         section_name,
         key_name,
@@ -190,28 +533,207 @@ def get_value_from_environment(
 def get_configs(
         config_filepath,
         local_filepath_override=None,
-        debug_mode=False
+        debug_mode=False,
+        cache=None
 ):
     """go and fetch the global/local configs from file and load them with configparser
 
     Args:
         config_filename (str): path to config
         debug_mode (bool, optional): enable debug modes for config helper
+        cache (bool, optional): use the on-disk config cache (default: PROSPER_CONFIG_CACHE env value)
 
     Returns:
         (:obj:`configparser.ConfigParser`) global_config
         (:obj:`configparser.ConfigParser`) local_config
 
     """
-    global_config = read_config(config_filepath)
-
     local_filepath = get_local_config_filepath(config_filepath, True)
     if local_filepath_override:
         local_filepath = local_filepath_override
+
+    if use_config_cache(cache):
+        return read_cached_configs(config_filepath, local_filepath)
+
+    global_config = read_config(config_filepath)
     local_config = read_config(local_filepath)
 
     return global_config, local_config
 
+def use_config_cache(cache=None):
+    """resolve the cache switch
+
+    Args:
+        cache (bool, optional): explicit choice, None reads PROSPER_CONFIG_CACHE
+
+    Returns:
+        (bool)
+
+    """
+    if cache is not None:
+        return bool(cache)
+    try:
+        return parse_bool(getenv(CONFIG_CACHE_ENVNAME) or False)
+    except ValueError:
+        return False
+
+def get_config_cache_path(config_filepath):
+    """cache lives next to the tracked config: `config.cfg.cache`"""
+    return config_filepath + CACHE_EXTENSION
+
+def get_source_signature(filepath):
+    """identify a config file's exact contents for cache validation
+
+    Args:
+        filepath (str): path to file
+
+    Returns:
+        (tuple): (abspath, mtime_ns, size, sha1 hexdigest)
+
+    """
+    with open(filepath, 'rb') as filehandle:
+        file_stat = fstat(filehandle.fileno())
+        digest = hashlib.sha1(filehandle.read()).hexdigest()
+    return (path.abspath(filepath), file_stat.st_mtime_ns, file_stat.st_size, digest)
+
+def resolve_config(config):
+    """flatten a parsed config to plain dicts with interpolation applied
+
+    Args:
+        config (:obj:`configparser.ConfigParser`): parsed config
+
+    Returns:
+        (:obj:`dict`): {section: {key: value}}, DEFAULT included
+
+    Raises:
+        (:obj:`configparser.Error`): a value fails to interpolate
+
+    """
+    return {
+        section_name: {
+            key_name: config.get(section_name, key_name)
+            for key_name in config[section_name]
+        }
+        for section_name in [config.default_section] + config.sections()
+    }
+
+def build_resolved_config(resolved):
+    """rebuild a ConfigParser from resolve_config() output.  No interpolation: values are final
+
+    Args:
+        resolved (:obj:`dict`): {section: {key: value}}
+
+    Returns:
+        (:obj:`configparser.ConfigParser`)
+
+    """
+    config_parser = configparser.ConfigParser(
+        interpolation=None,
+        allow_no_value=True,
+        delimiters=('='),
+        inline_comment_prefixes=('#')
+    )
+    config_parser.read_dict(resolved)
+    return config_parser
+
+def read_cached_configs(
+        config_filepath,
+        local_filepath,
+        logger=DEFAULT_LOGGER
+):
+    """get_configs() through the on-disk cache
+
+    Notes:
+        The cache holds resolved values for both files, keyed by each file's
+        path/mtime/size/sha1.  A warm start reads and hashes the sources but skips
+        parsing and interpolation.  Any mismatch or unreadable cache re-parses and
+        rewrites it; a cache that cannot be written (read-only install) is skipped.
+        Uses marshal, which only loads plain data
+
+    Args:
+        config_filepath (str): path to tracked config
+        local_filepath (str): path to untracked config
+        logger (:obj:`logging.Logger`, optional): logger to catch debug msgs
+
+    Returns:
+        (:obj:`configparser.ConfigParser`) global_config
+        (:obj:`configparser.ConfigParser`) local_config
+
+    """
+    cache_path = get_config_cache_path(config_filepath)
+    try:
+        sources = [
+            get_source_signature(config_filepath),
+            get_source_signature(local_filepath)
+        ]
+    except OSError:
+        sources = None  #let read_config() report the missing file
+
+    if sources:
+        cached = load_config_cache(cache_path)
+        if cached is not None and cached['sources'] == sources:
+            logger.debug('config cache hit: {0}'.format(cache_path))
+            return tuple(build_resolved_config(resolved) for resolved in cached['configs'])
+
+    global_config = read_config(config_filepath, logger)
+    local_config = read_config(local_filepath, logger)
+    if not sources:
+        return global_config, local_config
+
+    try:
+        configs = [resolve_config(global_config), resolve_config(local_config)]
+    except configparser.Error as error_msg:
+        #bad ${reference}: leave it to fail on get(), like an uncached config
+        logger.debug('config not cacheable: {0}'.format(error_msg))
+        return global_config, local_config
+
+    write_config_cache(
+        cache_path,
+        {'version': CACHE_VERSION, 'sources': sources, 'configs': configs},
+        logger
+    )
+    return global_config, local_config
+
+def load_config_cache(cache_path):
+    """read a cache file
+
+    Args:
+        cache_path (str): path to cache
+
+    Returns:
+        (:obj:`dict`): cache contents, or None if missing/corrupt/other version
+
+    """
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            cached = marshal.load(cache_file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cached, dict) or cached.get('version') != CACHE_VERSION:
+        return None
+    return cached
+
+def write_config_cache(cache_path, cached, logger=DEFAULT_LOGGER):
+    """write a cache file atomically (temp file + rename), ignoring failures
+
+    Args:
+        cache_path (str): path to cache
+        cached (:obj:`dict`): cache contents
+        logger (:obj:`logging.Logger`, optional): logger to catch debug msgs
+
+    """
+    temp_path = '{0}.{1}.tmp'.format(cache_path, getpid())
+    try:
+        with open(temp_path, 'wb') as cache_file:
+            marshal.dump(cached, cache_file)
+        replace(temp_path, cache_path)
+    except OSError as error_msg:
+        logger.debug('unable to write config cache: {0}'.format(error_msg))
+        try:
+            remove(temp_path)
+        except OSError:
+            pass
+
 def read_config(
         config_filepath,
         logger=DEFAULT_LOGGER
@@ -22,24 +22,69 @@ Example:
 """
 
 from os import path, makedirs, access, W_OK#, R_OK
+import os
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 import warnings
 from enum import Enum
 import re
-
-import requests
+import copy
+import queue
+import time
+import threading
+import random
+import gzip
+import shutil
+import json
+import struct
+import sys
+import weakref
+from collections import OrderedDict, deque
+from operator import attrgetter
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError: #pragma: no cover
+    fcntl = None    #windows: no multiprocess-safe rotation
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None    #log_compression = zstd falls back to gzip
+
+try:
+    import orjson
+except ImportError:
+    orjson = None       #JSONFormatter falls back to stdlib json
 
 #import prosper.common as common
 import prosper.common.prosper_config as p_config
-import prosper.common.prosper_utilities as p_utils
 
 HERE = path.abspath(path.dirname(__file__))
 ME = __file__.replace('.py', '')
 CONFIG_ABSPATH = path.join(HERE, 'common_config.cfg')
 
-#COMMON_CONFIG = get_config(CONFIG_ABSPATH)
-COMMON_CONFIG = p_config.ProsperConfig(CONFIG_ABSPATH)
+_COMMON_CONFIG = None   #parsed on first use, see get_common_config()
+def get_common_config():
+    """load prosper.common's default config (common_config.cfg) on first use
+
+    Returns:
+        (:obj:`prosper_config.ProsperConfig`): shared default config
+
+    """
+    global _COMMON_CONFIG
+    if _COMMON_CONFIG is None:
+        _COMMON_CONFIG = p_config.ProsperConfig(CONFIG_ABSPATH)
+    return _COMMON_CONFIG
+
+def __getattr__(name):
+    """keep `prosper_logging.COMMON_CONFIG` working without parsing it at import time"""
+    if name == 'COMMON_CONFIG':
+        return get_common_config()
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+_DEFAULT_CONFIG = object()  #sentinel: ProsperLogger() without config_obj uses COMMON_CONFIG
 
 DISCORD_MESSAGE_LIMIT = 2000
 DISCORD_PAD_SIZE = 100
@@ -49,12 +94,66 @@ DEFAULT_LOGGER.addHandler(logging.NullHandler())
 
 SILENCE_OVERRIDE = False    #deactivate webhook loggers for testmode
 
+DEFAULT_QUEUE_SIZE = 1000
+QUEUE_TIMEOUT = 5.0                 #seconds to wait on a stuck queue before giving up
+OVERFLOW_WARNING_INTERVAL = 60.0    #seconds between 'queue full' warnings
+
+DEFAULT_FLUSH_INTERVAL = 1.0    #seconds a queued file record can sit in the write buffer
+DEFAULT_WRITE_BUFFER = 65536    #bytes buffered by the queued file writer
+DEFAULT_FLUSH_LEVEL = 'ERROR'   #queued file writer flushes immediately at/above this level
+
+INDEX_EXTENSION = '.idx'                    #sidecar index next to each log file
+LOG_INDEX_ENTRY = struct.Struct('<QIddB')   #block offset, length, min/max record.created, level bitmap
+
+DEFAULT_BATCH_LATENCY = 5.0     #seconds a batched webhook record waits before posting
+SLACK_ATTACHMENT_LIMIT = 20     #slack recommends <= 20 attachments per message
+
+DEFAULT_DEDUP_CACHE_SIZE = 256  #distinct alerts tracked by DuplicateAlertFilter
+
+DEFAULT_SAMPLING_PASS_LEVEL = 'WARNING'     #sampling filters never drop records at/above this level
+DEFAULT_SAMPLING_REPORT_INTERVAL = 60.0     #seconds between 'suppressed N records' reports
+DEFAULT_SAMPLING_CACHE_SIZE = 1024          #distinct keys tracked by KeyedTokenBucketFilter
+
+DEFAULT_FLIGHT_RECORDER_SIZE = 500      #records kept in memory by FlightRecorderHandler
+DEFAULT_FLIGHT_TRIGGER_LEVEL = 'ERROR'  #FlightRecorderHandler dumps its buffer at/above this level
+DEFAULT_FLIGHT_EXCERPT_LINES = 10       #buffered records attached to webhook alerts
+DEFAULT_FLIGHT_EXCERPT_CHARS = 800      #max characters of that excerpt
+
+WEBHOOK_RATE_LIMIT = 2.5       #requests/sec per webhook (discord allows 5 per 2s)
+WEBHOOK_RATE_BURST = 5          #requests allowed back-to-back
+WEBHOOK_MAX_RETRIES = 3         #retries on 429/5xx before dropping a message
+WEBHOOK_BACKOFF = 0.5           #seconds, base for jittered exponential backoff
+
+WEBHOOK_POOL_SIZE = 4           #keep-alive connections per webhook host
+WEBHOOK_CONNECT_TIMEOUT = 3.05  #seconds
+WEBHOOK_READ_TIMEOUT = 10.0     #seconds
+
 class ReportingFormats(Enum):
     """Enum for storing handy log formats"""
     DEFAULT = '[%(asctime)s;%(levelname)s;%(filename)s;%(funcName)s;%(lineno)s] %(message)s'
     PRETTY_PRINT = '[%(levelname)s:%(filename)s--%(funcName)s:%(lineno)s]\n%(message).1000s'
     STDOUT = '[%(levelname)s:%(filename)s--%(funcName)s:%(lineno)s] %(message)s'
     SLACK_PRINT = '%(message).1000s'
+    JSON = '%(asctime)s %(levelname)s %(name)s %(filename)s %(funcName)s %(lineno)s %(message)s'  # JSON lines, see JSONFormatter
+
+class OverflowPolicy(Enum):
+    """Enum for picking what a full QueuedHandler does with new records"""
+    DROP_OLDEST = 'drop_oldest'     # evict the oldest queued record to make room
+    DROP_NEWEST = 'drop_newest'     # discard the incoming record
+    BLOCK = 'block'                 # wait on the logging thread until there is room
+
+class RotationPolicy(Enum):
+    """Enum for picking what triggers a log file rollover"""
+    TIME = 'time'       # every log_freq (TimedRotatingFileHandler behavior)
+    SIZE = 'size'       # when the file reaches log_max_bytes
+    HYBRID = 'hybrid'   # whichever comes first
+
+class SamplingPolicy(Enum):
+    """Enum for picking how a high-volume logger samples records below WARNING"""
+    EVERY_N = 'every_n'             # keep 1 in log_sample_every
+    PROBABILISTIC = 'probabilistic' # keep each record with probability log_sample_rate
+    TOKEN_BUCKET = 'token_bucket'   # log_sample_max_rate records/sec per call site
+    ADAPTIVE = 'adaptive'           # tighten 1-in-N once records/sec pass log_sample_max_rate
 
 class ProsperLogger(object):
     """One logger to rule them all.  Build the right logger for your script in a few easy steps
@@ -65,6 +164,7 @@ class ProsperLogger(object):
         log_path (str): path for logfile.  abspath > relpath
         log_info (:obj:`list` of :obj:`str`):  list of 'handler_name @ log_level' for debug
         log_handlers (:obj:`list` of :obj:`logging.handlers`): collection of all handlers attached (for testing)
+        sampling_filter (:obj:`SamplingFilter`): filter dropping excess records below WARNING, or None
 
     Todo:
         * add args/local/global config priority management
@@ -75,7 +175,7 @@ class ProsperLogger(object):
             self,
             log_name,
             log_path,
-            config_obj=COMMON_CONFIG,
+            config_obj=_DEFAULT_CONFIG,
             debug_mode=_debug_mode
     ):
         """ProsperLogger initialization
@@ -83,11 +183,13 @@ class ProsperLogger(object):
         Attributes:
             log_name (str): the name of the log/log_object
             log_path (str): path for logfile.  abspath > relpath
-            config_obj (:obj:`configparser.ConfigParser`, optional): config object for loading default behavior
+            config_obj (:obj:`configparser.ConfigParser`, optional): config object for loading default behavior (default: COMMON_CONFIG)
             debug_mode (bool): debug/verbose modes inside object (UNIMPLEMENTED)
 
         """
         self.logger = logging.getLogger(log_name)
+        if config_obj is _DEFAULT_CONFIG:
+            config_obj = get_common_config()
         if not isinstance(config_obj, p_config.ProsperConfig):
             raise TypeError
         self.config = config_obj
@@ -99,6 +201,7 @@ class ProsperLogger(object):
 
         self.log_info = []
         self.log_handlers = []
+        self._handler_settings = []    #(prefix, fallback_level, handler_name) per log_handlers entry
 
         self.configure_default_logger(
             log_freq='midnight',
@@ -106,6 +209,7 @@ class ProsperLogger(object):
             log_level='INFO',
             debug_mode=debug_mode
         )
+        self.configure_sampling()
 
     def get_logger(self):
         """return the logger for the user"""
@@ -120,10 +224,38 @@ class ProsperLogger(object):
         for handler in self.log_handlers:
             yield handler
 
+    def get_metrics(self):
+        """snapshot of per-handler counters
+
+        Returns:
+            (:obj:`dict`): {handler_name: counters}, see HandlerMetrics.snapshot().
+                Queued handlers add `dropped` and `delivery` (counters for the wrapped handler),
+                webhook handlers add `webhook` (sent/retried/dropped and a `status` histogram)
+
+        """
+        metrics = {}
+        for handler, (_, _, handler_name) in zip(self.log_handlers, self._handler_settings):
+            name = handler_name
+            duplicate = 1
+            while name in metrics:
+                duplicate += 1
+                name = '{0}#{1}'.format(handler_name, duplicate)
+            metrics[name] = get_handler_metrics(handler)
+        return metrics
+
     def close_handles(self):
-        """cannot delete logs unless handles are closed (windows)"""
+        """cannot delete logs unless handles are closed (windows)
+
+        Notes:
+            Handlers shared with other ProsperLogger objects (see acquire_handler()) stay open
+            and attached until the last one lets go
+
+        """
         for handle in self.log_handlers:
+            if not release_handler(self, handle):
+                continue
             try:
+                self.logger.removeHandler(handle)
                 handle.close()
             except Exception:
                 warnings.warn(
@@ -132,6 +264,23 @@ class ProsperLogger(object):
                 )
                 pass #do not crash if can't close handle
 
+    async def aclose_handles(self):
+        """close_handles() for asyncio services: awaits async webhook handlers draining"""
+        for handle in self.log_handlers:
+            if not release_handler(self, handle):
+                continue
+            try:
+                self.logger.removeHandler(handle)
+                if hasattr(handle, 'aclose'):
+                    await handle.aclose()
+                else:
+                    handle.close()
+            except Exception:
+                warnings.warn(
+                    'WARNING: unable to close logging handle',
+                    RuntimeWarning
+                )
+
     def _configure_common(
             self,
             prefix,
@@ -162,16 +311,284 @@ class ProsperLogger(object):
         log_format = ReportingFormats[log_format_name].value if log_format_name else fallback_format
 
         ## Attach handlers/formatter ##
-        formatter = logging.Formatter(log_format)
+        formatter = build_formatter(log_format)
         handler.setFormatter(formatter)
+        instrument_handler(handler)
+        if isinstance(handler, QueuedHandler):  #delivery side runs on the worker thread
+            instrument_handler(handler.handler)
         handler.setLevel(log_level)
         self.logger.addHandler(handler)
-        if not self.logger.isEnabledFor(logging.getLevelName(log_level)): # make sure logger level is not lower than handler level
-            self.logger.setLevel(log_level)
 
         ## Save info about handler created ##
         self.log_info.append(handler_name + ' @ ' + str(log_level))
         self.log_handlers.append(handler)
+        self._handler_settings.append((prefix, fallback_level, handler_name))
+        self.refresh_level()
+
+    def refresh_level(self):
+        """set the logger level to the lowest level any attached handler accepts
+
+        Notes:
+            Raises the logger level as well as lowering it: once no handler wants DEBUG,
+            `logger.debug()` short-circuits at isEnabledFor() instead of building a record.
+            Call after changing handler levels by hand (set_handler_level() does it for you)
+
+        """
+        handler_levels = [handler.level for handler in self.logger.handlers]
+        if not handler_levels:
+            return
+        self.logger.setLevel(max(min(handler_levels), 1))    #0 (NOTSET) would defer to the parent logger
+
+    def set_handler_level(self, handler, log_level):
+        """change one handler's level and re-gate the logger
+
+        Args:
+            handler (:obj:`logging.Handler`): handler from self.log_handlers
+            log_level (str or int): new level
+
+        """
+        handler.setLevel(log_level)
+        if handler in self.log_handlers:
+            index = self.log_handlers.index(handler)
+            self.log_info[index] = self._handler_settings[index][2] + ' @ ' + str(log_level)
+        self.refresh_level()
+
+    def remove_handler(self, handler, close=True):
+        """detach a handler (optionally closing it) and re-gate the logger
+
+        Notes:
+            A handler shared with another ProsperLogger stays attached until that one lets go too
+
+        Args:
+            handler (:obj:`logging.Handler`): handler from self.log_handlers
+            close (bool, optional): close the handler after removing it
+
+        """
+        while handler in self.log_handlers:
+            index = self.log_handlers.index(handler)
+            del self.log_handlers[index]
+            del self.log_info[index]
+            del self._handler_settings[index]
+        if release_handler(self, handler):
+            self.logger.removeHandler(handler)
+            if close:
+                handler.close()
+        self.refresh_level()
+
+    def reapply_levels(self, config_obj=None):
+        """re-read `<prefix>log_level` for every handler and apply it in place
+
+        Notes:
+            Handlers are not rebuilt.  Usable as a ProsperConfig reload callback:
+            `config.add_reload_callback(LogBuilder.reapply_levels)`
+
+        Args:
+            config_obj (:obj:`prosper_config.ProsperConfig`, optional): config to read (default: self.config)
+
+        """
+        config_obj = config_obj or self.config
+        for index, (prefix, fallback_level, handler_name) in enumerate(self._handler_settings):
+            log_level = config_obj.get_option(
+                'LOGGING', prefix + 'log_level',
+                None, fallback_level
+            )
+            self.log_handlers[index].setLevel(log_level)
+            self.log_info[index] = handler_name + ' @ ' + str(log_level)
+        self.refresh_level()
+
+    def _webhook_connection_options(self):
+        """load HTTP pool/timeout/rate-limit settings for webhook handlers from config
+
+        Returns:
+            (:obj:`dict`): connection kwargs for HackyDiscordHandler/HackySlackHandler
+
+        """
+        pool_size = self.config.get_int(
+            'LOGGING', 'webhook_pool_size',
+            None, WEBHOOK_POOL_SIZE
+        )
+        connect_timeout = self.config.get_float(
+            'LOGGING', 'webhook_connect_timeout',
+            None, WEBHOOK_CONNECT_TIMEOUT
+        )
+        read_timeout = self.config.get_float(
+            'LOGGING', 'webhook_read_timeout',
+            None, WEBHOOK_READ_TIMEOUT
+        )
+
+        rate_limit = self.config.get_float(
+            'LOGGING', 'webhook_rate_limit',
+            None, WEBHOOK_RATE_LIMIT
+        )
+        rate_burst = self.config.get_int(
+            'LOGGING', 'webhook_rate_burst',
+            None, WEBHOOK_RATE_BURST
+        )
+        max_retries = self.config.get_int(
+            'LOGGING', 'webhook_max_retries',
+            None, WEBHOOK_MAX_RETRIES
+        )
+
+        return {
+            'pool_size': pool_size,
+            'connect_timeout': connect_timeout,
+            'read_timeout': read_timeout,
+            'rate_limit': rate_limit,
+            'rate_burst': rate_burst,
+            'max_retries': max_retries
+        }
+
+    def _attach_webhook_filters(self, handler):
+        """attach config-driven filters (duplicate suppression) to a webhook handler
+
+        Args:
+            handler (:obj:`logging.Handler`): outermost webhook handler attached to logger
+
+        """
+        dedup_window = self.config.get_float(
+            'LOGGING', 'webhook_dedup_window',
+            None, None
+        )
+        if not dedup_window:
+            return
+
+        dedup_cache_size = self.config.get_int(
+            'LOGGING', 'webhook_dedup_cache_size',
+            None, DEFAULT_DEDUP_CACHE_SIZE
+        )
+        handler.addFilter(DuplicateAlertFilter(
+            window=dedup_window,
+            cache_size=dedup_cache_size
+        ))
+
+    def _file_rotation_options(self):
+        """read size/hybrid rotation, compression and retention settings for the file handler
+
+        Returns:
+            (:obj:`dict`): HybridRotatingFileHandler kwargs
+
+        """
+        return {
+            'rotation': get_rotation_policy(self.config.get_option(
+                'LOGGING', 'log_rotation',
+                None, RotationPolicy.TIME.name
+            )),
+            'max_bytes': self.config.get_int(
+                'LOGGING', 'log_max_bytes',
+                None, 0
+            ),
+            'max_total_bytes': self.config.get_int(
+                'LOGGING', 'log_max_total_bytes',
+                None, 0
+            ),
+            'compression': get_compression(self.config.get_option(
+                'LOGGING', 'log_compression',
+                None, None
+            )),
+            'index_block': self.config.get_int(
+                'LOGGING', 'log_index_block',
+                None, 0
+            )
+        }
+
+    def configure_sampling(self, sampling_filter=None):
+        """attach a SamplingFilter to the logger, replacing any earlier one
+
+        Args:
+            sampling_filter (:obj:`SamplingFilter`, optional): filter to attach (default: built from `log_sampling` config, none if blank)
+
+        Returns:
+            (:obj:`SamplingFilter`): filter attached, or None
+
+        Notes:
+            Logger filters only see records logged on this logger, not ones propagated from child loggers
+
+        """
+        if sampling_filter is None:
+            sampling_filter = self._build_sampling_filter()
+
+        for existing_filter in list(self.logger.filters):
+            if isinstance(existing_filter, SamplingFilter):
+                self.logger.removeFilter(existing_filter)
+        if sampling_filter is not None:
+            self.logger.addFilter(sampling_filter)
+        self.sampling_filter = sampling_filter
+        return sampling_filter
+
+    def _build_sampling_filter(self):
+        """read log_sampling settings from config
+
+        Returns:
+            (:obj:`SamplingFilter`): configured filter, or None if sampling is off
+
+        """
+        policy_name = self.config.get_option(
+            'LOGGING', 'log_sampling',
+            None, None
+        )
+        if not policy_name:
+            return None
+        policy = _parse_policy(SamplingPolicy, policy_name, None, 'sampling policy')
+        if policy is None:
+            return None
+
+        report_interval = self.config.get_float(
+            'LOGGING', 'log_sample_report_interval',
+            None, DEFAULT_SAMPLING_REPORT_INTERVAL
+        )
+        if policy == SamplingPolicy.EVERY_N:
+            return EveryNFilter(
+                self.config.get_int('LOGGING', 'log_sample_every', None, 10),
+                report_interval=report_interval
+            )
+        if policy == SamplingPolicy.PROBABILISTIC:
+            return ProbabilisticFilter(
+                self.config.get_float('LOGGING', 'log_sample_rate', None, 0.1),
+                report_interval=report_interval
+            )
+
+        max_rate = self.config.get_float('LOGGING', 'log_sample_max_rate', None, 10.0)
+        if policy == SamplingPolicy.TOKEN_BUCKET:
+            return KeyedTokenBucketFilter(
+                max_rate,
+                burst=self.config.get_float('LOGGING', 'log_sample_burst', None, max_rate),
+                report_interval=report_interval
+            )
+        return AdaptiveSamplingFilter(max_rate, report_interval=report_interval)
+
+    def _build_queued_handler(self, handler):
+        """wrap a (slow) handler for background delivery
+
+        Args:
+            handler (:obj:`logging.Handler`): handler to move off the logging thread
+
+        Returns:
+            (:obj:`QueuedHandler`): non-blocking handler to attach instead
+
+        """
+        try:
+            queue_size = self.config.get_int(
+                'LOGGING', 'webhook_queue_size',
+                None, DEFAULT_QUEUE_SIZE
+            )
+        except ValueError as error_msg:
+            warnings.warn(
+                'Invalid webhook_queue_size, defaulting to {0}: {1}'.format(
+                    DEFAULT_QUEUE_SIZE, error_msg
+                ),
+                RuntimeWarning
+            )
+            queue_size = DEFAULT_QUEUE_SIZE
+        overflow_name = self.config.get_option(
+            'LOGGING', 'webhook_overflow',
+            None, OverflowPolicy.DROP_OLDEST.name
+        )
+
+        return QueuedHandler(
+            handler,
+            queue_size=queue_size,
+            overflow_policy=get_overflow_policy(overflow_name)
+        )
 
     def configure_default_logger(
             self,
@@ -179,6 +596,9 @@ class ProsperLogger(object):
             log_total=30,
             log_level='INFO',
             log_format=ReportingFormats.DEFAULT.value,
+            queued=False,
+            flush_interval=DEFAULT_FLUSH_INTERVAL,
+            multiprocess=False,
             debug_mode=_debug_mode
     ):
         """default logger that every Prosper script should use!!
@@ -188,6 +608,9 @@ class ProsperLogger(object):
             log_total (int): how many log_freq periods between log rotations
             log_level (str): minimum desired log level https://docs.python.org/3/library/logging.html#logging-levels
             log_format (str): format for logging messages https://docs.python.org/3/library/logging.html#logrecord-attributes
+            queued (bool, optional): write/rotate from a background thread in buffered chunks
+            flush_interval (float, optional): max seconds a queued record waits in the write buffer
+            multiprocess (bool, optional): coordinate rollover with other processes logging to the same file
             debug_mode (bool): a way to trigger debug/verbose modes inside object (UNIMPLEMENTED)
 
         """
@@ -196,21 +619,96 @@ class ProsperLogger(object):
             'LOGGING', 'log_freq',
             None, log_freq
         )
-        log_total = self.config.get_option(
+        log_total = self.config.get_int(
             'LOGGING', 'log_total',
             None, log_total
         )
 
+        queued = self.config.get_bool(
+            'LOGGING', 'log_queued',
+            None, queued
+        )
+        multiprocess = self.config.get_bool(
+            'LOGGING', 'log_multiprocess',
+            None, multiprocess
+        )
+        if multiprocess and fcntl is None:  #pragma: no cover
+            warnings.warn(
+                'log_multiprocess needs fcntl (POSIX), using single-process file handler',
+                RuntimeWarning
+            )
+            multiprocess = False
+        flush_interval = self.config.get_float(
+            'LOGGING', 'log_flush_interval',
+            None, flush_interval
+        )
+
+        rotation_options = self._file_rotation_options()
+        buffer_size = self.config.get_int(
+            'LOGGING', 'log_buffer_size',
+            None, DEFAULT_WRITE_BUFFER
+        )
+        flush_level = self.config.get_option(
+            'LOGGING', 'log_flush_level',
+            None, DEFAULT_FLUSH_LEVEL
+        )
+        queue_size = self.config.get_int(
+            'LOGGING', 'log_queue_size',
+            None, DEFAULT_QUEUE_SIZE
+        )
+
         ## Set up log file handles/name ##
         log_filename = self.log_name + '.log'
         log_abspath = path.join(self.log_path, log_filename)
-        general_handler = TimedRotatingFileHandler(
-            log_abspath,
-            when=log_freq,
-            interval=1,
-            backupCount=int(log_total)
-        )
 
+        def build_handler():
+            """open the file handler (only if no ProsperLogger already has this one open)"""
+            if multiprocess:    #every record is flushed: big buffers would interleave across processes
+                general_handler = MultiprocessTimedRotatingFileHandler(
+                    log_abspath,
+                    when=log_freq,
+                    interval=1,
+                    backupCount=log_total,
+                    **rotation_options
+                )
+            elif queued:
+                general_handler = BufferedTimedRotatingFileHandler(
+                    log_abspath,
+                    when=log_freq,
+                    interval=1,
+                    backupCount=log_total,
+                    buffer_size=buffer_size,
+                    flush_interval=flush_interval,
+                    flush_level=flush_level,
+                    **rotation_options
+                )
+            else:
+                general_handler = HybridRotatingFileHandler(
+                    log_abspath,
+                    when=log_freq,
+                    interval=1,
+                    backupCount=log_total,
+                    **rotation_options
+                )
+
+            if queued:
+                general_handler = QueuedHandler(
+                    general_handler,
+                    queue_size=queue_size,
+                    overflow_policy=OverflowPolicy.BLOCK,   #never lose file records
+                    flush_interval=flush_interval
+                )
+            return general_handler
+
+        general_handler = acquire_handler(
+            (
+                self.log_name, log_abspath, 'default', log_freq, log_total,
+                multiprocess, queued, flush_interval, buffer_size, flush_level, queue_size,
+                tuple(sorted(rotation_options.items()))
+            ),
+            self,
+            build_handler
+        )
         self._configure_common('', log_level, log_format, 'default', general_handler)
 
     def configure_debug_logger(
@@ -231,7 +729,69 @@ class ProsperLogger(object):
 
         """
 
-        self._configure_common('debug_', log_level, log_format, 'Debug', logging.StreamHandler())
+        debug_handler = acquire_handler(
+            (self.log_name, self.log_path, 'Debug', sys.stderr),
+            self,
+            logging.StreamHandler
+        )
+        self._configure_common('debug_', log_level, log_format, 'Debug', debug_handler)
+
+    def configure_flight_recorder(
+            self,
+            buffer_size=None,
+            trigger_level=None,
+            excerpt_lines=None,
+            log_level='DEBUG',
+            log_format=ReportingFormats.STDOUT.value,
+            debug_mode=_debug_mode
+    ):
+        """keep recent DEBUG/INFO records in memory, write them to the log file when an ERROR hits
+
+        Note:
+            Lowers the logger to log_level so the recorder sees DEBUG calls.
+            The recorder is moved ahead of the other handlers so webhook handlers get the excerpt
+
+        Args:
+            buffer_size (int, optional): records kept in memory (default: `flight_buffer_size` config)
+            trigger_level (str, optional): level that dumps the buffer (default: `flight_trigger_level` config)
+            excerpt_lines (int, optional): recent records attached to webhook alerts, 0 for none (default: `flight_excerpt_lines` config)
+            log_level (str): lowest level recorded https://docs.python.org/3/library/logging.html#logging-levels
+            log_format (str): format for the webhook excerpt https://docs.python.org/3/library/logging.html#logrecord-attributes
+            debug_mode (bool): a way to trigger debug/verbose modes inside object (UNIMPLEMENTED)
+
+        """
+        if buffer_size is None:
+            buffer_size = self.config.get_int(
+                'LOGGING', 'flight_buffer_size',
+                None, DEFAULT_FLIGHT_RECORDER_SIZE
+            )
+        if trigger_level is None:
+            trigger_level = self.config.get_option(
+                'LOGGING', 'flight_trigger_level',
+                None, DEFAULT_FLIGHT_TRIGGER_LEVEL
+            )
+        if excerpt_lines is None:
+            excerpt_lines = self.config.get_int(
+                'LOGGING', 'flight_excerpt_lines',
+                None, DEFAULT_FLIGHT_EXCERPT_LINES
+            )
+
+        target = self.log_handlers[0] if self.log_handlers else None
+        flight_handler = acquire_handler(
+            (self.log_name, self.log_path, 'FlightRecorder', target, buffer_size, trigger_level, excerpt_lines),
+            self,
+            lambda: FlightRecorderHandler(
+                target=target,
+                buffer_size=buffer_size,
+                trigger_level=trigger_level,
+                excerpt_lines=excerpt_lines
+            )
+        )
+        self._configure_common('flight_', log_level, log_format, 'FlightRecorder', flight_handler)
+
+        # run before webhook handlers so the ERROR carries its excerpt when they format it
+        self.logger.removeHandler(flight_handler)
+        self.logger.handlers.insert(0, flight_handler)
 
     def configure_discord_logger(
             self,
@@ -239,6 +799,9 @@ class ProsperLogger(object):
             discord_recipient=None,
             log_level='ERROR',
             log_format=ReportingFormats.PRETTY_PRINT.value,
+            queued=False,
+            batch_latency=None,
+            async_loop=None,
             debug_mode=_debug_mode
     ):
         """logger for sending messages to Discord.  Easy way to alert humans of issues
@@ -252,6 +815,9 @@ class ProsperLogger(object):
             discord_recipient (`str`:<@int>, optional): user/group to notify
             log_level (str): desired log level for handle https://docs.python.org/3/library/logging.html#logging-levels
             log_format (str): format for logging messages https://docs.python.org/3/library/logging.html#logrecord-attributes
+            queued (bool, optional): deliver from a background thread instead of the logging thread
+            batch_latency (float, optional): if set, pack records into one post, waiting at most this many seconds
+            async_loop (:obj:`asyncio.AbstractEventLoop`, optional): deliver from a task on this loop (asyncio services)
             debug_mode (bool): a way to trigger debug/verbose modes inside object (UNIMPLEMENTED)
 
         """
@@ -264,6 +830,10 @@ class ProsperLogger(object):
             'LOGGING', 'discord_recipient',
             None, discord_recipient
         )
+        batch_latency = self.config.get_float(
+            'LOGGING', 'discord_batch_latency',
+            None, batch_latency
+        )
 
         ## Make sure we CAN build a discord webhook ##
         if not discord_webhook:
@@ -277,10 +847,44 @@ class ProsperLogger(object):
         discord_obj = DiscordWebhook()
         discord_obj.webhook(discord_webhook)
         if discord_obj.can_query:
+            connection_options = self._webhook_connection_options()
+
+            def build_handler():
+                """build the discord handler (only if no ProsperLogger already posts to this webhook)"""
+                if async_loop is not None:
+                    import prosper.common.prosper_async_logging as p_async
+                    discord_handler = p_async.AsyncDiscordHandler(
+                        discord_obj,
+                        discord_recipient,
+                        loop=async_loop,
+                        **connection_options
+                    )
+                elif batch_latency:
+                    discord_handler = BatchingDiscordHandler(
+                        discord_obj,
+                        discord_recipient,
+                        batch_latency=batch_latency,
+                        **connection_options
+                    )
+                else:
+                    discord_handler = HackyDiscordHandler(
+                        discord_obj,
+                        discord_recipient,
+                        **connection_options
+                    )
+                if queued and async_loop is None:
+                    discord_handler = self._build_queued_handler(discord_handler)
+                self._attach_webhook_filters(discord_handler)
+                return discord_handler
+
             try:
-                discord_handler = HackyDiscordHandler(
-                    discord_obj,
-                    discord_recipient
+                discord_handler = acquire_handler(
+                    (
+                        self.log_name, self.log_path, 'Discord', discord_webhook, discord_recipient,
+                        queued, batch_latency, async_loop, tuple(sorted(connection_options.items()))
+                    ),
+                    self,
+                    build_handler
                 )
                 self._configure_common(
                     'discord_',
@@ -302,6 +906,10 @@ class ProsperLogger(object):
             slack_webhook=None,
             log_level='ERROR',
             log_format=ReportingFormats.SLACK_PRINT.value,
+            queued=False,
+            batch_latency=None,
+            batch_size=SLACK_ATTACHMENT_LIMIT,
+            async_loop=None,
             debug_mode=_debug_mode
     ):
         """logger for sending messages to Discord.  Easy way to alert humans of issues
@@ -314,6 +922,10 @@ class ProsperLogger(object):
             slack_webhook (str): slack bot webhook (full URL)
             log_level (str): desired log level for handle https://docs.python.org/3/library/logging.html#logging-levels
             log_format (str): format for logging messages https://docs.python.org/3/library/logging.html#logrecord-attributes
+            queued (bool, optional): deliver from a background thread instead of the logging thread
+            batch_latency (float, optional): if set, pack records into one post, waiting at most this many seconds
+            batch_size (int, optional): max records (attachments) per batched post
+            async_loop (:obj:`asyncio.AbstractEventLoop`, optional): deliver from a task on this loop (asyncio services)
             debug_mode (bool): a way to trigger debug/verbose modes inside object (UNIMPLEMENTED)
 
         """
@@ -322,6 +934,14 @@ class ProsperLogger(object):
             'LOGGING', 'slack_webhook',
             None, slack_webhook
         )
+        batch_latency = self.config.get_float(
+            'LOGGING', 'slack_batch_latency',
+            None, batch_latency
+        )
+        batch_size = self.config.get_int(
+            'LOGGING', 'slack_batch_size',
+            None, batch_size
+        )
 
 
         ## Make sure we CAN build a slack webhook ##
@@ -333,9 +953,42 @@ class ProsperLogger(object):
             return
 
         ## Actually build slack logging handler ##
+        connection_options = self._webhook_connection_options()
+
+        def build_handler():
+            """build the slack handler (only if no ProsperLogger already posts to this webhook)"""
+            if async_loop is not None:
+                import prosper.common.prosper_async_logging as p_async
+                slack_handler = p_async.AsyncSlackHandler(
+                    slack_webhook,
+                    loop=async_loop,
+                    **connection_options
+                )
+            elif batch_latency:
+                slack_handler = BatchingSlackHandler(
+                    slack_webhook,
+                    batch_latency=batch_latency,
+                    batch_size=batch_size,
+                    **connection_options
+                )
+            else:
+                slack_handler = HackySlackHandler(
+                    slack_webhook,
+                    **connection_options
+                )
+            if queued and async_loop is None:
+                slack_handler = self._build_queued_handler(slack_handler)
+            self._attach_webhook_filters(slack_handler)
+            return slack_handler
+
         try:
-            slack_handler = HackySlackHandler(
-                slack_webhook
+            slack_handler = acquire_handler(
+                (
+                    self.log_name, self.log_path, 'Slack', slack_webhook, queued,
+                    batch_latency, batch_size, async_loop, tuple(sorted(connection_options.items()))
+                ),
+                self,
+                build_handler
             )
             self._configure_common(
                 'slack_',
@@ -413,7 +1066,7 @@ def create_logger(
         DeprecationWarning
     )
     if not config_obj:
-        config_obj = COMMON_CONFIG
+        config_obj = get_common_config()
 
     if not path.exists(log_path):
         makedirs(log_path)
@@ -542,6 +1195,274 @@ class DiscordWebhook(object):
     def __str__(self):
         return self.webhook_url
 
+_WEBHOOK_SESSIONS = {}
+_WEBHOOK_SESSIONS_LOCK = threading.Lock()
+def get_webhook_session(webhook_url, pool_size=WEBHOOK_POOL_SIZE):
+    """fetch a long-lived requests.Session for the webhook's host
+
+    Note:
+        Sessions are shared by every handler pointed at the same scheme://host,
+        so a burst of alerts reuses open keep-alive connections instead of paying
+        a TCP+TLS handshake per message.
+        `requests` is imported here, not at module load: scripts that only use
+        the file logger never pay for it
+
+    Args:
+        webhook_url (str): full webhook url
+        pool_size (int, optional): max keep-alive connections held open to the host
+
+    Returns:
+        (:obj:`requests.Session`): shared session
+
+    """
+    url_parts = urlsplit(webhook_url)
+    session_key = (url_parts.scheme, url_parts.netloc, int(pool_size))
+    with _WEBHOOK_SESSIONS_LOCK:
+        session = _WEBHOOK_SESSIONS.get(session_key)
+        if session is None:
+            import requests
+            import requests.adapters
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=int(pool_size),
+                max_retries=0
+            )
+            session = requests.Session()
+            session.headers['Connection'] = 'keep-alive'
+            session.mount(url_parts.scheme + '://', adapter)
+            _WEBHOOK_SESSIONS[session_key] = session
+
+    return session
+
+class WebhookRateLimiter(object):
+    """Client-side rate limiting for one webhook URL
+
+    Token bucket keeps steady-state posts under rate_limit.  Server hints are honored:
+    `X-RateLimit-Remaining`/`X-RateLimit-Reset-After` pause the bucket until the window resets,
+    and a 429 `Retry-After` (header or discord JSON body) schedules a retry with jittered backoff.
+    5xx responses are retried the same way
+
+    Attributes:
+        stats (:obj:`dict`): counters for 'sent', 'retried', 'dropped' messages
+        status_counts (:obj:`dict`): histogram of response status codes ('error' for no response)
+
+    """
+    def __init__(
+            self,
+            rate_limit=WEBHOOK_RATE_LIMIT,
+            rate_burst=WEBHOOK_RATE_BURST,
+            max_retries=WEBHOOK_MAX_RETRIES,
+            backoff=WEBHOOK_BACKOFF
+    ):
+        """WebhookRateLimiter init
+
+        Args:
+            rate_limit (float, optional): max posts/sec
+            rate_burst (int, optional): posts allowed back-to-back
+            max_retries (int, optional): retries on 429/5xx before dropping the message
+            backoff (float, optional): base seconds for jittered exponential backoff
+
+        """
+        self.rate_limit = float(rate_limit)
+        self.rate_burst = float(rate_burst)
+        self.max_retries = int(max_retries)
+        self.backoff = float(backoff)
+
+        self.stats = {'sent': 0, 'retried': 0, 'dropped': 0}
+        self.status_counts = {}     #HTTP status (or 'error') -> responses seen
+        self._tokens = self.rate_burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """block until a token is available (and any server-imposed pause is over)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate_burst,
+                    self._tokens + (now - self._updated) * self.rate_limit
+                )
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(
+                    self._blocked_until - now,
+                    (1 - self._tokens) / self.rate_limit
+                )
+            time.sleep(wait)
+
+    def update(self, response):
+        """read rate-limit headers off a webhook response
+
+        Args:
+            response (:obj:`requests.Response`): webhook response
+
+        Returns:
+            (float): seconds the server asked us to wait before retrying (0 if none)
+
+        """
+        headers = response.headers
+        retry_after = 0.0
+        if response.status_code == 429:
+            retry_after = _parse_seconds(headers.get('Retry-After'))
+            if not retry_after:
+                try:    #discord also reports retry_after in the body
+                    retry_after = _parse_seconds(response.json().get('retry_after'))
+                except Exception:
+                    pass
+
+        pause = retry_after
+        if headers.get('X-RateLimit-Remaining') == '0':
+            pause = max(pause, _parse_seconds(headers.get('X-RateLimit-Reset-After')))
+        if pause:
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+        return retry_after
+
+    def post(self, session, url, **kwargs):
+        """rate-limited session.post() with retries
+
+        Args:
+            session (:obj:`requests.Session`): session to post with
+            url (str): webhook url
+            kwargs: passed through to session.post()
+
+        Returns:
+            (:obj:`requests.Response`): successful response
+
+        Raises:
+            RuntimeError: webhook still refused message after max_retries
+            Exception: requests exceptions are passed along (message counted as dropped)
+
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                response = session.post(url, **kwargs)
+            except Exception:
+                self._count_status('error')
+                self._count('dropped')
+                raise
+            self._count_status(response.status_code)
+            retry_after = self.update(response)
+            if response.status_code != 429 and response.status_code < 500:
+                self._count('sent')
+                return response
+            if attempt == self.max_retries:
+                break
+
+            self._count('retried')
+            time.sleep(retry_after + random.uniform(0, self.backoff * 2 ** attempt))
+
+        self._count('dropped')
+        raise RuntimeError(
+            'webhook refused message after {0} retries: status={1}'.format(
+                self.max_retries, response.status_code
+            )
+        )
+
+    def _count(self, stat):
+        """thread-safe counter bump"""
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _count_status(self, status):
+        """thread-safe status histogram bump"""
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def snapshot(self):
+        """copy of stats + status histogram
+
+        Returns:
+            (:obj:`dict`): sent/retried/dropped counts and `status` histogram
+
+        """
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot['status'] = dict(self.status_counts)
+        return snapshot
+
+def _parse_seconds(value):
+    """header/body value to float seconds, 0 if missing/garbage"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+_RATE_LIMITERS = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+def get_rate_limiter(webhook_url, **kwargs):
+    """fetch the shared WebhookRateLimiter for a webhook url
+
+    Note:
+        Limits are per webhook, so every handler posting to the same url shares one bucket.
+        kwargs only apply when the limiter is first created
+
+    Args:
+        webhook_url (str): full webhook url
+        kwargs: WebhookRateLimiter options
+
+    Returns:
+        (:obj:`WebhookRateLimiter`): shared limiter
+
+    """
+    with _RATE_LIMITERS_LOCK:
+        rate_limiter = _RATE_LIMITERS.get(webhook_url)
+        if rate_limiter is None:
+            rate_limiter = WebhookRateLimiter(**kwargs)
+            _RATE_LIMITERS[webhook_url] = rate_limiter
+
+    return rate_limiter
+
+_HANDLER_REGISTRY = {}  #key: [handler, WeakSet of ProsperLoggers using it]
+_HANDLER_REGISTRY_LOCK = threading.Lock()
+def acquire_handler(key, owner, build_handler):
+    """fetch the process-wide handler for key, building it on first use
+
+    Constructing ProsperLogger('app', path) twice gets the same logging.Logger back; sharing
+    handlers keeps the second one from attaching (and opening) a second copy of every handler
+
+    Args:
+        key (tuple): (log_name, log_path, handler kind, construction options...)
+        owner (:obj:`ProsperLogger`): builder taking a reference
+        build_handler (callable): no-arg function that builds the handler
+
+    Returns:
+        (:obj:`logging.Handler`): new or shared handler
+
+    """
+    with _HANDLER_REGISTRY_LOCK:
+        entry = _HANDLER_REGISTRY.get(key)
+        if entry is None:
+            entry = _HANDLER_REGISTRY[key] = [build_handler(), weakref.WeakSet()]
+        entry[1].add(owner)
+        return entry[0]
+
+def release_handler(owner, handler):
+    """drop owner's reference to a shared handler
+
+    Args:
+        owner (:obj:`ProsperLogger`): builder letting go
+        handler (:obj:`logging.Handler`): handler from acquire_handler()
+
+    Returns:
+        (bool): True if nobody else is using handler (caller should detach/close it)
+
+    """
+    with _HANDLER_REGISTRY_LOCK:
+        for key, (registered, owners) in list(_HANDLER_REGISTRY.items()):
+            if registered is handler:
+                owners.discard(owner)
+                if owners:
+                    return False
+                del _HANDLER_REGISTRY[key]
+        return True
+
 class HackyDiscordHandler(logging.Handler):
     """Custom logging.Handler for pushing messages to Discord
 
@@ -552,12 +1473,28 @@ class HackyDiscordHandler(logging.Handler):
     Discord webhook API docs: https://discordapp.com/developers/docs/resources/webhook
 
     """
-    def __init__(self, webhook_obj, alert_recipient=None):
+    def __init__(
+            self,
+            webhook_obj,
+            alert_recipient=None,
+            pool_size=WEBHOOK_POOL_SIZE,
+            connect_timeout=WEBHOOK_CONNECT_TIMEOUT,
+            read_timeout=WEBHOOK_READ_TIMEOUT,
+            rate_limit=WEBHOOK_RATE_LIMIT,
+            rate_burst=WEBHOOK_RATE_BURST,
+            max_retries=WEBHOOK_MAX_RETRIES
+    ):
         """HackyDiscordHandler init
 
         Args:
             webhook_obj (:obj:`DiscordWebhook`): discord webhook has all the info for connection
             alert_recipients (`str`:<@int>, optional): user/group to notify
+            pool_size (int, optional): keep-alive connections to hold open to the webhook host
+            connect_timeout (float, optional): seconds to wait on TCP/TLS connect
+            read_timeout (float, optional): seconds to wait on webhook response
+            rate_limit (float, optional): max posts/sec to the webhook
+            rate_burst (int, optional): posts allowed back-to-back
+            max_retries (int, optional): retries on 429/5xx before dropping the message
 
         """
         logging.Handler.__init__(self)
@@ -566,6 +1503,14 @@ class HackyDiscordHandler(logging.Handler):
             raise Exception('Webhook not configured.')
 
         self.api_url = webhook_obj.webhook_url
+        self.session = get_webhook_session(self.api_url, pool_size)
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = get_rate_limiter(
+            self.api_url,
+            rate_limit=rate_limit,
+            rate_burst=rate_burst,
+            max_retries=max_retries
+        )
         self.alert_recipient = alert_recipient
         self.alert_length = 0
         if self.alert_recipient:
@@ -573,16 +1518,37 @@ class HackyDiscordHandler(logging.Handler):
 
     def emit(self, record): # pragma: no cover
         """required classmethod for logging to execute logging message"""
-        if record.exc_text:
-            record.exc_text = '```python\n{0}\n```'.format(record.exc_text) # recast to code block
-        log_msg = self.format(record)
-        if len(log_msg) + self.alert_length > DISCORD_MESSAGE_LIMIT:
-            log_msg = log_msg[:(DISCORD_MESSAGE_LIMIT - DISCORD_PAD_SIZE)]
+        self.send_msg_to_webhook(self.build_message(record))
+
+    def build_message(self, record):
+        """format record into discord-ready message text
+
+        Args:
+            record (:obj:`logging.LogRecord`): message to log
+
+        Returns:
+            (str): message, trimmed to fit DISCORD_MESSAGE_LIMIT
+
+        """
+        if record.exc_text:
+            record.exc_text = '```python\n{0}\n```'.format(record.exc_text) # recast to code block
+        log_msg = self.format(record)
+        if len(log_msg) + self.alert_length > DISCORD_MESSAGE_LIMIT:
+            log_msg = log_msg[:(DISCORD_MESSAGE_LIMIT - DISCORD_PAD_SIZE)]
+
+        repeat_summary = getattr(record, 'repeat_summary', '')
+        if repeat_summary:
+            log_msg = log_msg + '\n(' + repeat_summary + ')'
+
+        flight_excerpt = getattr(record, 'flight_excerpt', '')
+        room = DISCORD_MESSAGE_LIMIT - DISCORD_PAD_SIZE - self.alert_length - len(log_msg)
+        if flight_excerpt and room > 0:
+            log_msg = log_msg + '\n```\n' + flight_excerpt[-room:] + '\n```'
 
         if self.alert_recipient and record.levelno == logging.CRITICAL:
             log_msg = log_msg + '\n' + str(self.alert_recipient)
 
-        self.send_msg_to_webhook(log_msg)
+        return log_msg
 
     def send_msg_to_webhook(self, message):
         """separated Requests logic for easier testing
@@ -602,10 +1568,12 @@ class HackyDiscordHandler(logging.Handler):
         }
 
         try:
-            request = requests.post(
+            request = self.rate_limiter.post(
+                self.session,
                 self.api_url,
                 headers=header,
-                json=payload
+                json=payload,
+                timeout=self.timeout
             )
         except Exception as error_msg:
             warning_msg = (
@@ -626,19 +1594,67 @@ class HackyDiscordHandler(logging.Handler):
             raise error_msg
 
 class HackySlackHandler(logging.Handler):
-    """Custom logging.Handler for pushing messages to Discord"""
-    def __init__(self, webhook_url):
+    """Custom logging.Handler for pushing messages to Slack"""
+    def __init__(
+            self,
+            webhook_url,
+            pool_size=WEBHOOK_POOL_SIZE,
+            connect_timeout=WEBHOOK_CONNECT_TIMEOUT,
+            read_timeout=WEBHOOK_READ_TIMEOUT,
+            rate_limit=WEBHOOK_RATE_LIMIT,
+            rate_burst=WEBHOOK_RATE_BURST,
+            max_retries=WEBHOOK_MAX_RETRIES
+    ):
+        """HackySlackHandler init
+
+        Args:
+            webhook_url (str): slack bot webhook (full URL)
+            pool_size (int, optional): keep-alive connections to hold open to the webhook host
+            connect_timeout (float, optional): seconds to wait on TCP/TLS connect
+            read_timeout (float, optional): seconds to wait on webhook response
+            rate_limit (float, optional): max posts/sec to the webhook
+            rate_burst (int, optional): posts allowed back-to-back
+            max_retries (int, optional): retries on 429/5xx before dropping the message
+
+        """
         logging.Handler.__init__(self)
 
         self.webhook_url = webhook_url
+        self.session = get_webhook_session(self.webhook_url, pool_size)
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = get_rate_limiter(
+            self.webhook_url,
+            rate_limit=rate_limit,
+            rate_burst=rate_burst,
+            max_retries=max_retries
+        )
 
     def emit(self, record):
-        #log_msg = self.format(record)
+        log_payload, log_msg = self.build_message(record)
+        self.send_msg_to_webhook(log_payload, log_msg)
+
+    def build_message(self, record):
+        """format record into slack attachment + message text
+
+        Args:
+            record (:obj:`logging.LogRecord`): message to log
+
+        Returns:
+            (:obj:`dict`): attachments object for reporting
+            (str): formatted log message
+
+        """
         log_payload = self.decorate(record)
         if record.exc_text:
             record.exc_text = '```\n{0}\n```'.format(record.exc_text) # recast to code block
         log_msg = self.format(record)
-        self.send_msg_to_webhook(log_payload, log_msg)
+        repeat_summary = getattr(record, 'repeat_summary', '')
+        if repeat_summary:
+            log_msg = log_msg + '\n(' + repeat_summary + ')'
+        flight_excerpt = getattr(record, 'flight_excerpt', '')
+        if flight_excerpt:
+            log_msg = log_msg + '\n```\n' + flight_excerpt + '\n```'
+        return log_payload, log_msg
 
     def decorate(self, record):
         """add slack-specific flourishes to responses
@@ -685,23 +1701,1602 @@ class HackySlackHandler(logging.Handler):
             'text': log_msg,
             'attachments':[json_payload]
         }
+        self.post_payload(payload, log_msg)
+
+    def post_payload(self, payload, log_msg):
+        """POST a complete slack payload to the webhook
+
+        Args:
+            payload (:obj:`dict`): slack message (text + attachments)
+            log_msg (str): message text for failure warnings
+
+        """
         header = {
             'Content-Type':'application/json'
         }
 
         try:
-            request = requests.post(
+            request = self.rate_limiter.post(
+                self.session,
                 self.webhook_url,
                 headers=header,
-                json=payload
+                json=payload,
+                timeout=self.timeout
             )
         except Exception as error_msg:
             warning_msg = (
                 'EXCEPTION: UNABLE TO COMMIT LOG MESSAGE' +
                 '\n\texception={0}'.format(error_msg) +
-                '\n\tmessage={0}'.format(message)
+                '\n\tmessage={0}'.format(log_msg)
             )
             warnings.warn(
                 warning_msg,
                 RuntimeWarning
             )
+
+class _WebhookBatchMixin(object):
+    """Shared buffering logic for batching webhook handlers
+
+    Records are built into batch items as they arrive and posted together when:
+        * the next item would not fit in one webhook message
+        * a CRITICAL record arrives
+        * batch_latency seconds have passed since the first buffered record
+
+    Subclasses provide batch_has_room(items, item) and send_batch(items)
+
+    """
+    def _init_batching(self, batch_latency):
+        """set up batch state
+
+        Args:
+            batch_latency (float): max seconds a record waits in the batch
+
+        """
+        self.batch_latency = float(batch_latency)
+        self.batch = []
+        self._batch_timer = None
+
+    def emit(self, record):
+        """buffer record, posting the batch if a flush trigger is hit"""
+        item = self.build_message(record)
+        if self.batch and not self.batch_has_room(self.batch, item):
+            self.flush()
+        self.batch.append(item)
+
+        if record.levelno >= logging.CRITICAL:
+            self.flush()
+        elif self._batch_timer is None:
+            self._batch_timer = threading.Timer(self.batch_latency, self.flush)
+            self._batch_timer.daemon = True
+            self._batch_timer.start()
+
+    def flush(self):
+        """post everything buffered so far"""
+        self.acquire()
+        try:
+            if self._batch_timer is not None:
+                self._batch_timer.cancel()
+                self._batch_timer = None
+            items, self.batch = self.batch, []
+            if items:
+                self.send_batch(items)
+        finally:
+            self.release()
+
+    def close(self):
+        """post remaining batch before closing"""
+        self.flush()
+        logging.Handler.close(self)
+
+class BatchingDiscordHandler(_WebhookBatchMixin, HackyDiscordHandler):
+    """HackyDiscordHandler that packs many records into one Discord post (up to DISCORD_MESSAGE_LIMIT)"""
+    def __init__(
+            self,
+            webhook_obj,
+            alert_recipient=None,
+            batch_latency=DEFAULT_BATCH_LATENCY,
+            **kwargs
+    ):
+        """BatchingDiscordHandler init
+
+        Args:
+            webhook_obj (:obj:`DiscordWebhook`): discord webhook has all the info for connection
+            alert_recipients (`str`:<@int>, optional): user/group to notify
+            batch_latency (float, optional): max seconds a record waits before posting
+            kwargs: connection options for HackyDiscordHandler
+
+        """
+        HackyDiscordHandler.__init__(self, webhook_obj, alert_recipient, **kwargs)
+        self._init_batching(batch_latency)
+
+    def batch_has_room(self, items, item):
+        """check if item fits in the same Discord message as items"""
+        batch_length = sum(len(message) + 1 for message in items) #+1 for '\n' joiner
+        return batch_length + len(item) <= DISCORD_MESSAGE_LIMIT
+
+    def send_batch(self, items):
+        """post all buffered messages as one Discord message"""
+        self.send_msg_to_webhook('\n'.join(items))
+
+class BatchingSlackHandler(_WebhookBatchMixin, HackySlackHandler):
+    """HackySlackHandler that packs many records into one Slack post as separate attachments"""
+    def __init__(
+            self,
+            webhook_url,
+            batch_latency=DEFAULT_BATCH_LATENCY,
+            batch_size=SLACK_ATTACHMENT_LIMIT,
+            **kwargs
+    ):
+        """BatchingSlackHandler init
+
+        Args:
+            webhook_url (str): slack bot webhook (full URL)
+            batch_latency (float, optional): max seconds a record waits before posting
+            batch_size (int, optional): max attachments per post
+            kwargs: connection options for HackySlackHandler
+
+        """
+        HackySlackHandler.__init__(self, webhook_url, **kwargs)
+        self._init_batching(batch_latency)
+        self.batch_size = min(int(batch_size), SLACK_ATTACHMENT_LIMIT)
+
+    def batch_has_room(self, items, item):
+        """check attachment count"""
+        return len(items) < self.batch_size
+
+    def send_batch(self, items):
+        """post all buffered records as attachments of one Slack message"""
+        if SILENCE_OVERRIDE:
+            return
+
+        attachments = []
+        for attachment, log_msg in items:
+            attachment = dict(attachment)
+            attachment['text'] = attachment['text'] + '\n' + log_msg
+            attachments.append(attachment)
+
+        if len(items) == 1:
+            summary = items[0][1]
+        else:
+            summary = '{0} log messages'.format(len(items))
+        payload = {
+            'text': summary,
+            'attachments': attachments
+        }
+        self.post_payload(payload, summary)
+
+class DuplicateAlertFilter(logging.Filter):
+    """Suppress repeats of the same alert inside a time window
+
+    Records are fingerprinted by (logger name, pathname, lineno, exception type, normalized message).
+    The first record for a fingerprint passes; repeats inside `window` seconds are dropped and counted.
+    The next record after the window passes with `record.repeat_summary` set to
+    'repeated N times in the last X seconds', which the webhook handlers append to the message
+
+    Attributes:
+        window (float): seconds to suppress repeats for
+        cache_size (int): max fingerprints tracked (least-recently-seen evicted first)
+        suppressed (int): total records dropped
+
+    """
+    _number_pattern = re.compile(r'0x[0-9a-fA-F]+|\d+')
+    def __init__(self, window, cache_size=DEFAULT_DEDUP_CACHE_SIZE):
+        """DuplicateAlertFilter init
+
+        Args:
+            window (float): seconds to suppress repeats for
+            cache_size (int, optional): max fingerprints tracked
+
+        """
+        logging.Filter.__init__(self)
+        self.window = float(window)
+        self.cache_size = int(cache_size)
+        self.suppressed = 0
+        self._cache = OrderedDict()  #fingerprint: [window_start, repeat_count]
+        self._lock = threading.Lock()
+
+    def fingerprint(self, record):
+        """build dedup key for record
+
+        Args:
+            record (:obj:`logging.LogRecord`): record to identify
+
+        Returns:
+            (tuple): hashable fingerprint
+
+        """
+        exc_type = None
+        if record.exc_info and record.exc_info[0]:
+            exc_type = record.exc_info[0].__name__
+        message = self._number_pattern.sub('#', record.getMessage())
+        return (record.name, record.pathname, record.lineno, exc_type, message)
+
+    def filter(self, record):
+        """required method for logging.Filter, False drops the record"""
+        key = self.fingerprint(record)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                self.suppressed += 1
+                self._cache.move_to_end(key)
+                return False
+
+            repeat_summary = ''
+            if entry is not None and entry[1]:
+                repeat_summary = 'repeated {0} times in the last {1:.0f} seconds'.format(
+                    entry[1], now - entry[0]
+                )
+            self._cache[key] = [now, 0]
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        record.repeat_summary = repeat_summary
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Base for filters that keep a sample of low-level records on a high-volume logger
+
+    Records at/above `pass_level` always pass; everything else goes through sample().
+    At most once per `report_interval` seconds, the next record through the filter logs
+    'SamplingFilter suppressed N records in the last X seconds' at INFO on the record's logger
+    (tagged `record.sampling_report`, which the filter lets through)
+
+    Attributes:
+        pass_level (int): records at/above this level are never dropped
+        report_interval (float): seconds between suppressed-count reports (0: no reports)
+        suppressed (int): total records dropped
+        passed (int): total records kept by sample()
+
+    """
+    def __init__(
+            self,
+            pass_level=DEFAULT_SAMPLING_PASS_LEVEL,
+            report_interval=DEFAULT_SAMPLING_REPORT_INTERVAL
+    ):
+        """SamplingFilter init
+
+        Args:
+            pass_level (str or int, optional): records at/above this level are never dropped
+            report_interval (float, optional): seconds between suppressed-count reports (0: no reports)
+
+        """
+        logging.Filter.__init__(self)
+        if not isinstance(pass_level, int):
+            pass_level = logging.getLevelName(str(pass_level).upper())
+        self.pass_level = pass_level
+        self.report_interval = float(report_interval or 0)
+        self.suppressed = 0
+        self.passed = 0
+        self._report_start = time.monotonic()
+        self._report_suppressed = 0
+        self._lock = threading.Lock()
+
+    def sample(self, record):
+        """decide whether to keep a record below pass_level.  Called under self._lock
+
+        Args:
+            record (:obj:`logging.LogRecord`): record to judge
+
+        Returns:
+            (bool): True to keep the record
+
+        """
+        raise NotImplementedError
+
+    def filter(self, record):
+        """required method for logging.Filter, False drops the record"""
+        if record.levelno >= self.pass_level or getattr(record, 'sampling_report', False):
+            return True
+
+        report = None
+        with self._lock:
+            keep = self.sample(record)
+            if keep:
+                self.passed += 1
+            else:
+                self.suppressed += 1
+                self._report_suppressed += 1
+
+            now = time.monotonic()
+            if self.report_interval and now - self._report_start >= self.report_interval:
+                if self._report_suppressed:
+                    report = (self._report_suppressed, now - self._report_start)
+                self._report_start = now
+                self._report_suppressed = 0
+
+        if report:  #log outside the lock: the report comes back through this filter
+            logging.getLogger(record.name).info(
+                '%s suppressed %d records in the last %.0f seconds',
+                type(self).__name__, report[0], report[1],
+                extra={'sampling_report': True}
+            )
+        return keep
+
+    def snapshot(self):
+        """counters for metrics/tests
+
+        Returns:
+            (:obj:`dict`): passed and suppressed totals
+
+        """
+        with self._lock:
+            return {'passed': self.passed, 'suppressed': self.suppressed}
+
+class EveryNFilter(SamplingFilter):
+    """Keep the first of every `every` records below pass_level (deterministic)"""
+    def __init__(self, every, **kwargs):
+        """EveryNFilter init
+
+        Args:
+            every (int): keep 1 record in this many
+            kwargs: pass_level/report_interval for SamplingFilter
+
+        """
+        SamplingFilter.__init__(self, **kwargs)
+        self.every = max(1, int(every))
+        self._count = 0
+
+    def sample(self, record):
+        """keep records 0, N, 2N..."""
+        keep = self._count % self.every == 0
+        self._count += 1
+        return keep
+
+class ProbabilisticFilter(SamplingFilter):
+    """Keep each record below pass_level with probability `rate`"""
+    def __init__(self, rate, seed=None, **kwargs):
+        """ProbabilisticFilter init
+
+        Args:
+            rate (float): fraction of records to keep, 0-1
+            seed (int, optional): seed for a repeatable sample
+            kwargs: pass_level/report_interval for SamplingFilter
+
+        """
+        SamplingFilter.__init__(self, **kwargs)
+        self.rate = float(rate)
+        self._random = random.Random(seed)
+
+    def sample(self, record):
+        """coin flip"""
+        return self._random.random() < self.rate
+
+class KeyedTokenBucketFilter(SamplingFilter):
+    """Token bucket per call site: each key may log `rate` records/sec, bursting to `burst`
+
+    Attributes:
+        key_attrs (tuple): LogRecord attributes that make up a key
+        cache_size (int): max keys tracked (least-recently-seen evicted first)
+
+    """
+    def __init__(
+            self,
+            rate,
+            burst=None,
+            key_attrs=('pathname', 'lineno'),
+            cache_size=DEFAULT_SAMPLING_CACHE_SIZE,
+            **kwargs
+    ):
+        """KeyedTokenBucketFilter init
+
+        Args:
+            rate (float): records/sec refilled per key
+            burst (float, optional): bucket size (default: rate)
+            key_attrs (tuple, optional): LogRecord attributes to key buckets on
+            cache_size (int, optional): max keys tracked
+            kwargs: pass_level/report_interval for SamplingFilter
+
+        """
+        SamplingFilter.__init__(self, **kwargs)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self.key_attrs = tuple(key_attrs)
+        self.cache_size = int(cache_size)
+        self._get_key = attrgetter(*self.key_attrs)
+        self._buckets = OrderedDict()   #key: [tokens, last_refill]
+
+    def sample(self, record):
+        """spend a token from this record's bucket, if there is one"""
+        key = self._get_key(record)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            while len(self._buckets) > self.cache_size:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        return False
+
+class AdaptiveSamplingFilter(SamplingFilter):
+    """Pass everything while traffic is under `max_rate` records/sec, tighten 1-in-N above it
+
+    Each `window` the observed rate sets N = ceil(observed / max_rate) for the next window,
+    so sampling loosens again once traffic drops.  Inside a window, no more than
+    max_rate * window records are kept, which caps a sudden burst before N catches up
+
+    Attributes:
+        keep_every (int): current N
+
+    """
+    def __init__(self, max_rate, window=1.0, **kwargs):
+        """AdaptiveSamplingFilter init
+
+        Args:
+            max_rate (float): records/sec to aim for
+            window (float, optional): seconds between rate measurements
+            kwargs: pass_level/report_interval for SamplingFilter
+
+        """
+        SamplingFilter.__init__(self, **kwargs)
+        self.max_rate = float(max_rate)
+        self.window = float(window)
+        self.keep_every = 1
+        self._window_start = time.monotonic()
+        self._window_seen = 0
+        self._window_kept = 0
+
+    def sample(self, record):
+        """1-in-keep_every, capped per window"""
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            observed_rate = self._window_seen / elapsed
+            self.keep_every = max(1, -int(-observed_rate // self.max_rate))
+            self._window_start = now
+            self._window_seen = 0
+            self._window_kept = 0
+
+        keep = (
+            self._window_seen % self.keep_every == 0 and
+            self._window_kept < max(1, self.max_rate * self.window)
+        )
+        self._window_seen += 1
+        if keep:
+            self._window_kept += 1
+        return keep
+
+class FlightRecorderHandler(logging.Handler):
+    """Ring buffer of recent records, written to `target` when an ERROR arrives
+
+    Like logging.handlers.MemoryHandler, but circular: a fixed-size deque holds the last
+    `buffer_size` records (unformatted, nothing allocated per record beyond the deque slot).
+    A record at/above `trigger_level` dumps the buffer to `target`, skipping records the target's
+    level already let through, and sets `record.flight_excerpt` to the last `excerpt_lines`
+    records as text, which the webhook handlers append to the alert
+
+    Attributes:
+        target (:obj:`logging.Handler`): handler that receives the dump (usually the file handler)
+        buffer (:obj:`collections.deque`): recent records
+        trigger_level (int): level that dumps the buffer
+        excerpt_lines (int): records in the webhook excerpt, 0 for none
+        excerpt_chars (int): max characters in the webhook excerpt (most recent kept)
+        dumps (int): times the buffer has been dumped
+
+    """
+    def __init__(
+            self,
+            target=None,
+            buffer_size=DEFAULT_FLIGHT_RECORDER_SIZE,
+            trigger_level=DEFAULT_FLIGHT_TRIGGER_LEVEL,
+            excerpt_lines=DEFAULT_FLIGHT_EXCERPT_LINES,
+            excerpt_chars=DEFAULT_FLIGHT_EXCERPT_CHARS
+    ):
+        """FlightRecorderHandler init
+
+        Args:
+            target (:obj:`logging.Handler`, optional): handler that receives the dump, None for excerpt only
+            buffer_size (int, optional): records kept in memory
+            trigger_level (str or int, optional): level that dumps the buffer
+            excerpt_lines (int, optional): records in the webhook excerpt, 0 for none
+            excerpt_chars (int, optional): max characters in the webhook excerpt
+
+        """
+        logging.Handler.__init__(self)
+        if not isinstance(trigger_level, int):
+            trigger_level = logging.getLevelName(str(trigger_level).upper())
+        self.target = target
+        self.buffer = deque(maxlen=int(buffer_size))
+        self.trigger_level = trigger_level
+        self.excerpt_lines = int(excerpt_lines)
+        self.excerpt_chars = int(excerpt_chars)
+        self.dumps = 0
+
+    def emit(self, record):
+        """buffer low-level records, dump on trigger_level"""
+        if record.levelno >= self.trigger_level:
+            self.dump(record)
+        else:
+            self.buffer.append(record)
+
+    def dump(self, record=None):
+        """write buffered records to target and empty the buffer
+
+        Args:
+            record (:obj:`logging.LogRecord`, optional): triggering record, gets `flight_excerpt`
+
+        """
+        records = list(self.buffer)
+        self.buffer.clear()
+        if record is not None and self.excerpt_lines:
+            record.flight_excerpt = self.build_excerpt(records[-self.excerpt_lines:])
+        if self.target is not None:
+            for buffered in records:
+                if buffered.levelno < self.target.level:    #target already has the rest
+                    buffered.flight_recorder_dump = True    #past QueuedHandler's level check
+                    self.target.handle(buffered)
+        self.dumps += 1
+
+    def build_excerpt(self, records):
+        """format records for a webhook alert
+
+        Args:
+            records (:obj:`list` of :obj:`logging.LogRecord`): oldest first
+
+        Returns:
+            (str): one line per record, trimmed to the last excerpt_chars characters
+
+        """
+        excerpt = '\n'.join(self.format(buffered) for buffered in records)
+        if len(excerpt) > self.excerpt_chars:
+            excerpt = '...' + excerpt[-(self.excerpt_chars - 3):]
+        return excerpt
+
+    def close(self):
+        """drop buffered records: a clean shutdown is no reason to write DEBUG context"""
+        self.buffer.clear()
+        logging.Handler.close(self)
+
+class QueuedHandler(QueueHandler):
+    """Non-blocking front for slow handlers (webhooks).  Records are queued and
+    delivered by a background worker thread
+
+    Notes:
+        Level and formatter are pushed down onto the wrapped handler.
+        close() flushes everything still queued before closing the wrapped handler.
+        Records logged after close() are discarded
+
+    Attributes:
+        handler (:obj:`logging.Handler`): handler doing the actual (slow) delivery
+        overflow_policy (:obj:`OverflowPolicy`): what to do when the queue is full
+        dropped (int): count of records discarded by overflow_policy
+
+    """
+    def __init__(
+            self,
+            handler,
+            queue_size=DEFAULT_QUEUE_SIZE,
+            overflow_policy=OverflowPolicy.DROP_OLDEST,
+            flush_interval=None
+    ):
+        """QueuedHandler init
+
+        Args:
+            handler (:obj:`logging.Handler`): handler to deliver records with
+            queue_size (int, optional): max records waiting on delivery (bounded queue)
+            overflow_policy (:obj:`OverflowPolicy`, optional): behavior when queue is full
+            flush_interval (float, optional): worker calls handler.flush() after this many idle seconds
+
+        """
+        QueueHandler.__init__(self, queue.Queue(maxsize=int(queue_size)))
+        self.handler = handler
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.dropped = 0
+        self._closed = False
+        self._last_overflow_warning = None
+
+        self.listener = _DrainingQueueListener(
+            self.queue,
+            self.handler,
+            respect_handler_level=True
+        )
+        self.listener.flush_interval = flush_interval
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        """formatting is done by the wrapped handler on the worker thread"""
+        QueueHandler.setFormatter(self, fmt)
+        self.handler.setFormatter(fmt)
+
+    def setLevel(self, level):
+        """keep wrapped handler level in sync"""
+        QueueHandler.setLevel(self, level)
+        self.handler.setLevel(level)
+
+    def prepare(self, record):
+        """make a thread-safe copy of the record without formatting it
+
+        logging.handlers.QueueHandler.prepare() flattens the record with its own formatter,
+        which would throw away the exception info the webhook handlers decorate
+
+        Args:
+            record (:obj:`logging.LogRecord`): record to queue
+
+        Returns:
+            (:obj:`logging.LogRecord`): copy of record with args merged and traceback cached
+
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        """push record into the queue, applying overflow_policy if full
+
+        Args:
+            record (:obj:`logging.LogRecord`): prepared record
+
+        """
+        if self._closed:
+            return  #nobody is draining the queue anymore
+
+        if self.overflow_policy == OverflowPolicy.BLOCK:
+            try:
+                self.queue.put(record, timeout=QUEUE_TIMEOUT)
+            except queue.Full:  #worker is wedged, do not hang the caller forever
+                with self.lock:
+                    self._record_drop()
+            return
+
+        with self.lock:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                pass
+
+            if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()  #keep flush() from waiting on evicted records
+                except queue.Empty:
+                    pass    #worker emptied the queue in the meantime; nothing evicted
+                else:
+                    self._record_drop()
+                try:
+                    self.queue.put_nowait(record)
+                    return
+                except queue.Full:
+                    pass
+            self._record_drop()
+
+    def _record_drop(self):
+        """count a dropped record and warn (at most once per OVERFLOW_WARNING_INTERVAL)
+
+        Note:
+            caller must hold self.lock
+
+        """
+        self.dropped += 1
+        now = time.monotonic()
+        if self._last_overflow_warning is not None and \
+           now - self._last_overflow_warning < OVERFLOW_WARNING_INTERVAL:
+            return
+        self._last_overflow_warning = now
+        warnings.warn(
+            'WARNING: logging queue full, discarding records' +
+            '\n\tpolicy={0}'.format(self.overflow_policy.name) +
+            '\n\tdropped={0}'.format(self.dropped),
+            RuntimeWarning
+        )
+
+    def flush(self):
+        """wait (up to QUEUE_TIMEOUT) until everything queued so far has been delivered"""
+        if self._closed:
+            return
+        with self.queue.all_tasks_done:
+            self.queue.all_tasks_done.wait_for(
+                lambda: not self.queue.unfinished_tasks,
+                QUEUE_TIMEOUT
+            )
+        self.handler.flush()
+
+    def close(self):
+        """drain queue, stop worker, close wrapped handler.  Safe to call more than once"""
+        if self._closed:
+            return
+        self._closed = True
+        self.listener.stop()
+        self.handler.close()
+        QueueHandler.close(self)
+
+class _DrainingQueueListener(QueueListener):
+    """QueueListener that survives bad records and can always stop
+
+    Attributes:
+        flush_interval (float): if set, flush handlers whenever the queue sits idle this long
+
+    """
+    flush_interval = None
+    def dequeue(self, block):
+        """wait for the next record, flushing handlers on every idle flush_interval"""
+        if not block or not self.flush_interval:
+            return self.queue.get(block)
+        while True:
+            try:
+                return self.queue.get(True, self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    try:
+                        handler.flush()
+                    except Exception:
+                        pass    #next write/flush will report the problem
+
+    def handle(self, record):
+        """deliver record, errors go to the handler's handleError() instead of killing the worker
+
+        Args:
+            record (:obj:`logging.LogRecord`): record pulled off the queue
+
+        """
+        record = self.prepare(record)
+        for handler in self.handlers:
+            try:
+                if (
+                        not self.respect_handler_level or
+                        record.levelno >= handler.level or
+                        getattr(record, 'flight_recorder_dump', False)
+                ):
+                    handler.handle(record)
+            except Exception:
+                handler.handleError(record)
+
+    def stop(self):
+        """ask worker to finish the queue and exit; give up after QUEUE_TIMEOUT"""
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            try:
+                self.queue.put(self._sentinel, timeout=QUEUE_TIMEOUT)
+            except queue.Full:
+                warnings.warn(
+                    'WARNING: unable to flush logging queue before close',
+                    RuntimeWarning
+                )
+            self._thread.join(QUEUE_TIMEOUT)
+        self._thread = None
+
+class HybridRotatingFileHandler(TimedRotatingFileHandler):
+    """TimedRotatingFileHandler that can also rotate by size, compress rotated files and
+    enforce retention by count and total bytes
+
+    Notes:
+        rename happens inline at rollover; compression and retention run on a background
+        thread so they never block the logging call.
+        Rotated files are named `<logfile>.<time suffix>[.N]` and never overwritten
+
+    Attributes:
+        rotation (:obj:`RotationPolicy`): what triggers a rollover
+        max_bytes (int): SIZE/HYBRID rollover threshold (approximate, 0 disables)
+        max_total_bytes (int): max bytes kept across rotated files (0 disables)
+        compression (str): 'gzip', 'zstd' or None
+        index_block (int): bytes of log per `<logfile>.idx` entry (0 disables the index)
+
+    """
+    _stream_stat = None     #os.stat_result of the file self.stream points at
+    def __init__(
+            self,
+            filename,
+            rotation=RotationPolicy.TIME,
+            max_bytes=0,
+            max_total_bytes=0,
+            compression=None,
+            index_block=0,
+            **kwargs
+    ):
+        """HybridRotatingFileHandler init
+
+        Args:
+            filename (str): path to log file
+            rotation (:obj:`RotationPolicy`, optional): TIME, SIZE or HYBRID (whichever comes first)
+            max_bytes (int, optional): size trigger for SIZE/HYBRID rotation
+            max_total_bytes (int, optional): delete oldest rotated files past this many bytes
+            compression (str, optional): compress rotated files with 'gzip' or 'zstd'
+            index_block (int, optional): keep a `<logfile>.idx` sidecar with one entry per this many bytes
+            kwargs: TimedRotatingFileHandler arguments (when, interval, backupCount...)
+
+        """
+        self.rotation = RotationPolicy(rotation)
+        self.max_bytes = int(max_bytes or 0)
+        self.max_total_bytes = int(max_total_bytes or 0)
+        self.compression = compression
+        self.index_block = int(index_block or 0)
+        self._bytes_written = 0
+        self._start_index_block(0)
+        self._cleanup_queue = None
+        self._cleanup_thread = None
+        TimedRotatingFileHandler.__init__(self, filename, **kwargs)
+
+    def _open(self):
+        """open log file, remembering its inode/size"""
+        stream = self._open_stream()
+        self._stream_stat = os.fstat(stream.fileno())
+        self._bytes_written = self._stream_stat.st_size
+        self._start_index_block(self._stream_stat.st_size)
+        return stream
+
+    def _open_stream(self):
+        """open the log file (hook for subclasses)"""
+        return TimedRotatingFileHandler._open(self)
+
+    def emit(self, record):
+        """format once, rollover if due, write record"""
+        try:
+            msg = self.format(record) + self.terminator
+            if self.shouldRollover(record):
+                self.doRollover()
+            elif self._size_exceeded(len(msg)):
+                if self.rotation == RotationPolicy.SIZE:    #name rotated file after the current interval
+                    self.rolloverAt = self.computeRollover(int(time.time()))
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._bytes_written += len(msg)
+            if self.index_block:
+                self._index_record(record, msg)
+            self._flush_if_due(record)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _flush_if_due(self, record):
+        """flush after every record (hook for buffered subclasses)"""
+        self.flush()
+
+    def _start_index_block(self, offset):
+        """begin a new (empty) index block at byte offset"""
+        self._index_offset = offset
+        self._block_start = offset
+        self._block_min = None
+        self._block_max = None
+        self._block_levels = 0
+
+    def _index_record(self, record, msg):
+        """add a written record to the current index block, writing the block out once full"""
+        created = record.created
+        if self._block_min is None:
+            self._block_min = self._block_max = created
+        elif created < self._block_min:
+            self._block_min = created
+        elif created > self._block_max:
+            self._block_max = created
+        self._block_levels |= get_level_bit(record.levelno)
+        self._index_offset += len(msg) if msg.isascii() else len(msg.encode(self.encoding or 'utf-8'))
+        if self._index_offset - self._block_start >= self.index_block:
+            self.write_index_block()
+
+    def write_index_block(self):
+        """append the current block to `<logfile>.idx` and start the next one"""
+        if self._block_min is None:
+            return
+        with open(self.baseFilename + INDEX_EXTENSION, 'ab') as index_file:
+            index_file.write(LOG_INDEX_ENTRY.pack(
+                self._block_start,
+                self._index_offset - self._block_start,
+                self._block_min,
+                self._block_max,
+                self._block_levels
+            ))
+        self._start_index_block(self._index_offset)
+
+    def shouldRollover(self, record):
+        """time trigger, unless rotating by SIZE only"""
+        if self.rotation == RotationPolicy.SIZE:
+            return False
+        return TimedRotatingFileHandler.shouldRollover(self, record)
+
+    def _size_exceeded(self, pending):
+        """would writing `pending` more characters push the file past max_bytes"""
+        if self.rotation == RotationPolicy.TIME or not self.max_bytes or self.stream is None:
+            return False
+        current_size = self._current_size()
+        return current_size > 0 and current_size + pending > self.max_bytes
+
+    def _current_size(self):
+        """bytes in the log file (tracked, not stat'd)"""
+        return self._bytes_written
+
+    def rotation_filename(self, default_name):
+        """apply namer, then add a .N counter if that name (or its compressed copy) is taken"""
+        name = TimedRotatingFileHandler.rotation_filename(self, default_name)
+        candidate = name
+        index = 0
+        while any(path.exists(candidate + extension) for extension in ROTATED_EXTENSIONS):
+            index += 1
+            candidate = '{0}.{1}'.format(name, index)
+        return candidate
+
+    def rotate(self, source, dest):
+        """rename inline (index sidecar too), hand compression/retention to the cleanup thread"""
+        if self.index_block:
+            self.write_index_block()
+        TimedRotatingFileHandler.rotate(self, source, dest)
+        if path.exists(source + INDEX_EXTENSION):
+            os.replace(source + INDEX_EXTENSION, dest + INDEX_EXTENSION)
+        if self._cleanup_queue is None:
+            self._cleanup_queue = queue.Queue()
+            self._cleanup_thread = threading.Thread(
+                target=self._cleanup_loop,
+                name='ProsperLogCleanup',
+                daemon=True
+            )
+            self._cleanup_thread.start()
+        self._cleanup_queue.put(dest)
+
+    def getFilesToDelete(self):
+        """retention is enforced by enforce_retention() on the cleanup thread"""
+        return []
+
+    def _cleanup_loop(self):
+        """(cleanup thread) compress rotated files and enforce retention until close()"""
+        while True:
+            rotated_file = self._cleanup_queue.get()
+            if rotated_file is None:
+                return
+            try:
+                if self.compression and path.exists(rotated_file):
+                    compress_log_file(rotated_file, self.compression)
+                self.enforce_retention()
+            except Exception as error_msg:
+                warnings.warn(
+                    'WARNING: unable to compress/clean up rotated log' +
+                    '\n\texception={0}'.format(error_msg) +
+                    '\n\tfile={0}'.format(rotated_file),
+                    RuntimeWarning
+                )
+
+    def get_rotated_files(self):
+        """list rotated copies of this log, newest first
+
+        Returns:
+            (:obj:`list` of :obj:`tuple`): (path, os.stat_result)
+
+        """
+        dir_name, base_name = path.split(self.baseFilename)
+        prefix = base_name + '.'
+        rotated_files = []
+        for file_name in os.listdir(dir_name):
+            if not file_name.startswith(prefix) or file_name.endswith(('.lock', '.tmp', INDEX_EXTENSION)):
+                continue
+            file_path = path.join(dir_name, file_name)
+            try:
+                rotated_files.append((file_path, os.stat(file_path)))
+            except FileNotFoundError:
+                pass    #removed by another handler/process
+        rotated_files.sort(key=lambda rotated: rotated[1].st_mtime, reverse=True)
+        return rotated_files
+
+    def enforce_retention(self):
+        """delete the oldest rotated files past backupCount files or max_total_bytes"""
+        kept_files = 0
+        kept_bytes = 0
+        for file_path, file_stat in self.get_rotated_files():
+            kept_files += 1
+            kept_bytes += file_stat.st_size
+            if (self.backupCount and kept_files > self.backupCount) or \
+               (self.max_total_bytes and kept_bytes > self.max_total_bytes):
+                for remove_path in (file_path, get_index_path(file_path)):
+                    try:
+                        os.remove(remove_path)
+                    except FileNotFoundError:
+                        pass
+
+    def close(self):
+        """close log file (writing out the open index block), finish pending compression (up to QUEUE_TIMEOUT)"""
+        if self.index_block:
+            self.acquire()
+            try:
+                self.write_index_block()
+            finally:
+                self.release()
+        TimedRotatingFileHandler.close(self)
+        cleanup_thread = self._cleanup_thread
+        if cleanup_thread is not None:
+            self._cleanup_thread = None
+            self._cleanup_queue.put(None)
+            cleanup_thread.join(QUEUE_TIMEOUT)
+
+class BufferedTimedRotatingFileHandler(HybridRotatingFileHandler):
+    """HybridRotatingFileHandler that writes through a large buffer instead of flushing every record
+
+    Notes:
+        Meant to sit behind QueuedHandler: the worker thread does the writes/rollovers,
+        the buffer is flushed on flush_level records, every flush_interval and on close()
+
+    Attributes:
+        buffer_size (int): bytes held in the file buffer between flushes
+        flush_interval (float): max seconds between flushes while records are arriving
+        flush_level (int): records at or above this level are flushed immediately
+
+    """
+    def __init__(
+            self,
+            filename,
+            buffer_size=DEFAULT_WRITE_BUFFER,
+            flush_interval=DEFAULT_FLUSH_INTERVAL,
+            flush_level=DEFAULT_FLUSH_LEVEL,
+            **kwargs
+    ):
+        """BufferedTimedRotatingFileHandler init
+
+        Args:
+            filename (str): path to log file
+            buffer_size (int, optional): bytes buffered between flushes
+            flush_interval (float, optional): max seconds between flushes
+            flush_level (str or int, optional): level that forces an immediate flush
+            kwargs: HybridRotatingFileHandler arguments (when, backupCount, rotation...)
+
+        """
+        self.buffer_size = int(buffer_size)
+        self.flush_interval = float(flush_interval)
+        if not isinstance(flush_level, int):
+            flush_level = logging.getLevelName(flush_level)
+        self.flush_level = flush_level
+        self._last_flush = time.monotonic()
+        HybridRotatingFileHandler.__init__(self, filename, **kwargs)
+
+    def _open_stream(self):
+        """open log file with a write buffer of buffer_size"""
+        return open(
+            self.baseFilename, self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=getattr(self, 'errors', None)    #py3.9+
+        )
+
+    def _flush_if_due(self, record):
+        """only flush when flush_level/flush_interval says so"""
+        if record.levelno >= self.flush_level or \
+           time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """push buffered records to disk"""
+        HybridRotatingFileHandler.flush(self)
+        self._last_flush = time.monotonic()
+
+class MultiprocessTimedRotatingFileHandler(HybridRotatingFileHandler):
+    """HybridRotatingFileHandler that can share one log file between processes (prefork workers)
+
+    Notes:
+        Records are appended (O_APPEND) and flushed one at a time, so lines from different
+        processes never overwrite each other.  Rollover holds an flock() on `<logfile>.lock`:
+        the first process past rolloverAt (or max_bytes) renames the file, everyone else
+        sees the inode changed and reopens.  POSIX only (needs fcntl)
+
+    Attributes:
+        lock_filename (str): path to the rollover lock file
+
+    """
+    def __init__(self, filename, **kwargs):
+        """MultiprocessTimedRotatingFileHandler init
+
+        Args:
+            filename (str): path to log file
+            kwargs: HybridRotatingFileHandler arguments (when, backupCount, rotation...)
+
+        """
+        if kwargs.get('index_block'):
+            warnings.warn(
+                'log_index_block is not supported with log_multiprocess: offsets would interleave',
+                RuntimeWarning
+            )
+            kwargs['index_block'] = 0
+        HybridRotatingFileHandler.__init__(self, filename, **kwargs)
+        self.lock_filename = self.baseFilename + '.lock'
+        self._lock_file = None
+
+    def _current_size(self):
+        """other processes append too: stat the file instead of counting our own writes"""
+        return os.fstat(self.stream.fileno()).st_size
+
+    def doRollover(self):
+        """rotate the shared log file once, no matter how many processes get here"""
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_filename, 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            if _get_inode(self.baseFilename) == self._stream_stat.st_ino:   #nobody beat us to it
+                dfn = self.rotation_filename(
+                    self.baseFilename + '.' + time.strftime(self.suffix, self._rollover_time_tuple())
+                )
+                self.rotate(self.baseFilename, dfn)
+            self.stream = self._open()
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+        current_time = int(time.time())
+        new_rollover_at = self.computeRollover(current_time)
+        while new_rollover_at <= current_time:
+            new_rollover_at += self.interval
+        self.rolloverAt = new_rollover_at
+
+    def _rollover_time_tuple(self):
+        """time tuple naming the interval being rotated out (DST adjusted, like the stdlib)"""
+        rollover_start = self.rolloverAt - self.interval
+        if self.utc:
+            return time.gmtime(rollover_start)
+        time_tuple = time.localtime(rollover_start)
+        dst_now = time.localtime()[-1]
+        if dst_now != time_tuple[-1]:
+            time_tuple = time.localtime(rollover_start + (3600 if dst_now else -3600))
+        return time_tuple
+
+    def close(self):
+        """close log file and lock file"""
+        self.acquire()
+        try:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+        finally:
+            self.release()
+        HybridRotatingFileHandler.close(self)
+
+def _get_inode(filepath):
+    """inode of filepath, or None if it does not exist"""
+    try:
+        return os.stat(filepath).st_ino
+    except FileNotFoundError:
+        return None
+
+ROTATED_EXTENSIONS = ('', '.gz', '.zst')
+def get_index_path(log_file_path):
+    """sidecar index for a log file, rotated and/or compressed or not
+
+    Args:
+        log_file_path (str): log file (`app.log`, `app.log.2026-10-17`, `app.log.2026-10-17.gz`...)
+
+    Returns:
+        (str): `<uncompressed log file>.idx`
+
+    """
+    for extension in ROTATED_EXTENSIONS[1:]:
+        if log_file_path.endswith(extension):
+            log_file_path = log_file_path[:-len(extension)]
+    return log_file_path + INDEX_EXTENSION
+
+def get_level_bit(levelno):
+    """index level bitmap bit for a level: DEBUG=1<<1, INFO=1<<2 ... CRITICAL=1<<5"""
+    return 1 << min(max(levelno, 0) // 10, 7)
+
+def get_level_bits(min_level):
+    """index level bitmap matching any record at/above min_level"""
+    return 0xFF & ~(get_level_bit(min_level) - 1)
+
+def read_log_index(log_file_path):
+    """read a log file's sidecar index
+
+    Args:
+        log_file_path (str): log file, rotated and/or compressed or not
+
+    Returns:
+        (:obj:`list` of :obj:`tuple`): (offset, length, min_created, max_created, level_bits) per block,
+            in write order.  Empty if there is no index
+
+    """
+    try:
+        with open(get_index_path(log_file_path), 'rb') as index_file:
+            data = index_file.read()
+    except FileNotFoundError:
+        return []
+    data = data[:len(data) - len(data) % LOG_INDEX_ENTRY.size]  #drop a torn final entry
+    return list(LOG_INDEX_ENTRY.iter_unpack(data))
+
+def compress_log_file(filepath, compression='gzip'):
+    """compress a rotated log file, replacing the original
+
+    Notes:
+        Written to a .tmp file and renamed, so readers never see a partial archive.
+        Keeps the original mtime (retention orders by it)
+
+    Args:
+        filepath (str): rotated log file
+        compression (str, optional): 'gzip' or 'zstd'
+
+    Returns:
+        (str): path to compressed file
+
+    """
+    if compression == 'zstd':
+        compressed_path = filepath + '.zst'
+    else:
+        compressed_path = filepath + '.gz'
+    temp_path = compressed_path + '.tmp'
+
+    file_stat = os.stat(filepath)
+    with open(filepath, 'rb') as source:
+        if compression == 'zstd':
+            with open(temp_path, 'wb') as target, \
+                 zstandard.ZstdCompressor().stream_writer(target) as writer:
+                shutil.copyfileobj(source, writer)
+        else:
+            with gzip.open(temp_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+    os.utime(temp_path, (file_stat.st_atime, file_stat.st_mtime))
+    os.replace(temp_path, compressed_path)
+    os.remove(filepath)
+    return compressed_path
+
+def get_compression(compression_name):
+    """parse log_compression from config
+
+    Args:
+        compression_name (str): gzip/zstd/none (case-insensitive)
+
+    Returns:
+        (str): 'gzip', 'zstd' or None
+
+    """
+    if not compression_name:
+        return None
+    compression_name = str(compression_name).strip().lower()
+    if compression_name in ('none', 'false', 'off'):
+        return None
+    if compression_name == 'zstd' and zstandard is None:
+        warnings.warn(
+            'log_compression = zstd needs the zstandard package, using gzip',
+            RuntimeWarning
+        )
+        return 'gzip'
+    if compression_name not in ('gzip', 'zstd'):
+        warnings.warn(
+            'Unknown log_compression {0}, rotated logs will not be compressed'.format(compression_name),
+            RuntimeWarning
+        )
+        return None
+    return compression_name
+
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+class HandlerMetrics(object):
+    """counters for one handler, kept up to date by instrument_handler()
+
+    Attributes:
+        emitted (int): records that reached emit()
+        filtered (int): records rejected by the handler's filters
+        errors (int): handleError() calls
+        bytes_written (int): characters produced by the handler's formatter
+        emit_time (float): seconds spent in emit(), total
+        max_emit_time (float): slowest single emit(), seconds
+
+    """
+    def __init__(self):
+        """HandlerMetrics init"""
+        self.emitted = 0
+        self.filtered = 0
+        self.errors = 0
+        self.bytes_written = 0
+        self.emit_time = 0.0
+        self.max_emit_time = 0.0
+
+    def snapshot(self):
+        """counters as a plain dict"""
+        return {
+            'emitted': self.emitted,
+            'filtered': self.filtered,
+            'errors': self.errors,
+            'bytes_written': self.bytes_written,
+            'emit_time': self.emit_time,
+            'max_emit_time': self.max_emit_time,
+        }
+
+def instrument_handler(handler):
+    """wrap handle/emit/format/handleError on a handler instance to count into handler.metrics
+
+    Notes:
+        Counters are updated under the handler's own lock (emit() already holds it),
+        so the cost is a couple of perf_counter() calls and additions per record.
+        Safe to call more than once
+
+    Args:
+        handler (:obj:`logging.Handler`): handler to instrument
+
+    Returns:
+        (:obj:`HandlerMetrics`): the handler's counters
+
+    """
+    metrics = getattr(handler, 'metrics', None)
+    if isinstance(metrics, HandlerMetrics):
+        return metrics
+
+    metrics = HandlerMetrics()
+    handle = handler.handle
+    emit = handler.emit
+    format_record = handler.format
+    handle_error = handler.handleError
+    perf_counter = time.perf_counter
+
+    def instrumented_handle(record):
+        """count records the handler's filters reject"""
+        emitted = handle(record)
+        if not emitted:
+            handler.acquire()
+            try:
+                metrics.filtered += 1
+            finally:
+                handler.release()
+        return emitted
+
+    def instrumented_emit(record):
+        """time emit() (called with the handler lock held)"""
+        start = perf_counter()
+        try:
+            emit(record)
+        finally:
+            elapsed = perf_counter() - start
+            metrics.emitted += 1
+            metrics.emit_time += elapsed
+            if elapsed > metrics.max_emit_time:
+                metrics.max_emit_time = elapsed
+
+    def instrumented_format(record):
+        """count formatted characters"""
+        message = format_record(record)
+        metrics.bytes_written += len(message)
+        return message
+
+    def instrumented_handle_error(record):
+        """count errors before reporting them"""
+        metrics.errors += 1
+        handle_error(record)
+
+    handler.handle = instrumented_handle
+    handler.emit = instrumented_emit
+    handler.format = instrumented_format
+    handler.handleError = instrumented_handle_error
+    handler.metrics = metrics
+    return metrics
+
+def get_handler_metrics(handler):
+    """snapshot counters for a handler built by ProsperLogger
+
+    Args:
+        handler (:obj:`logging.Handler`): instrumented handler
+
+    Returns:
+        (:obj:`dict`): level + HandlerMetrics counters, plus dropped/delivery/webhook where they apply
+
+    """
+    snapshot = {'level': logging.getLevelName(handler.level)}
+    snapshot.update(instrument_handler(handler).snapshot())
+
+    delivery_handler = handler
+    if isinstance(handler, QueuedHandler):
+        delivery_handler = handler.handler
+        snapshot['delivery'] = instrument_handler(delivery_handler).snapshot()
+    if hasattr(handler, 'dropped'):
+        snapshot['dropped'] = handler.dropped
+
+    rate_limiter = getattr(delivery_handler, 'rate_limiter', None)
+    if isinstance(rate_limiter, WebhookRateLimiter):
+        snapshot['webhook'] = rate_limiter.snapshot()
+    return snapshot
+
+def build_formatter(log_format):
+    """pick the formatter for a log_format string
+
+    Args:
+        log_format (str): printf-style format, or ReportingFormats.JSON.value
+
+    Returns:
+        (:obj:`logging.Formatter`)
+
+    """
+    if log_format == ReportingFormats.JSON.value:
+        return JSONFormatter(log_format)
+    if log_format in _FAST_FORMATS:
+        return FastFormatter(log_format)
+    return logging.Formatter(log_format)
+
+class FastFormatter(logging.Formatter):
+    """logging.Formatter with a precompiled template and a per-second asctime cache
+
+    Notes:
+        Output is identical to logging.Formatter(fmt).  `%(field)s` lookups are compiled
+        into one attrgetter + a positional `%` format, and the strftime() part of asctime
+        is only recomputed when the second changes (msecs are filled in per record).
+        Only used for the built-in ReportingFormats: fmt must only name LogRecord attributes
+
+    """
+    _field_pattern = re.compile(r'%\((\w+)\)')
+    def __init__(self, fmt=ReportingFormats.DEFAULT.value, datefmt=None):
+        """FastFormatter init
+
+        Args:
+            fmt (str, optional): %-style format string
+            datefmt (str, optional): strftime format for asctime
+
+        """
+        logging.Formatter.__init__(self, fmt, datefmt)
+        fields = self._field_pattern.findall(fmt)
+        self._template = self._field_pattern.sub('%', fmt)
+        getter = attrgetter(*fields) if fields else lambda record: ()
+        if len(fields) == 1:    #attrgetter() returns a bare value for one field
+            getter = lambda record, single=getter: (single(record),)
+        self._values = getter
+        self._time_cache = (None, None)     #(second, strftime'd prefix)
+
+    def formatMessage(self, record):
+        """precompiled equivalent of `fmt % record.__dict__`"""
+        return self._template % self._values(record)
+
+    def formatTime(self, record, datefmt=None):
+        """logging.Formatter.formatTime(), with the per-second part cached"""
+        if datefmt or self.converter is not time.localtime:
+            return logging.Formatter.formatTime(self, record, datefmt)
+
+        second = int(record.created)
+        cached_second, prefix = self._time_cache
+        if cached_second != second:
+            prefix = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, prefix)
+        if self.default_msec_format:
+            return self.default_msec_format % (prefix, record.msecs)
+        return prefix
+
+_FAST_FORMATS = frozenset(
+    report_format.value for report_format in ReportingFormats
+    if report_format != ReportingFormats.JSON
+)
+
+def get_json_encoder():
+    """fastest available dict -> str JSON encoder
+
+    Returns:
+        (:obj:`callable`): orjson if installed, else stdlib json (compact separators)
+
+    """
+    if orjson is not None:
+        return lambda payload: orjson.dumps(payload, default=str).decode('utf-8')
+    return json.JSONEncoder(
+        default=str,
+        ensure_ascii=False,
+        separators=(',', ':')
+    ).encode
+
+_LOG_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+class JSONFormatter(logging.Formatter):
+    """JSON-lines formatter: one object per record
+
+    Notes:
+        Keys come from the `%(field)s` names in fmt, in order, and are always present.
+        `exception` is always present too: null, or {type, message, traceback}.
+        Anything passed with `extra={...}` is appended after the fixed fields
+
+    Attributes:
+        fields (:obj:`list` of str): fixed schema, in output order
+        extra_fields (bool): include `extra={...}` record attributes
+        encoder (:obj:`callable`): dict -> str
+
+    """
+    _field_pattern = re.compile(r'%\((\w+)\)')
+    def __init__(
+            self,
+            fmt=ReportingFormats.JSON.value,
+            datefmt=None,
+            extra_fields=True,
+            encoder=None
+    ):
+        """JSONFormatter init
+
+        Args:
+            fmt (str, optional): format string naming the fields to emit
+            datefmt (str, optional): strftime format for asctime
+            extra_fields (bool, optional): include `extra={...}` attributes
+            encoder (:obj:`callable`, optional): dict -> str (default: get_json_encoder())
+
+        """
+        logging.Formatter.__init__(self, fmt, datefmt)
+        self.fields = self._field_pattern.findall(fmt)
+        self.extra_fields = extra_fields
+        self.encoder = encoder or get_json_encoder()
+
+    def format(self, record):
+        """serialize record to a single line of JSON"""
+        record.message = record.getMessage()
+        if self.usesTime():
+            record.asctime = self.formatTime(record, self.datefmt)
+
+        payload = {field: getattr(record, field, None) for field in self.fields}
+        payload['exception'] = self.format_exception(record)
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+
+        if self.extra_fields:
+            for key, value in record.__dict__.items():
+                if key not in _LOG_RECORD_ATTRS and key not in payload:
+                    payload[key] = value
+
+        return self.encoder(payload)
+
+    def format_exception(self, record):
+        """structured exception info
+
+        Args:
+            record (:obj:`logging.LogRecord`): record to inspect
+
+        Returns:
+            (:obj:`dict`): {type, message, traceback} or None
+
+        """
+        if record.exc_info and record.exc_info[0]:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            return {
+                'type': record.exc_info[0].__name__,
+                'message': str(record.exc_info[1]),
+                'traceback': record.exc_text
+            }
+        if record.exc_text:     #flattened by QueuedHandler.prepare()
+            return {
+                'type': None,
+                'message': None,
+                'traceback': record.exc_text
+            }
+        return None
+
+def get_overflow_policy(policy_name, default=OverflowPolicy.DROP_OLDEST):
+    """parse OverflowPolicy from config, by name or value, case-insensitive
+
+    Args:
+        policy_name (str): DROP_OLDEST/drop_oldest/etc
+        default (:obj:`OverflowPolicy`, optional): fallback if policy_name is blank/invalid
+
+    Returns:
+        (:obj:`OverflowPolicy`) policy to use
+
+    """
+    return _parse_policy(OverflowPolicy, policy_name, default, 'overflow policy')
+
+def get_rotation_policy(policy_name, default=RotationPolicy.TIME):
+    """parse RotationPolicy from config, by name or value, case-insensitive
+
+    Args:
+        policy_name (str): TIME/size/Hybrid/etc
+        default (:obj:`RotationPolicy`, optional): fallback if policy_name is blank/invalid
+
+    Returns:
+        (:obj:`RotationPolicy`) policy to use
+
+    """
+    return _parse_policy(RotationPolicy, policy_name, default, 'rotation policy')
+
+def _parse_policy(policy_enum, policy_name, default, label):
+    """look up an Enum member by name or value, warn and fall back to default if invalid"""
+    if isinstance(policy_name, policy_enum):
+        return policy_name
+    if not policy_name:
+        return default
+
+    policy_name = str(policy_name).strip()
+    try:
+        return policy_enum[policy_name.upper()]
+    except KeyError:
+        pass
+    try:
+        return policy_enum(policy_name.lower())
+    except ValueError:
+        warnings.warn(
+            'Unknown {0} {1}, defaulting to {2}'.format(label, policy_name, getattr(default, 'name', None)),
+            RuntimeWarning
+        )
+    return default
@@ -0,0 +1,434 @@
+"""prosper_logreader.py
+
+Stream records back out of ProsperLogger files: the current `<log_name>.log` plus rotated
+(and gzip/zstd compressed) backups, oldest first.  Parses ReportingFormats.DEFAULT lines,
+keeping multi-line messages (tracebacks) with the record they belong to
+
+Example:
+    import prosper.common.prosper_logreader as p_reader
+
+    for entry in p_reader.read_log('desired/log/path', 'log_name', start=incident_start, level='ERROR'):
+        print(entry)
+
+    $ prosper_logreader desired/log/path log_name --start "2026-10-18 14:00" --level ERROR
+
+"""
+
+import argparse
+import gzip
+import logging
+import mmap
+import os
+import re
+import sys
+from collections import namedtuple
+from datetime import datetime
+from os import path
+
+import prosper.common.prosper_logging as p_logging
+
+# [%(asctime)s;%(levelname)s;%(filename)s;%(funcName)s;%(lineno)s] %(message)s
+HEADER_PATTERN = re.compile(
+    rb'\[(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d),(\d{3});([^;\]]*);([^;\]]*);([^;\]]*);(\d+)\] ?'
+)
+SKIP_EXTENSIONS = ('.lock', '.tmp', '.idx')  #handler bookkeeping next to the logs
+
+_ENTRY_FIELDS = ['timestamp', 'levelname', 'filename', 'funcName', 'lineno', 'message', 'source', 'offset']
+class LogEntry(namedtuple('LogEntry', _ENTRY_FIELDS)):
+    """One parsed log record
+
+    Attributes:
+        timestamp (:obj:`datetime.datetime`): asctime, local time
+        levelname (str): level name as written
+        filename (str): module filename
+        funcName (str): function name
+        lineno (int): line number
+        message (str): message, continuation lines (tracebacks) joined with newlines
+        source (str): file the record came from
+        offset (int): byte offset of the record in source (decompressed offset for .gz/.zst)
+
+    """
+    __slots__ = ()
+    def __str__(self):
+        """the record as ReportingFormats.DEFAULT wrote it"""
+        return '[{0},{1:03d};{2};{3};{4};{5}] {6}'.format(
+            self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            self.timestamp.microsecond // 1000,
+            self.levelname,
+            self.filename,
+            self.funcName,
+            self.lineno,
+            self.message
+        )
+
+    @property
+    def levelno(self):
+        """numeric level, 0 for unknown level names"""
+        return get_level_number(self.levelname)
+
+def get_level_number(level):
+    """level name/number to int
+
+    Args:
+        level (str or int): INFO/'ERROR'/40
+
+    Returns:
+        (int): numeric level, 0 if the name is unknown
+
+    """
+    if isinstance(level, int):
+        return level
+    level = logging.getLevelName(str(level).upper())
+    return level if isinstance(level, int) else 0
+
+def _parse_header(match):
+    """header regex match -> (timestamp, levelname, filename, funcName, lineno)"""
+    groups = match.groups()
+    timestamp = datetime(
+        int(groups[0]), int(groups[1]), int(groups[2]),
+        int(groups[3]), int(groups[4]), int(groups[5]),
+        int(groups[6]) * 1000
+    )
+    return (
+        timestamp,
+        groups[7].decode('utf-8', 'replace'),
+        groups[8].decode('utf-8', 'replace'),
+        groups[9].decode('utf-8', 'replace'),
+        int(groups[10])
+    )
+
+def find_log_files(log_path, log_name):
+    """current log file and rotated backups, oldest first
+
+    Args:
+        log_path (str): ProsperLogger log_path
+        log_name (str): ProsperLogger log_name
+
+    Returns:
+        (:obj:`list` of :obj:`tuple`): (path, os.stat_result), rotated files by mtime then the live file
+
+    """
+    base_name = log_name + '.log'
+    prefix = base_name + '.'
+    log_files = []
+    current_file = None
+    for file_name in os.listdir(log_path):
+        if file_name != base_name and (
+                not file_name.startswith(prefix) or file_name.endswith(SKIP_EXTENSIONS)
+        ):
+            continue
+        file_path = path.join(log_path, file_name)
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue    #rotated/compressed away while listing
+        if file_name == base_name:
+            current_file = (file_path, file_stat)
+        else:
+            log_files.append((file_path, file_stat))
+
+    log_files.sort(key=lambda log_file: log_file[1].st_mtime)
+    if current_file:
+        log_files.append(current_file)
+    return log_files
+
+def read_log(
+        log_path,
+        log_name,
+        start=None,
+        end=None,
+        level=None,
+        func_name=None
+):
+    """stream records from every file of a ProsperLogger log, oldest first
+
+    Notes:
+        Files are assumed sorted by time (true for a single writer).  Rotated files last
+        modified before `start` are skipped without being opened
+
+    Args:
+        log_path (str): ProsperLogger log_path
+        log_name (str): ProsperLogger log_name
+        start (:obj:`datetime.datetime`, optional): skip records before this
+        end (:obj:`datetime.datetime`, optional): stop at the first record after this
+        level (str or int, optional): minimum level
+        func_name (str, optional): only records from this function
+
+    Yields:
+        (:obj:`LogEntry`): matching records
+
+    """
+    min_level = get_level_number(level) if level is not None else None
+    log_files = find_log_files(log_path, log_name)
+    for file_path, file_stat in log_files:
+        if (
+                start is not None and file_path != log_files[-1][0] and
+                datetime.fromtimestamp(file_stat.st_mtime) < start
+        ):
+            continue    #rotated file's last write (so every record) is before the window
+        for entry in _read_entries(file_path, start, end, min_level):
+            if end is not None and entry.timestamp > end:
+                return  #later files are later still
+            if _matches(entry, start, min_level, func_name):
+                yield entry
+
+def read_log_file(
+        file_path,
+        start=None,
+        end=None,
+        level=None,
+        func_name=None
+):
+    """stream records from one log file (plain, .gz or .zst)
+
+    Notes:
+        Plain files are memory-mapped.  With a `.idx` sidecar (log_index_block) only the
+        blocks that can match are read; without one, a `start` time is found by binary search
+        instead of scanning from the top.  Compressed files are streamed, or skipped whole if
+        their index rules them out
+
+    Args:
+        file_path (str): log file
+        start (:obj:`datetime.datetime`, optional): skip records before this
+        end (:obj:`datetime.datetime`, optional): stop at the first record after this
+        level (str or int, optional): minimum level
+        func_name (str, optional): only records from this function
+
+    Yields:
+        (:obj:`LogEntry`): matching records
+
+    """
+    min_level = get_level_number(level) if level is not None else None
+    for entry in _read_entries(file_path, start, end, min_level):
+        if end is not None and entry.timestamp > end:
+            return
+        if _matches(entry, start, min_level, func_name):
+            yield entry
+
+def _matches(entry, start, min_level, func_name):
+    """apply read_log() filters (other than end) to one entry"""
+    if start is not None and entry.timestamp < start:
+        return False
+    if min_level is not None and entry.levelno < min_level:
+        return False
+    return func_name is None or entry.funcName == func_name
+
+def _read_entries(file_path, start=None, end=None, min_level=None):
+    """records in file_path, skipping what the index or a binary search rules out"""
+    filtered = start is not None or end is not None or min_level is not None
+    if file_path.endswith(('.gz', '.zst')):
+        if filtered and find_byte_ranges(file_path, start, end, min_level) == []:
+            return
+        with open_compressed(file_path) as log_file:
+            yield from parse_entries(_iter_stream_lines(log_file), file_path)
+        return
+
+    with open(file_path, 'rb') as log_file:
+        file_size = os.fstat(log_file.fileno()).st_size
+        if not file_size:
+            return  #can't mmap an empty file
+        byte_ranges = find_byte_ranges(file_path, start, end, min_level, file_size) if filtered else None
+        with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if byte_ranges is None:
+                byte_ranges = [(seek_timestamp(buffer, start) if start is not None else 0, file_size)]
+            for range_start, range_end in byte_ranges:
+                yield from parse_entries(_iter_buffer_lines(buffer, range_start, range_end), file_path)
+
+def find_byte_ranges(file_path, start=None, end=None, level=None, file_size=None):
+    """use a log file's `.idx` sidecar to find the byte ranges that can hold matching records
+
+    Notes:
+        Stretches the index doesn't cover (written before indexing was on, or the block
+        still being filled) are always included.  For compressed files, offsets are into
+        the decompressed log, and the index is taken to cover it all (written at rotation)
+
+    Args:
+        file_path (str): log file
+        start (:obj:`datetime.datetime`, optional): earliest record time wanted
+        end (:obj:`datetime.datetime`, optional): latest record time wanted
+        level (str or int, optional): minimum level wanted
+        file_size (int, optional): uncompressed size (default: stat plain files, end of index for compressed)
+
+    Returns:
+        (:obj:`list` of :obj:`tuple`): (start offset, end offset) ranges in file order, None if there is no index
+
+    """
+    blocks = p_logging.read_log_index(file_path)
+    if not blocks:
+        return None
+    if file_size is None:
+        if file_path.endswith(('.gz', '.zst')):
+            file_size = max(offset + length for offset, length, _, _, _ in blocks)
+        else:
+            file_size = os.stat(file_path).st_size
+    start_time = start.timestamp() if start is not None else None
+    end_time = end.timestamp() if end is not None else None
+    level_bits = p_logging.get_level_bits(get_level_number(level)) if level is not None else 0xFF
+
+    byte_ranges = []
+    position = 0
+    for offset, length, min_created, max_created, block_levels in sorted(blocks):
+        if offset >= file_size:
+            break   #indexed, but still sitting in a write buffer
+        if offset > position:
+            _add_range(byte_ranges, position, offset)
+        if (
+                (start_time is None or max_created >= start_time) and
+                (end_time is None or min_created <= end_time) and
+                block_levels & level_bits
+        ):
+            _add_range(byte_ranges, offset, min(offset + length, file_size))
+        position = max(position, offset + length)
+    if position < file_size:
+        _add_range(byte_ranges, position, file_size)
+    return byte_ranges
+
+def _add_range(byte_ranges, range_start, range_end):
+    """append a byte range, merging it into the previous one if they touch"""
+    if byte_ranges and byte_ranges[-1][1] >= range_start:
+        byte_ranges[-1] = (byte_ranges[-1][0], max(byte_ranges[-1][1], range_end))
+    else:
+        byte_ranges.append((range_start, range_end))
+
+def open_compressed(file_path):
+    """open a .gz/.zst rotated log for binary line reads
+
+    Args:
+        file_path (str): compressed log file
+
+    Returns:
+        (:obj:`io.BufferedIOBase`): decompressing file object
+
+    """
+    if file_path.endswith('.zst'):
+        if p_logging.zstandard is None:
+            raise RuntimeError('reading {0} needs the zstandard package'.format(file_path))
+        return p_logging.zstandard.open(file_path, 'rb')
+    return gzip.open(file_path, 'rb')
+
+def _iter_buffer_lines(buffer, offset=0, size=None):
+    """(offset, line) for each line of a bytes-like buffer (up to size), newline stripped"""
+    if size is None:
+        size = len(buffer)
+    find = buffer.find
+    while offset < size:
+        newline = find(b'\n', offset, size)
+        if newline < 0:
+            newline = size
+        yield offset, buffer[offset:newline]
+        offset = newline + 1
+
+def _iter_stream_lines(log_file):
+    """(offset, line) for each line of a binary file object, newline stripped"""
+    offset = 0
+    for line in log_file:
+        yield offset, line.rstrip(b'\n')
+        offset += len(line)
+
+def parse_entries(lines, source=''):
+    """group lines into records: a header line plus any continuation lines under it
+
+    Args:
+        lines (iterable): (offset, bytes line) pairs
+        source (str, optional): file name to stamp on entries
+
+    Yields:
+        (:obj:`LogEntry`): one per header line.  Lines before the first header are dropped
+
+    """
+    header = None
+    for offset, line in lines:
+        match = HEADER_PATTERN.match(line)
+        if match:
+            if header is not None:
+                yield _build_entry(header, message_lines, source)
+            header = (_parse_header(match), offset)
+            message_lines = [line[match.end():]]
+        elif header is not None:
+            message_lines.append(line)
+    if header is not None:
+        yield _build_entry(header, message_lines, source)
+
+def _build_entry(header, message_lines, source):
+    """LogEntry from parsed header + raw message lines"""
+    fields, offset = header
+    message = b'\n'.join(message_lines).rstrip(b'\r\n').decode('utf-8', 'replace')
+    return LogEntry(*fields, message=message, source=source, offset=offset)
+
+def _next_header(buffer, offset):
+    """first record header starting at/after offset
+
+    Returns:
+        (tuple): (offset, timestamp), or None past the last record
+
+    """
+    if offset and buffer[offset - 1:offset] != b'\n':
+        newline = buffer.find(b'\n', offset)
+        if newline < 0:
+            return None
+        offset = newline + 1
+    for line_offset, line in _iter_buffer_lines(buffer, offset):
+        match = HEADER_PATTERN.match(line)
+        if match:
+            return line_offset, _parse_header(match)[0]
+    return None
+
+def seek_timestamp(buffer, start):
+    """binary search a time-sorted log for the first record at/after start
+
+    Args:
+        buffer (bytes-like): log file contents (usually an mmap)
+        start (:obj:`datetime.datetime`): time to find
+
+    Returns:
+        (int): byte offset of that record's header, len(buffer) if every record is earlier
+
+    """
+    low, high = 0, len(buffer)
+    while low < high:
+        middle = (low + high) // 2
+        header = _next_header(buffer, middle)
+        if header is None or header[1] >= start:
+            high = middle
+        else:
+            low = middle + 1
+    header = _next_header(buffer, low)
+    return header[0] if header else len(buffer)
+
+def parse_time(value):
+    """CLI time argument: 'YYYY-MM-DD HH:MM[:SS]' or any ISO 8601 form datetime accepts"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid time {0!r}, expected YYYY-MM-DD HH:MM:SS'.format(value))
+
+def main(args=None):
+    """prosper_logreader: print matching records across current and rotated log files"""
+    parser = argparse.ArgumentParser(
+        prog='prosper_logreader',
+        description='search a ProsperLogger log and its rotated/compressed backups'
+    )
+    parser.add_argument('log_path', help='ProsperLogger log_path')
+    parser.add_argument('log_name', help='ProsperLogger log_name (reads <log_name>.log*)')
+    parser.add_argument('--start', type=parse_time, help='first time to show, local time')
+    parser.add_argument('--end', type=parse_time, help='last time to show, local time')
+    parser.add_argument('--level', help='minimum level, e.g. WARNING')
+    parser.add_argument('--func', dest='func_name', help='only records from this funcName')
+    options = parser.parse_args(args)
+
+    try:
+        for entry in read_log(
+                options.log_path,
+                options.log_name,
+                start=options.start,
+                end=options.end,
+                level=options.level,
+                func_name=options.func_name
+        ):
+            print(entry)
+    except BrokenPipeError:   #pragma: no cover
+        sys.stderr.close()  #piped into head
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
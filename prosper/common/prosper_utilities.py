@@ -1,28 +1,35 @@
 '''utilities.py: worker functions for CREST calls'''
 
-from os import path
+from os import path, walk, cpu_count
+import argparse
+import json
 import logging
 from socket import gethostname, gethostbyname
 import smtplib
 from datetime import datetime
 import time
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from prosper.common.prosper_config import get_config, get_local_config_filepath
+from prosper.common.prosper_config import get_local_config_filepath, read_config, ProsperConfig
 
 DEFAULT_LOGGER = logging.getLogger('NULL')
 DEFAULT_LOGGER.addHandler(logging.NullHandler())
 
-def compare_config_files(config_filepath):
-    '''validate that keys in tracked .cfg match keys in _local.cfg'''
-    tracked_config = get_config(config_filepath, True)
-    local_config = get_config(config_filepath)
-
-    unique_values = {}
-
-    if not path.isfile(get_local_config_filepath(config_filepath)):
+def compare_config_files(config_filepath, compare_values=False):
+    '''validate that keys in tracked .cfg match keys in _local.cfg
+        compare_values: also list SECTION.key whose raw values differ
+        returns: None if no _local.cfg, else dict of differences (empty: match)'''
+    local_filepath = get_local_config_filepath(config_filepath, True)
+    if not path.isfile(local_filepath):
         #pytest.skip('no local .cfg found, skipping')
         return None
 
+    tracked_config = read_config(config_filepath)
+    local_config = read_config(local_filepath)
+
+    unique_values = {}
+
     local_unique_sections, local_unique_keys = find_unique_keys(
         local_config,
         tracked_config,
@@ -46,6 +53,10 @@ def compare_config_files(config_filepath):
             tracked_unique_sections
     ]):
         unique_values['unique_sections'] = [local_unique_sections, tracked_unique_sections]
+    if compare_values:
+        changed_values = find_changed_values(tracked_config, local_config)
+        if changed_values:
+            unique_values['changed_values'] = changed_values
 
     return unique_values
 
@@ -55,21 +66,114 @@ def find_unique_keys(base_config, comp_config, base_name):
     unique_keys = []
     unique_sections = []
 
-    for section in base_config:
-        if str(section) == 'DEFAULT':
-            continue #.cfg has DEFAULT key, we do not use
-        if not comp_config.has_section(section):
-            unique_label = base_name + '.' + str(section)
-            unique_sections.append(unique_label)
+    comp_sections = set(comp_config.sections())
+    for section in base_config.sections():  #.cfg has DEFAULT key, we do not use
+        if section not in comp_sections:
+            unique_sections.append(base_name + '.' + str(section))
             continue
 
+        comp_keys = set(comp_config[section])
+        unique_keys.extend(
+            str(section) + '.' + str(key)
+            for key in base_config[section] if key not in comp_keys
+        )
+    return unique_sections, unique_keys
+
+def find_changed_values(base_config, comp_config):
+    '''walks keys shared by BASE and COMP looking for different raw values
+        values are not reported: _local.cfg usually holds secrets
+        returns: changed_keys:list'''
+    changed_keys = []
+
+    comp_sections = set(comp_config.sections())
+    for section in base_config.sections():
+        if section not in comp_sections:
+            continue
+        comp_keys = set(comp_config[section])
         for key in base_config[section]:
-            if not comp_config.has_option(section, key):
-                unique_label = str(section) + '.' + str(key)
-                unique_keys.append(unique_label)
+            if key not in comp_keys:
                 continue
-            #TODO: compare values?
-    return unique_sections, unique_keys
+            if base_config.get(section, key, raw=True) != comp_config.get(section, key, raw=True):
+                changed_keys.append(str(section) + '.' + str(key))
+    return changed_keys
+
+def find_config_files(root_path):
+    '''walk ROOT for tracked .cfg files (anything not *_local.cfg)
+        returns: sorted list of paths'''
+    config_files = []
+    for dir_path, dir_names, file_names in walk(root_path):
+        dir_names[:] = [name for name in dir_names if not name.startswith('.')]
+        config_files.extend(
+            path.join(dir_path, file_name)
+            for file_name in file_names
+            if file_name.endswith('.cfg') and not file_name.endswith('_local.cfg')
+        )
+    return sorted(config_files)
+
+def validate_config_file(config_filepath, compare_values=False):
+    '''compare_config_files() as a report entry: never raises, safe for a process pool
+        returns: dict with config, status (ok/mismatch/no_local/error) and differences'''
+    result = {'config': config_filepath, 'status': 'ok'}
+    try:
+        unique_values = compare_config_files(config_filepath, compare_values)
+    except Exception as error_msg:
+        result['status'] = 'error'
+        result['error'] = '{0}: {1}'.format(type(error_msg).__name__, error_msg)
+        return result
+
+    if unique_values is None:
+        result['status'] = 'no_local'
+    elif unique_values:
+        result['status'] = 'mismatch'
+        result.update(unique_values)
+    return result
+
+def validate_config_tree(root_path, compare_values=False, workers=None):
+    '''validate every tracked .cfg under ROOT against its _local.cfg
+        workers: process pool size (default: cpu count), 1 runs in-process
+        returns: JSON-able report dict'''
+    config_files = find_config_files(root_path)
+    if workers == 1 or len(config_files) < 2:
+        results = [validate_config_file(config_file, compare_values) for config_file in config_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                validate_config_file,
+                config_files,
+                [compare_values] * len(config_files),
+                chunksize=max(1, len(config_files) // ((workers or cpu_count() or 1) * 4))
+            ))
+
+    summary = {status: 0 for status in ('ok', 'mismatch', 'no_local', 'error')}
+    for result in results:
+        summary[result['status']] += 1
+    return {
+        'root': path.abspath(root_path),
+        'compare_values': compare_values,
+        'summary': summary,
+        'configs': results,
+    }
+
+def main(args=None):
+    '''prosper_config_check: validate tracked/local .cfg pairs under a directory, print JSON report
+        exit code 1 on any mismatch/error'''
+    parser = argparse.ArgumentParser(
+        description='validate every tracked .cfg under ROOT against its _local.cfg'
+    )
+    parser.add_argument('root', help='directory to walk')
+    parser.add_argument('--compare-values', action='store_true', help='also report keys whose values differ')
+    parser.add_argument('--workers', type=int, help='process pool size (default: cpu count)')
+    parser.add_argument('--output', help='also write the report to this file')
+    options = parser.parse_args(args)
+
+    report = validate_config_tree(options.root, options.compare_values, options.workers)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    if report['summary']['mismatch'] or report['summary']['error']:
+        sys.exit(1)
 
 def parse_options(config_obj, key):
     '''test/parse logging options from config
@@ -148,13 +252,19 @@ def send_email(
                 body=body
             )
         try:
-            mailserver = smtplib.SMTP(email_server, int(email_port))
+            if isinstance(config_object, ProsperConfig):    #parsed once, cached on the config
+                email_port_number = config_object.get_int('LOGGING', 'email_port')
+                email_recipient_list = config_object.get_list('LOGGING', 'email_recipients')
+            else:
+                email_port_number = int(email_port)
+                email_recipient_list = email_recipients.split(',')
+            mailserver = smtplib.SMTP(email_server, email_port_number)
             mailserver.ehlo()
             mailserver.starttls()
             mailserver.login(email_username, email_secret)
             mailserver.sendmail(
                 email_source,
-                email_recipients.split(','),
+                email_recipient_list,
                 payload
             )
             mailserver.close()
@@ -191,3 +301,6 @@ def quandlfy_json(jsonObj):
 def quandlfy_xml(xmlObj):
     '''turn object from XML into QUANDL-style XML'''
     pass
+
+if __name__ == '__main__':
+    main()
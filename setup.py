@@ -104,6 +104,12 @@ setup(
         'pytest_cov>=2.4.0',
         'mock>=2.0.0'
     ],
+    entry_points={
+        'console_scripts': [
+            'prosper_logreader=prosper.common.prosper_logreader:main',
+            'prosper_config_check=prosper.common.prosper_utilities:main'
+        ]
+    },
     cmdclass={
         'test':PyTest
     }
@@ -6,6 +6,8 @@ Pytest functions for exercising prosper.common.prosper_config
 import os
 from os import path
 import json
+import threading
+import configparser
 import pytest
 
 import prosper.common.prosper_config as prosper_config
@@ -78,6 +80,173 @@ def test_priority_order():
 
     assert TestConfigObj.get_option('TEST', 'dummy_val', None, None) == ENV_TEST_1
 
+def test_frozen_priority_order():
+    """frozen snapshot must answer exactly like the live lookup"""
+    live_config = prosper_config.ProsperConfig(
+        TEST_GLOBAL_CONFIG_PATH,
+        local_filepath_override=TEST_LOCAL_CONFIG_PATH
+    )
+    frozen_config = prosper_config.ProsperConfig(
+        TEST_GLOBAL_CONFIG_PATH,
+        local_filepath_override=TEST_LOCAL_CONFIG_PATH,
+        frozen=True
+    )
+
+    test_cases = [
+        ('TEST', 'key2', 999, None),
+        ('TEST', 'key2', None, None),
+        ('TEST', 'key3', None, None),
+        ('TEST', 'nokey', 111, 111),
+        ('TEST', 'dummy_val', None, None),
+        ('FAILS', 'shared_key', None, 'default'),
+        ('NOSECTION', 'nokey', None, 'default'),
+    ]
+    for test_case in test_cases:
+        assert frozen_config.get_option(*test_case) == live_config.get_option(*test_case)
+
+def test_frozen_reload(tmpdir):
+    """frozen snapshot only changes on reload()"""
+    config_path = str(tmpdir.join('reload_test.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[TEST]\n    key1 = before\n')
+    frozen_config = prosper_config.ProsperConfig(config_path, frozen=True)
+
+    with open(config_path, 'w') as config_file:
+        config_file.write('[TEST]\n    key1 = after\n')
+    os.environ['PROSPER_TEST__key2'] = 'from env'
+    try:
+        assert frozen_config.get_option('TEST', 'key1') == 'before'
+        assert frozen_config.get_option('TEST', 'key2') is None
+
+        frozen_config.reload()
+        assert frozen_config.get_option('TEST', 'key1') == 'after'
+        assert frozen_config.get_option('TEST', 'key2') == 'from env'
+    finally:
+        del os.environ['PROSPER_TEST__key2']
+
+def test_config_cache(tmpdir, monkeypatch):
+    """warm starts read resolved values from .cfg.cache, any source change re-parses"""
+    config_path = str(tmpdir.join('cache_test.cfg'))
+    local_path = str(tmpdir.join('cache_test_local.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[DEFAULT]\nroot = /srv\n[TEST]\nkey1 = ${root}/app\nflag\n[OTHER]\nkey2 = ${TEST:key1}/logs\n')
+    with open(local_path, 'w') as config_file:
+        config_file.write('[TEST]\nkey1 = local\nsecret = $$5\n')
+
+    cold_config = prosper_config.ProsperConfig(config_path, cache=True)
+    cache_path = config_path + prosper_config.CACHE_EXTENSION
+    assert path.isfile(cache_path)
+    live_config = prosper_config.ProsperConfig(config_path, cache=False)
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError('warm start should not parse')
+    with monkeypatch.context() as patch:
+        patch.setattr(prosper_config, 'read_config', fail_parse)
+        warm_config = prosper_config.ProsperConfig(config_path, cache=True)
+    for config_obj in (cold_config, warm_config):
+        for test_case in [
+                ('TEST', 'key1'), ('TEST', 'secret'), ('OTHER', 'key2'), ('OTHER', 'root'), ('TEST', 'flag'),
+        ]:
+            assert config_obj.get_option(*test_case) == live_config.get_option(*test_case)
+        assert config_obj.global_config.get('TEST', 'flag') is None
+    assert warm_config.global_config.get('OTHER', 'key2') == '/srv/app/logs'
+
+    file_stat = os.stat(local_path)
+    with open(local_path, 'w') as config_file:  #same size, same mtime: only the hash differs
+        config_file.write('[TEST]\nkey1 = LOCAL\nsecret = $$5\n')
+    os.utime(local_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+    assert prosper_config.ProsperConfig(config_path, cache=True).get_option('TEST', 'key1') == 'LOCAL'
+
+    with open(cache_path, 'wb') as cache_file:
+        cache_file.write(b'not a cache')
+    monkeypatch.setenv(prosper_config.CONFIG_CACHE_ENVNAME, 'yes')
+    env_config = prosper_config.ProsperConfig(config_path)
+    assert env_config.cache
+    assert env_config.get_option('TEST', 'key1') == 'LOCAL'
+    assert prosper_config.load_config_cache(cache_path) is not None
+
+def test_watch_reload(tmpdir):
+    """watch() picks up edited files and fires reload callbacks"""
+    config_path = str(tmpdir.join('watch_test.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[TEST]\n    key1 = before\n')
+    watched_config = prosper_config.ProsperConfig(config_path, watch_interval=0.05)
+
+    reloaded = threading.Event()
+    watched_config.add_reload_callback(lambda config: reloaded.set())
+    try:
+        assert watched_config.get_option('TEST', 'key1') == 'before'
+        with open(config_path, 'w') as config_file:
+            config_file.write('[TEST]\n    key1 = after, and longer\n')
+
+        assert reloaded.wait(5)
+        assert watched_config.get_option('TEST', 'key1') == 'after, and longer'
+    finally:
+        watched_config.stop_watching()
+
+def test_reload_bad_file_keeps_config(tmpdir):
+    """a file that fails to parse keeps the old config in place"""
+    config_path = str(tmpdir.join('bad_reload_test.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[TEST]\n    key1 = before\n')
+    test_config = prosper_config.ProsperConfig(config_path)
+
+    with open(config_path, 'w') as config_file:
+        config_file.write('[TEST]\n    key1 = after\n[TEST]\n')  #duplicate section
+
+    with pytest.raises(configparser.Error):
+        test_config.check_for_changes()
+    assert test_config.get_option('TEST', 'key1') == 'before'
+
+    with open(config_path, 'w') as config_file:
+        config_file.write('[TEST]\n    key1 = fixed\n')
+    assert test_config.check_for_changes()
+    assert not test_config.check_for_changes()
+    assert test_config.get_option('TEST', 'key1') == 'fixed'
+
+TEST_TYPED_CONFIG_PATH = path.join(HERE, 'test_config_typed.cfg')
+def test_typed_accessors():
+    """validate get_int/get_float/get_bool/get_list conversions and priority"""
+    TestConfigObj = prosper_config.ProsperConfig(TEST_TYPED_CONFIG_PATH)
+
+    assert TestConfigObj.get_int('TYPED', 'int_val') == 42
+    assert TestConfigObj.get_float('TYPED', 'float_val') == 2.5
+    assert TestConfigObj.get_bool('TYPED', 'bool_val') is True
+    assert TestConfigObj.get_list('TYPED', 'list_val') == ['a', 'b', 'c']
+
+    ## args priority matches get_option()
+    assert TestConfigObj.get_int('TYPED', 'int_val', 7, None) == 7
+    assert TestConfigObj.get_int('TYPED', 'blank_val', None, 7) == 7
+    assert TestConfigObj.get_int('TYPED', 'no_key', None, '8') == 8
+    assert TestConfigObj.get_bool('TYPED', 'no_key', None, False) is False
+    assert TestConfigObj.get_int('TYPED', 'no_key') is None
+
+def test_typed_accessors_bad_value():
+    """validate conversion errors name the offending option"""
+    TestConfigObj = prosper_config.ProsperConfig(TEST_TYPED_CONFIG_PATH)
+
+    with pytest.raises(ValueError) as error:
+        TestConfigObj.get_int('TYPED', 'bad_int')
+    assert 'TYPED.bad_int' in str(error.value)
+
+    with pytest.raises(ValueError):
+        TestConfigObj.get_bool('TYPED', 'float_val')
+
+def test_typed_accessors_cache():
+    """validate values are parsed once and cached until reload()"""
+    TestConfigObj = prosper_config.ProsperConfig(TEST_TYPED_CONFIG_PATH)
+
+    assert TestConfigObj.get_int('TYPED', 'int_val') == 42
+    TestConfigObj.local_config['TYPED']['int_val'] = '43'
+    assert TestConfigObj.get_int('TYPED', 'int_val') == 42    #cached
+
+    returned_list = TestConfigObj.get_list('TYPED', 'list_val')
+    returned_list.append('mutated')
+    assert TestConfigObj.get_list('TYPED', 'list_val') == ['a', 'b', 'c']
+
+    TestConfigObj.reload()
+    assert TestConfigObj.get_int('TYPED', 'int_val') == 42
+
 def test_local_filepath_helper():
     """test helper function for fetching local configs"""
     expected_local_filepath = TEST_LOCAL_CONFIG_PATH.replace('.cfg', '_local.cfg')
@@ -101,6 +270,54 @@ def test_config_file():
     if message:
         assert False, message #FIXME: this seems wrong
 
+def helper_write_config(config_path, text):
+    """write a .cfg, making parent dirs"""
+    if not path.isdir(path.dirname(config_path)):
+        os.makedirs(path.dirname(config_path))
+    with open(config_path, 'w') as config_file:
+        config_file.write(text)
+
+def test_compare_config_values(tmpdir):
+    """unique keys/sections as before, changed values only when asked"""
+    config_path = str(tmpdir.join('app.cfg'))
+    helper_write_config(config_path, '[A]\nkey1 = 1\nkey2 = ${key1}\nkey3 = x\n[B]\nkey = 1\n')
+    helper_write_config(str(tmpdir.join('app_local.cfg')), '[A]\nkey1 = 2\nkey2 = ${key1}\nkey4 = y\n[C]\n')
+
+    unique_values = prosper_utilities.compare_config_files(config_path)
+    assert unique_values == {
+        'unique_keys': {'local': ['A.key4'], 'tracked': ['A.key3']},
+        'unique_sections': [['local.C'], ['tracked.B']],
+    }
+    unique_values = prosper_utilities.compare_config_files(config_path, compare_values=True)
+    assert unique_values['changed_values'] == ['A.key1']   #raw values: key2 is the same text
+
+def test_validate_config_tree(tmpdir, capsys):
+    """every tracked .cfg in the tree is checked, in a process pool"""
+    root = str(tmpdir)
+    for index in range(4):
+        helper_write_config(path.join(root, 'svc{0}'.format(index), 'svc.cfg'), '[A]\nkey = 1\n')
+        helper_write_config(path.join(root, 'svc{0}'.format(index), 'svc_local.cfg'), '[A]\nkey = 1\n')
+    helper_write_config(path.join(root, 'svc1', 'svc_local.cfg'), '[A]\nkey = 2\n')
+    helper_write_config(path.join(root, 'svc2', 'svc_local.cfg'), '[A]\nkey = 1\nextra = 3\n')
+    helper_write_config(path.join(root, 'svc3', 'svc.cfg'), 'key = no section\n')
+    helper_write_config(path.join(root, 'lonely', 'lonely.cfg'), '[A]\n')
+    helper_write_config(path.join(root, '.git', 'hidden.cfg'), '[A]\n')
+
+    report = prosper_utilities.validate_config_tree(root, compare_values=True, workers=2)
+    assert [result['status'] for result in report['configs']] == [
+        'no_local', 'ok', 'mismatch', 'mismatch', 'error'
+    ]
+    assert report['summary'] == {'ok': 1, 'mismatch': 2, 'no_local': 1, 'error': 1}
+    assert report['configs'][2]['changed_values'] == ['A.key']
+    assert report['configs'][3]['unique_keys'] == {'local': ['A.extra'], 'tracked': []}
+    assert report['configs'][4]['error'].startswith('MissingSectionHeaderError')
+
+    assert prosper_utilities.validate_config_tree(root, workers=1)['summary']['mismatch'] == 1
+
+    with pytest.raises(SystemExit):
+        prosper_utilities.main([root])
+    assert json.loads(capsys.readouterr().out)['summary']['error'] == 1
+
 def test_local_get():
     """tries to fetch key from local config"""
     TestConfigObj = prosper_config.ProsperConfig(
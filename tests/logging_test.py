@@ -4,9 +4,19 @@ Pytest functions for exercising prosper.common.prosper_logging
 
 """
 
-from os import path, listdir, remove, makedirs, rmdir
+from os import path, listdir, remove, makedirs, rmdir, readlink
 import configparser
 import logging
+import threading
+import time
+import json
+import asyncio
+import subprocess
+import gzip
+import copy
+import random
+import sys
+from http.server import HTTPServer, BaseHTTPRequestHandler
 from datetime import datetime
 from warnings import warn
 
@@ -16,6 +26,7 @@ from testfixtures import LogCapture
 
 import prosper.common.prosper_logging as prosper_logging
 import prosper.common.prosper_config as prosper_config
+import prosper.common.prosper_async_logging as prosper_async_logging
 
 HERE = path.abspath(path.dirname(__file__))
 ROOT = path.dirname(HERE)
@@ -294,8 +305,7 @@ def test_discord_logger(config=TEST_CONFIG):
         (REQUEST_LOGNAME, 'DEBUG', REQUEST_NEW_CONNECTION),
         (REQUEST_LOGNAME, 'DEBUG', request_POST_endpoint),
         (test_logname, 'ERROR', 'prosper.common.prosper_logging TEST --ERROR--'),
-        (REQUEST_LOGNAME, 'DEBUG', REQUEST_NEW_CONNECTION),
-        (REQUEST_LOGNAME, 'DEBUG', request_POST_endpoint),
+        (REQUEST_LOGNAME, 'DEBUG', request_POST_endpoint),  #pooled session: no new connection
         (test_logname, 'CRITICAL', 'prosper.common.prosper_logging TEST --CRITICAL--')
     )
 
@@ -326,8 +336,7 @@ def test_slack_logger(config=TEST_CONFIG):
         (REQUEST_LOGNAME, 'DEBUG', SLACK_NEW_CONNECTION),
         (REQUEST_LOGNAME, 'DEBUG', request_POST_endpoint),
         (test_logname, 'ERROR',    'prosper.common.prosper_logging TEST --ERROR--'),
-        (REQUEST_LOGNAME, 'DEBUG', SLACK_NEW_CONNECTION),
-        (REQUEST_LOGNAME, 'DEBUG', request_POST_endpoint),
+        (REQUEST_LOGNAME, 'DEBUG', request_POST_endpoint),  #pooled session: no new connection
         (test_logname, 'CRITICAL', 'prosper.common.prosper_logging TEST --CRITICAL--'),
     )
 
@@ -346,6 +355,530 @@ def test_configure_common(config=TEST_CONFIG):
 
     assert logger.isEnabledFor(logging.getLevelName(min_log_level))
 
+def test_reapply_levels(tmpdir):
+    """reapply_levels() updates handler levels in place after a config reload"""
+    config_path = str(tmpdir.join('level_test.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[LOGGING]\n    log_level = WARNING\n    log_path = {0}\n'.format(LOG_PATH))
+    test_config = prosper_config.ProsperConfig(config_path)
+    log_builder = prosper_logging.ProsperLogger(
+        'reapply_logger',
+        LOG_PATH,
+        config_obj=test_config
+    )
+    test_config.add_reload_callback(log_builder.reapply_levels)
+    [default_handler] = log_builder.log_handlers
+    assert default_handler.level == logging.WARNING
+
+    with open(config_path, 'w') as config_file:
+        config_file.write('[LOGGING]\n    log_level = DEBUG\n    log_path = {0}\n'.format(LOG_PATH))
+    test_config.reload()
+
+    assert log_builder.log_handlers == [default_handler]
+    assert default_handler.level == logging.DEBUG
+    assert log_builder.get_logger().isEnabledFor(logging.DEBUG)
+    assert str(log_builder) == 'default @ DEBUG'
+    log_builder.close_handles()
+
+def test_level_gating(config=TEST_CONFIG):
+    """logger level follows the lowest handler level, both up and down"""
+    log_builder = prosper_logging.ProsperLogger(
+        'gating_logger',
+        LOG_PATH,
+        config_obj=config
+    )
+    logger = log_builder.get_logger()
+    log_builder.set_handler_level(log_builder.log_handlers[0], 'INFO')
+    assert not logger.isEnabledFor(logging.DEBUG)
+
+    log_builder.configure_debug_logger()
+    debug_handler = log_builder.log_handlers[-1]
+    assert logger.isEnabledFor(logging.DEBUG)
+
+    log_builder.set_handler_level(debug_handler, 'WARNING')
+    assert logger.level == logging.INFO
+    assert str(log_builder).endswith('Debug @ WARNING')
+
+    log_builder.set_handler_level(debug_handler, 'DEBUG')
+    assert logger.level == logging.DEBUG
+    log_builder.remove_handler(debug_handler)
+    assert logger.level == logging.INFO
+    assert debug_handler not in logger.handlers
+    assert debug_handler not in log_builder.log_handlers
+    assert str(log_builder) == 'default @ INFO'
+    log_builder.close_handles()
+
+def helper_open_fds(filepath):
+    """count this process's file descriptors open on filepath"""
+    fd_dir = '/proc/self/fd'
+    count = 0
+    for fd_name in listdir(fd_dir):
+        try:
+            if readlink(path.join(fd_dir, fd_name)) == filepath:
+                count += 1
+        except OSError:
+            pass
+    return count
+
+@pytest.mark.skipif(not path.isdir('/proc/self/fd'), reason='needs /proc to count file descriptors')
+def test_handler_registry(tmpdir):
+    """N constructions of the same ProsperLogger share one handler and one open file"""
+    config_path = str(tmpdir.join('registry.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[LOGGING]\n    log_level = INFO\n')
+    log_path = str(tmpdir)
+    log_abspath = path.join(log_path, 'registry_logger.log')
+
+    builders = [
+        prosper_logging.ProsperLogger(
+            'registry_logger',
+            log_path,
+            config_obj=prosper_config.ProsperConfig(config_path)
+        ) for _ in range(5)
+    ]
+    logger = builders[0].get_logger()
+    assert len(logger.handlers) == 1
+    assert helper_open_fds(log_abspath) == 1
+    assert all(builder.log_handlers == logger.handlers for builder in builders)
+
+    logger.info('once')
+    for builder in builders[:-1]:
+        builder.close_handles()
+    assert len(logger.handlers) == 1    #still in use by the last builder
+    logger.info('twice')
+    builders[-1].close_handles()
+    assert logger.handlers == []
+    assert helper_open_fds(log_abspath) == 0
+
+    with open(log_abspath) as log_file:
+        assert [line.split('] ')[1] for line in log_file.read().splitlines()] == ['once', 'twice']
+
+def test_lazy_imports():
+    """importing prosper_logging does not load requests or parse common_config.cfg"""
+    check_imports = (
+        'import sys; import prosper.common.prosper_logging as p_log;'
+        'print("requests" in sys.modules, p_log._COMMON_CONFIG is None)'
+    )
+    output = subprocess.check_output([sys.executable, '-c', check_imports], cwd=ROOT)
+    assert output.split() == [b'False', b'True']
+
+    assert isinstance(prosper_logging.COMMON_CONFIG, prosper_config.ProsperConfig)
+    assert prosper_logging.COMMON_CONFIG is prosper_logging.get_common_config()
+
+def helper_queued_file_logger(tmpdir, log_name, flush_interval):
+    """build a ProsperLogger with the queued/buffered default file handler"""
+    config_path = str(tmpdir.join('queued_file.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write(
+            '[LOGGING]\n    log_level = INFO\n    log_queued = True\n' +
+            '    log_flush_interval = {0}\n'.format(flush_interval)
+        )
+    log_builder = prosper_logging.ProsperLogger(
+        log_name,
+        str(tmpdir),
+        config_obj=prosper_config.ProsperConfig(config_path)
+    )
+    log_path = str(tmpdir.join(log_name + '.log'))
+    return log_builder, log_path
+
+def test_queued_file_logger(tmpdir):
+    """queued default logger buffers INFO and flushes on ERROR and close"""
+    log_builder, log_path = helper_queued_file_logger(tmpdir, 'queued_file_logger', 60)
+    [queued_handler] = log_builder.log_handlers
+    assert isinstance(queued_handler, prosper_logging.QueuedHandler)
+    assert isinstance(queued_handler.handler, prosper_logging.BufferedTimedRotatingFileHandler)
+    logger = log_builder.get_logger()
+
+    logger.info('buffered')
+    queued_handler.queue.join()
+    with open(log_path) as log_file:
+        assert log_file.read() == ''    #still in the write buffer
+
+    logger.error('flushed')
+    queued_handler.queue.join()
+    with open(log_path) as log_file:
+        lines = log_file.read().splitlines()
+    assert [line.rsplit(' ', 1)[-1] for line in lines] == ['buffered', 'flushed']
+
+    for index in range(100):
+        logger.info('drained %d', index)
+    log_builder.close_handles()
+    with open(log_path) as log_file:
+        assert len(log_file.read().splitlines()) == 102
+
+def test_queued_file_logger_flush_interval(tmpdir):
+    """idle writer flushes buffered records every flush_interval"""
+    log_builder, log_path = helper_queued_file_logger(tmpdir, 'interval_file_logger', 0.05)
+    log_builder.get_logger().info('eventually on disk')
+
+    deadline = time.monotonic() + 5
+    contents = ''
+    while not contents and time.monotonic() < deadline:
+        time.sleep(0.05)
+        with open(log_path) as log_file:
+            contents = log_file.read()
+    assert contents.endswith('eventually on disk\n')
+    log_builder.close_handles()
+
+def test_queued_file_logger_drains_at_exit(tmpdir):
+    """records still buffered at interpreter exit reach the file"""
+    log_builder, log_path = helper_queued_file_logger(tmpdir, 'exit_file_logger', 60)
+    log_builder.close_handles()
+    script = (
+        'import prosper.common.prosper_logging as p_log;'
+        'import prosper.common.prosper_config as p_config;'
+        'builder = p_log.ProsperLogger("exit_file_logger", {0!r}, p_config.ProsperConfig({1!r}));'
+        'logger = builder.get_logger();'
+        '[logger.info("at exit %d", index) for index in range(500)]'
+    ).format(str(tmpdir), str(tmpdir.join('queued_file.cfg')))
+    subprocess.check_call([sys.executable, '-c', script], cwd=ROOT)
+
+    with open(log_path) as log_file:
+        lines = log_file.read().splitlines()
+    assert len(lines) == 500
+    assert lines[-1].endswith('at exit 499')
+
+MULTIPROCESS_WORKER = '''
+import sys, time
+import prosper.common.prosper_logging as p_log
+import prosper.common.prosper_config as p_config
+builder = p_log.ProsperLogger('multiprocess_logger', sys.argv[1], p_config.ProsperConfig(sys.argv[2]))
+logger = builder.get_logger()
+for index in range(int(sys.argv[3])):
+    logger.info('worker=%s line=%d', sys.argv[4], index)
+    time.sleep(0.01)
+builder.close_handles()
+'''
+def test_multiprocess_file_logger(tmpdir):
+    """N processes sharing one log file across several rollovers lose no lines"""
+    config_path = str(tmpdir.join('multiprocess.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write(
+            '[LOGGING]\n    log_level = INFO\n    log_multiprocess = True\n' +
+            '    log_freq = S\n    log_total = 0\n'
+        )
+    workers, lines_per_worker = 4, 250
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-c', MULTIPROCESS_WORKER,
+             str(tmpdir), config_path, str(lines_per_worker), str(worker)],
+            cwd=ROOT
+        )
+        for worker in range(workers)
+    ]
+    assert [process.wait(60) for process in processes] == [0] * workers
+
+    log_files = [
+        log_file for log_file in tmpdir.listdir()
+        if log_file.basename.startswith('multiprocess_logger.log') and
+        not log_file.basename.endswith('.lock')
+    ]
+    assert len(log_files) > 1  #rolled over at least once
+
+    logged = []
+    for log_file in log_files:
+        logged.extend(line.split('] ', 1)[1] for line in log_file.read().splitlines())
+    expected = [
+        'worker={0} line={1}'.format(worker, index)
+        for worker in range(workers) for index in range(lines_per_worker)
+    ]
+    assert sorted(logged) == sorted(expected)
+
+def helper_read_log_files(log_dir, log_name):
+    """read every line of a log and its rotated (optionally gzipped) copies"""
+    lines = []
+    for log_file in log_dir.listdir():
+        if not log_file.basename.startswith(log_name) or log_file.basename.endswith('.lock'):
+            continue
+        opener = gzip.open if log_file.basename.endswith('.gz') else open
+        with opener(str(log_file), 'rt') as log_handle:
+            lines.extend(log_handle.read().splitlines())
+    return lines
+
+def test_size_rotation_compression(tmpdir):
+    """SIZE rotation splits the file near max_bytes and gzips rotated copies"""
+    log_path = str(tmpdir.join('size_logger.log'))
+    handler = prosper_logging.HybridRotatingFileHandler(
+        log_path,
+        rotation='size',
+        max_bytes=300,
+        compression='gzip'
+    )
+    for index in range(100):
+        handler.handle(helper_make_record('size rotation line {0:03d}'.format(index), logging.INFO))
+    handler.close()
+
+    rotated_files = [log_file.basename for log_file in tmpdir.listdir()]
+    assert len(rotated_files) > 5
+    assert all(
+        name == 'size_logger.log' or name.endswith('.gz') for name in rotated_files
+    )
+    assert sorted(helper_read_log_files(tmpdir, 'size_logger.log')) == [
+        'size rotation line {0:03d}'.format(index) for index in range(100)
+    ]
+
+def test_hybrid_rotation_retention(tmpdir):
+    """HYBRID rotation enforces retention by count and by total bytes"""
+    log_path = str(tmpdir.join('hybrid_logger.log'))
+    handler = prosper_logging.HybridRotatingFileHandler(
+        log_path,
+        rotation=prosper_logging.RotationPolicy.HYBRID,
+        max_bytes=100,
+        max_total_bytes=250,
+        backupCount=4
+    )
+    for index in range(100):
+        handler.handle(helper_make_record('hybrid retention line {0:03d}'.format(index), logging.INFO))
+    handler.close()
+
+    rotated_files = [stat for _, stat in handler.get_rotated_files()]
+    assert 0 < len(rotated_files) <= 4
+    assert sum(stat.st_size for stat in rotated_files) <= 250
+    with open(log_path) as log_file:
+        assert log_file.read().splitlines()[-1] == 'hybrid retention line 099'
+
+def test_log_index_rotation(tmpdir):
+    """index sidecar covers every byte written, follows each backup and is removed with it"""
+    log_path = str(tmpdir.join('index_logger.log'))
+    handler = prosper_logging.HybridRotatingFileHandler(
+        log_path,
+        rotation='size',
+        max_bytes=500,
+        compression='gzip',
+        index_block=200,
+        backupCount=3
+    )
+    for index in range(200):
+        level = logging.ERROR if index == 150 else logging.INFO
+        handler.handle(helper_make_record('indexed line {0:03d} \u00e9'.format(index), level))
+    handler.close()
+
+    rotated_files = [file_path for file_path, _ in handler.get_rotated_files()]
+    assert len(rotated_files) == 3
+    for file_path in rotated_files + [log_path]:
+        blocks = prosper_logging.read_log_index(file_path)
+        assert path.isfile(prosper_logging.get_index_path(file_path))
+        offset = 0
+        for block_offset, length, min_created, max_created, _ in blocks:
+            assert block_offset == offset
+            assert min_created <= max_created
+            offset += length
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rb') as log_file:
+            assert offset == len(log_file.read())
+    index_files = [name for name in listdir(str(tmpdir)) if name.endswith('.idx')]
+    assert len(index_files) == 4    #older backups' indexes went with them
+
+    error_bit = prosper_logging.get_level_bit(logging.ERROR)
+    assert sum(
+        1 for file_path in rotated_files + [log_path]
+        for block in prosper_logging.read_log_index(file_path) if block[4] & error_bit
+    ) == 1
+    assert prosper_logging.get_level_bits(logging.WARNING) & error_bit
+    assert not prosper_logging.get_level_bits(logging.WARNING) & prosper_logging.get_level_bit(logging.INFO)
+
+def test_compression_does_not_block(tmpdir):
+    """compression runs on the cleanup thread, not the logging call"""
+    log_path = str(tmpdir.join('slow_compress.log'))
+    compressing = threading.Event()
+    release = threading.Event()
+    def slow_compress(filepath, compression):
+        compressing.set()
+        release.wait(5)
+
+    with patch('prosper.common.prosper_logging.compress_log_file', side_effect=slow_compress):
+        handler = prosper_logging.HybridRotatingFileHandler(
+            log_path,
+            rotation=prosper_logging.RotationPolicy.SIZE,
+            max_bytes=50,
+            compression='gzip'
+        )
+        for index in range(10):
+            handler.handle(helper_make_record('not blocked {0}'.format(index), logging.INFO))
+        assert compressing.wait(5)
+        assert not release.is_set()
+        release.set()
+        handler.close()
+
+    assert len(helper_read_log_files(tmpdir, 'slow_compress.log')) == 10
+
+@patch('prosper.common.prosper_logging.warnings.warn')
+def test_get_rotation_options(warn):
+    """validate config parsing for RotationPolicy/log_compression"""
+    policy = prosper_logging.RotationPolicy
+    assert prosper_logging.get_rotation_policy('SIZE') == policy.SIZE
+    assert prosper_logging.get_rotation_policy('hybrid') == policy.HYBRID
+    assert prosper_logging.get_rotation_policy('') == policy.TIME
+    assert prosper_logging.get_compression('GZIP') == 'gzip'
+    assert prosper_logging.get_compression('none') is None
+    assert prosper_logging.get_compression(None) is None
+    assert not warn.called
+
+    assert prosper_logging.get_rotation_policy('weekly-ish') == policy.TIME
+    assert prosper_logging.get_compression('rar') is None
+    assert warn.call_count == 2
+
+def test_rotation_config(tmpdir):
+    """validate [LOGGING] rotation keys reach the default file handler"""
+    config_path = str(tmpdir.join('rotation.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write(
+            '[LOGGING]\n    log_rotation = hybrid\n    log_max_bytes = 1048576\n' +
+            '    log_max_total_bytes = 4194304\n    log_compression = gzip\n'
+        )
+    log_builder = prosper_logging.ProsperLogger(
+        'rotation_config_logger',
+        str(tmpdir),
+        config_obj=prosper_config.ProsperConfig(config_path)
+    )
+    [handler] = log_builder.log_handlers
+    assert handler.rotation == prosper_logging.RotationPolicy.HYBRID
+    assert handler.max_bytes == 1048576
+    assert handler.max_total_bytes == 4194304
+    assert handler.compression == 'gzip'
+    log_builder.close_handles()
+
+def test_json_formatter():
+    """validate JSONFormatter schema, extras and structured exceptions"""
+    formatter = prosper_logging.JSONFormatter()
+    record = helper_make_record('hello %s', logging.WARNING)
+    record.args = ('world',)
+    record.request_id = 'abc123'
+
+    payload = json.loads(formatter.format(record))
+    assert list(payload) == [
+        'asctime', 'levelname', 'name', 'filename', 'funcName', 'lineno', 'message',
+        'exception', 'request_id'
+    ]
+    assert payload['message'] == 'hello world'
+    assert payload['levelname'] == 'WARNING'
+    assert payload['exception'] is None
+    assert payload['request_id'] == 'abc123'
+
+    try:
+        raise KeyError('missing')
+    except KeyError:
+        record = logging.makeLogRecord({
+            'msg': 'failed', 'levelno': logging.ERROR, 'exc_info': sys.exc_info()
+        })
+    exception = json.loads(formatter.format(record))['exception']
+    assert exception['type'] == 'KeyError'
+    assert exception['message'] == "'missing'"
+    assert exception['traceback'].startswith('Traceback')
+
+    no_extras = prosper_logging.JSONFormatter(
+        '%(levelname)s %(message)s',
+        extra_fields=False,
+        encoder=lambda payload: json.dumps(payload, sort_keys=True)
+    )
+    assert no_extras.format(helper_make_record('plain')) == \
+        '{"exception": null, "levelname": "ERROR", "message": "plain"}'
+
+def test_json_log_format_config(tmpdir):
+    """log_format = JSON in config builds a JSONFormatter"""
+    config_path = str(tmpdir.join('json_format.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[LOGGING]\n    log_level = INFO\n    log_format = JSON\n')
+    log_builder = prosper_logging.ProsperLogger(
+        'json_logger',
+        str(tmpdir),
+        config_obj=prosper_config.ProsperConfig(config_path)
+    )
+    log_builder.get_logger().info('structured', extra={'order': 42})
+    log_builder.close_handles()
+
+    with open(str(tmpdir.join('json_logger.log'))) as log_file:
+        payload = json.loads(log_file.readline())
+    assert payload['message'] == 'structured'
+    assert payload['order'] == 42
+
+def test_fast_formatter_matches_stdlib():
+    """FastFormatter output is byte-identical to logging.Formatter for every built-in format"""
+    rng = random.Random(1234)
+    try:
+        raise RuntimeError('differential')
+    except RuntimeError:
+        exc_info = sys.exc_info()
+    messages = ['plain', 'args %s/%d', 'unicode \u2603 %r', 'x' * 1500, 'multi\nline %s']
+
+    records = []
+    start = time.time()
+    for index in range(2000):
+        message = messages[index % len(messages)]
+        record = logging.LogRecord(
+            'differential.logger', rng.choice([10, 20, 30, 40, 50]),
+            '/path/to/module.py', rng.randint(1, 9999), message,
+            tuple(range(message.count('%'))) or None,
+            exc_info if index % 97 == 0 else None,
+            func=rng.choice(['main', '<module>', 'handler'])
+        )
+        record.created = start + rng.uniform(-5, 5)    #exercise second boundaries/cache misses
+        record.msecs = (record.created - int(record.created)) * 1000
+        records.append(record)
+
+    for report_format in prosper_logging.ReportingFormats:
+        if report_format == prosper_logging.ReportingFormats.JSON:
+            continue
+        fast_formatter = prosper_logging.build_formatter(report_format.value)
+        assert isinstance(fast_formatter, prosper_logging.FastFormatter)
+        stock_formatter = logging.Formatter(report_format.value)
+        for record in records:
+            expected = stock_formatter.format(copy.copy(record))
+            assert fast_formatter.format(copy.copy(record)) == expected
+
+def test_handler_metrics(tmpdir):
+    """validate per-handler counters and the get_metrics() snapshot"""
+    log_builder = prosper_logging.ProsperLogger(
+        'metrics_logger',
+        str(tmpdir),
+        config_obj=TEST_CONFIG
+    )
+    logger = log_builder.get_logger()
+    logger.propagate = False    #keep pytest's capture handler out of the bad record
+    [file_handler] = log_builder.log_handlers
+    file_handler.addFilter(lambda record: 'secret' not in record.msg)
+
+    logger.info('first')
+    logger.warning('second')
+    logger.info('a secret')
+    with patch.object(logging, 'raiseExceptions', False):
+        logger.info('%d', 'not a number')
+    logger.debug('below handler level')
+
+    metrics = log_builder.get_metrics()['default']
+    assert metrics['level'] == 'INFO'
+    assert metrics['emitted'] == 3
+    assert metrics['filtered'] == 1
+    assert metrics['errors'] == 1
+    with open(file_handler.baseFilename) as log_file:
+        assert metrics['bytes_written'] == len(log_file.read()) - 2  #newlines are not formatter output
+    assert 0 < metrics['max_emit_time'] <= metrics['emit_time']
+    log_builder.close_handles()
+
+def test_webhook_metrics(tmpdir):
+    """queued webhook handlers report delivery counters and a status histogram"""
+    server, url = helper_stub_webhook([(429, {'Retry-After': '0'}, b'')])
+    log_builder = prosper_logging.ProsperLogger(
+        'webhook_metrics_logger',
+        str(tmpdir),
+        config_obj=TEST_CONFIG
+    )
+    log_builder.configure_slack_logger(url, queued=True)
+    log_builder.get_logger().error('alert')
+    log_builder.close_handles()
+    server.shutdown()
+
+    metrics = log_builder.get_metrics()
+    assert set(metrics) == {'default', 'Slack'}
+    slack_metrics = metrics['Slack']
+    assert slack_metrics['emitted'] == 1
+    assert slack_metrics['dropped'] == 0
+    assert slack_metrics['delivery']['emitted'] == 1
+    assert slack_metrics['webhook'] == {
+        'sent': 1, 'retried': 1, 'dropped': 0, 'status': {429: 1, 204: 1}
+    }
+    assert metrics['default']['emitted'] == 1
+
 def test_bad_init():
     """test validation for prosper_config.ProsperConfig"""
     test_logname = 'exceptional_logger'
@@ -497,7 +1030,7 @@ def test_pathmaking_fail_writeaccess(warn, access):
 
     assert warn.called
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_send_msg_to_webhook_success(post):
     """verify that the handler is sending messages"""
     test_serverid = 1234
@@ -506,12 +1039,13 @@ def test_send_msg_to_webhook_success(post):
     webhook = prosper_logging.DiscordWebhook()
     webhook.api_keys(test_serverid, test_apikey)
     handler = prosper_logging.HackyDiscordHandler(webhook)
+    post.return_value = Mock(status_code=204, headers={})
 
     handler.send_msg_to_webhook('dummy')
 
     assert post.called
 
-@patch('requests.post', side_effect=Exception)
+@patch('requests.Session.post', side_effect=Exception)
 @patch('prosper.common.prosper_logging.warnings.warn')
 def test_send_msg_to_webhook_faulty(warn, post):
     """verify that the handler gives a warning on exception"""
@@ -526,6 +1060,566 @@ def test_send_msg_to_webhook_faulty(warn, post):
 
     assert warn.called
 
+@patch('requests.Session.post')
+def test_send_msg_to_webhook_timeout(post):
+    """verify webhook posts carry explicit connect/read timeouts"""
+    webhook = prosper_logging.DiscordWebhook()
+    webhook.api_keys(1234, 'some_key')
+    handler = prosper_logging.HackyDiscordHandler(
+        webhook,
+        connect_timeout=1.5,
+        read_timeout=7
+    )
+    post.return_value = Mock(status_code=204, headers={})
+
+    handler.send_msg_to_webhook('dummy')
+
+    assert post.call_args[1]['timeout'] == (1.5, 7)
+
+def test_webhook_session_shared():
+    """verify handlers pointed at the same host reuse one pooled session"""
+    webhook_a = prosper_logging.DiscordWebhook()
+    webhook_a.api_keys(1234, 'some_key')
+    webhook_b = prosper_logging.DiscordWebhook()
+    webhook_b.api_keys(5678, 'other_key')
+
+    handler_a = prosper_logging.HackyDiscordHandler(webhook_a, pool_size=3)
+    handler_b = prosper_logging.HackyDiscordHandler(webhook_b, pool_size=3)
+    slack_handler = prosper_logging.HackySlackHandler(
+        'https://hooks.slack.com/services/T000/B000/XXXX',
+        pool_size=3
+    )
+
+    assert handler_a.session is handler_b.session
+    assert slack_handler.session is not handler_a.session
+    adapter = handler_a.session.get_adapter(handler_a.api_url)
+    assert adapter._pool_maxsize == 3
+
+def test_webhook_connection_options(config=TEST_CONFIG):
+    """verify [LOGGING] pool/timeout keys reach the handlers"""
+    log_builder = prosper_logging.ProsperLogger(
+        'webhook_options_logger',
+        LOG_PATH,
+        config_obj=config
+    )
+    log_builder.configure_discord_logger(
+        discord_webhook='https://discordapp.com/api/webhooks/1234/some-key'
+    )
+    discord_handler = log_builder.log_handlers[-1]
+
+    assert discord_handler.timeout == (
+        float(config.get_option('LOGGING', 'webhook_connect_timeout')),
+        float(config.get_option('LOGGING', 'webhook_read_timeout'))
+    )
+    test_cleanup_log_directory(log_builder)
+
+def helper_batching_discord_handler(batch_latency=60):
+    """build a BatchingDiscordHandler with dummy credentials"""
+    webhook = prosper_logging.DiscordWebhook()
+    webhook.api_keys(1234, 'some_key')
+    handler = prosper_logging.BatchingDiscordHandler(webhook, batch_latency=batch_latency)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+@patch('prosper.common.prosper_logging.HackyDiscordHandler.send_msg_to_webhook')
+def test_discord_batching(send_msg):
+    """validate records are packed into one Discord post"""
+    handler = helper_batching_discord_handler()
+    for message in ['one', 'two', 'three']:
+        handler.handle(helper_make_record(message))
+    assert not send_msg.called
+
+    handler.flush()
+    send_msg.assert_called_once_with('one\ntwo\nthree')
+    handler.close()
+
+@patch('prosper.common.prosper_logging.HackyDiscordHandler.send_msg_to_webhook')
+def test_discord_batching_triggers(send_msg):
+    """validate size and CRITICAL flush triggers"""
+    handler = helper_batching_discord_handler()
+    big_message = 'x' * 900
+    for _ in range(3):
+        handler.handle(helper_make_record(big_message))
+    assert send_msg.call_count == 1  #third message would overflow DISCORD_MESSAGE_LIMIT
+    assert send_msg.call_args[0][0] == big_message + '\n' + big_message
+
+    handler.handle(helper_make_record('urgent', logging.CRITICAL))
+    assert send_msg.call_count == 2
+    assert send_msg.call_args[0][0] == big_message + '\nurgent'
+    assert handler.batch == []
+    handler.close()
+
+@patch('prosper.common.prosper_logging.HackyDiscordHandler.send_msg_to_webhook')
+def test_discord_batching_latency(send_msg):
+    """validate max-latency timer posts the batch"""
+    sent = threading.Event()
+    send_msg.side_effect = lambda message: sent.set()
+    handler = helper_batching_discord_handler(batch_latency=0.05)
+    handler.handle(helper_make_record('late'))
+
+    assert sent.wait(5)
+    send_msg.assert_called_once_with('late')
+    handler.close()
+
+@patch('prosper.common.prosper_logging.HackySlackHandler.post_payload')
+def test_slack_batching(post_payload):
+    """validate records become attachments of one Slack post"""
+    handler = prosper_logging.BatchingSlackHandler(
+        'https://hooks.slack.com/services/T000/B000/XXXX',
+        batch_latency=60,
+        batch_size=2
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for message in ['one', 'two', 'three']:
+        handler.handle(helper_make_record(message))
+    handler.close()
+
+    assert post_payload.call_count == 2
+    first_payload = post_payload.call_args_list[0][0][0]
+    assert first_payload['text'] == '2 log messages'
+    assert len(first_payload['attachments']) == 2
+    assert first_payload['attachments'][0]['text'].endswith('\none')
+    assert first_payload['attachments'][0]['color'] == 'warning'
+    assert post_payload.call_args_list[1][0][0]['text'] == 'three'
+
+def test_discord_logger_batching(config=TEST_CONFIG):
+    """validate batch_latency wiring in configure_discord_logger"""
+    log_builder = prosper_logging.ProsperLogger(
+        'discord_batch_logger',
+        LOG_PATH,
+        config_obj=config
+    )
+    log_builder.configure_discord_logger(
+        discord_webhook='https://discordapp.com/api/webhooks/1234/some-key',
+        batch_latency=2
+    )
+    discord_handler = log_builder.log_handlers[-1]
+
+    assert isinstance(discord_handler, prosper_logging.BatchingDiscordHandler)
+    assert discord_handler.batch_latency == 2.0
+    test_cleanup_log_directory(log_builder)
+
+def helper_dedup_record(message, lineno=10):
+    """build a record that DuplicateAlertFilter can fingerprint"""
+    return logging.makeLogRecord({
+        'name': 'dedup_logger',
+        'pathname': 'dedup.py',
+        'lineno': lineno,
+        'msg': message,
+        'levelno': logging.ERROR,
+        'levelname': 'ERROR'
+    })
+
+@patch('prosper.common.prosper_logging.time.monotonic')
+def test_duplicate_alert_filter(monotonic):
+    """validate repeats are suppressed then summarized"""
+    dedup_filter = prosper_logging.DuplicateAlertFilter(window=60)
+
+    monotonic.return_value = 1000
+    first = helper_dedup_record('timeout after 31ms')
+    assert dedup_filter.filter(first)
+    assert first.repeat_summary == ''
+
+    for offset, elapsed in enumerate(['12ms', '45ms', '7ms']):
+        monotonic.return_value = 1001 + offset
+        assert not dedup_filter.filter(helper_dedup_record('timeout after ' + elapsed))
+    assert not dedup_filter.filter(helper_dedup_record('timeout after 31ms'))
+    assert dedup_filter.filter(helper_dedup_record('timeout after 31ms', lineno=11)) #different line
+    assert dedup_filter.filter(helper_dedup_record('object at 0x7f3a missing'))
+    assert not dedup_filter.filter(helper_dedup_record('object at 0x9bc1 missing'))
+
+    monotonic.return_value = 1061
+    after_window = helper_dedup_record('timeout after 99ms')
+    assert dedup_filter.filter(after_window)
+    assert after_window.repeat_summary == 'repeated 4 times in the last 61 seconds'
+    assert dedup_filter.suppressed == 5
+
+def test_duplicate_alert_filter_cache_size():
+    """validate fingerprint cache is bounded (oldest evicted)"""
+    dedup_filter = prosper_logging.DuplicateAlertFilter(window=60, cache_size=2)
+    for lineno in [1, 2, 3]:
+        assert dedup_filter.filter(helper_dedup_record('boom', lineno))
+
+    assert len(dedup_filter._cache) == 2
+    assert dedup_filter.filter(helper_dedup_record('boom', 1))     #evicted, passes again
+    assert not dedup_filter.filter(helper_dedup_record('boom', 3))
+
+def helper_sample_record(levelno=logging.INFO, lineno=10):
+    """build a record for the sampling filters"""
+    return logging.makeLogRecord({
+        'name': 'sampling_logger',
+        'pathname': 'sampling.py',
+        'lineno': lineno,
+        'msg': 'tick',
+        'levelno': levelno,
+        'levelname': logging.getLevelName(levelno)
+    })
+
+def test_every_n_filter():
+    """1 in N below WARNING, WARNING+ always passes"""
+    sample_filter = prosper_logging.EveryNFilter(5, report_interval=0)
+    kept = [sample_filter.filter(helper_sample_record()) for _ in range(20)]
+    assert kept == [True, False, False, False, False] * 4
+    assert all(sample_filter.filter(helper_sample_record(logging.WARNING)) for _ in range(10))
+    assert sample_filter.snapshot() == {'passed': 4, 'suppressed': 16}
+
+def test_probabilistic_filter():
+    """keeps roughly rate of records, repeatable with a seed"""
+    first = prosper_logging.ProbabilisticFilter(0.25, seed=7, report_interval=0)
+    second = prosper_logging.ProbabilisticFilter(0.25, seed=7, report_interval=0)
+    kept = [first.filter(helper_sample_record()) for _ in range(4000)]
+    assert kept == [second.filter(helper_sample_record()) for _ in range(4000)]
+    assert 800 < sum(kept) < 1200
+
+@patch('prosper.common.prosper_logging.time.monotonic')
+def test_keyed_token_bucket_filter(monotonic):
+    """each call site gets its own bucket"""
+    monotonic.return_value = 1000
+    sample_filter = prosper_logging.KeyedTokenBucketFilter(rate=1, burst=3, report_interval=0)
+    assert [sample_filter.filter(helper_sample_record(lineno=1)) for _ in range(5)] == \
+        [True, True, True, False, False]
+    assert sample_filter.filter(helper_sample_record(lineno=2))    #other line, full bucket
+
+    monotonic.return_value = 1002    #2 tokens refilled
+    assert [sample_filter.filter(helper_sample_record(lineno=1)) for _ in range(3)] == \
+        [True, True, False]
+
+@patch('prosper.common.prosper_logging.time.monotonic')
+def test_adaptive_sampling_filter(monotonic):
+    """tightens above max_rate, loosens when traffic drops"""
+    monotonic.return_value = 1000
+    sample_filter = prosper_logging.AdaptiveSamplingFilter(max_rate=10, report_interval=0)
+    assert sum(sample_filter.filter(helper_sample_record()) for _ in range(100)) == 10  #capped
+
+    monotonic.return_value = 1001
+    assert sum(sample_filter.filter(helper_sample_record()) for _ in range(100)) == 10
+    assert sample_filter.keep_every == 10
+
+    monotonic.return_value = 1002    #traffic drops to 5/sec
+    assert sum(sample_filter.filter(helper_sample_record()) for _ in range(5)) == 1
+    monotonic.return_value = 1003
+    assert all(sample_filter.filter(helper_sample_record()) for _ in range(5))
+    assert sample_filter.keep_every == 1
+
+def test_sampling_config(tmpdir):
+    """log_sampling attaches a filter to the logger; suppressed counts are reported"""
+    config_path = str(tmpdir.join('sampling.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write(
+            '[LOGGING]\n    log_level = INFO\n    log_sampling = every_n\n'
+            '    log_sample_every = 4\n    log_sample_report_interval = 0.05\n'
+        )
+    log_builder = prosper_logging.ProsperLogger(
+        'sampling_logger',
+        str(tmpdir),
+        config_obj=prosper_config.ProsperConfig(config_path)
+    )
+    sample_filter = log_builder.sampling_filter
+    assert isinstance(sample_filter, prosper_logging.EveryNFilter)
+    assert sample_filter.every == 4
+
+    logger = log_builder.get_logger()
+    for index in range(8):
+        logger.info('request %d', index)
+    logger.warning('always kept')
+    time.sleep(0.06)
+    logger.info('request 8')    #triggers the report
+    log_builder.close_handles()
+
+    with open(str(tmpdir.join('sampling_logger.log'))) as log_file:
+        lines = log_file.read().splitlines()
+    assert [line.split('] ')[1] for line in lines] == [
+        'request 0',
+        'request 4',
+        'always kept',
+        'EveryNFilter suppressed 6 records in the last 0 seconds',
+        'request 8',
+    ]
+
+    log_builder.configure_sampling()    #rebuilding doesn't stack filters
+    assert logger.filters.count(sample_filter) == 0
+    assert len([
+        each for each in logger.filters if isinstance(each, prosper_logging.SamplingFilter)
+    ]) == 1
+    logger.removeFilter(log_builder.sampling_filter)
+
+def test_discord_repeat_summary():
+    """validate repeat summary is appended to webhook message"""
+    webhook = prosper_logging.DiscordWebhook()
+    webhook.api_keys(1234, 'some_key')
+    handler = prosper_logging.HackyDiscordHandler(webhook)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    record = helper_dedup_record('boom')
+    record.repeat_summary = 'repeated 3 times in the last 60 seconds'
+
+    assert handler.build_message(record) == 'boom\n(repeated 3 times in the last 60 seconds)'
+
+class ListHandler(logging.Handler):
+    """collect records handled"""
+    def __init__(self, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def test_flight_recorder_handler():
+    """ring buffer dumps only what the target skipped, and builds an excerpt"""
+    target = ListHandler(logging.INFO)
+    recorder = prosper_logging.FlightRecorderHandler(target, buffer_size=4, excerpt_lines=2)
+    recorder.setFormatter(logging.Formatter('%(message)s'))
+    for index in range(6):
+        recorder.handle(helper_sample_record(logging.DEBUG, lineno=index))
+    recorder.handle(helper_sample_record(logging.INFO, lineno=6))
+    assert len(recorder.buffer) == 4
+    assert target.records == []
+
+    error = helper_sample_record(logging.ERROR)
+    recorder.handle(error)
+    assert [record.lineno for record in target.records] == [3, 4, 5]   #oldest evicted, INFO skipped
+    assert error.flight_excerpt == 'tick\ntick'
+    assert not recorder.buffer
+    assert recorder.dumps == 1
+
+    recorder.excerpt_chars = 6
+    assert recorder.build_excerpt([helper_sample_record()] * 3) == '...ick'
+
+@pytest.mark.parametrize('queued', [False, True])
+def test_flight_recorder_logger(tmpdir, queued):
+    """configure_flight_recorder writes DEBUG context to the log file on ERROR only"""
+    config_path = str(tmpdir.join('flight.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write(
+            '[LOGGING]\n    log_level = INFO\n    flight_buffer_size = 3\n'
+            '    log_queued = {0}\n'.format(queued)
+        )
+    log_builder = prosper_logging.ProsperLogger(
+        'flight_logger_{0}'.format(queued),
+        str(tmpdir),
+        config_obj=prosper_config.ProsperConfig(config_path)
+    )
+    log_builder.configure_flight_recorder()
+    recorder = log_builder.log_handlers[-1]
+    logger = log_builder.get_logger()
+    assert logger.handlers[0] is recorder
+    assert recorder.buffer.maxlen == 3
+    assert logger.isEnabledFor(logging.DEBUG)
+
+    for index in range(5):
+        logger.debug('step %d', index)
+    logger.info('working')
+    logger.error('failed')
+    logger.debug('after')
+    log_builder.close_handles()
+
+    with open(str(tmpdir.join('flight_logger_{0}.log'.format(queued)))) as log_file:
+        messages = [line.split('] ')[1] for line in log_file.read().splitlines()]
+    assert messages == ['working', 'step 3', 'step 4', 'failed']
+
+def test_discord_flight_excerpt():
+    """excerpt is appended to the webhook message, trimmed to fit"""
+    webhook = prosper_logging.DiscordWebhook()
+    webhook.api_keys(1234, 'some_key')
+    handler = prosper_logging.HackyDiscordHandler(webhook)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    record = helper_dedup_record('boom')
+    record.flight_excerpt = 'step 1\nstep 2'
+    assert handler.build_message(record) == 'boom\n```\nstep 1\nstep 2\n```'
+
+    record = helper_dedup_record('x' * 1800)
+    record.flight_excerpt = 'y' * 500
+    message = handler.build_message(record)
+    assert len(message) <= prosper_logging.DISCORD_MESSAGE_LIMIT
+    assert message.endswith('y\n```')
+
+def test_discord_logger_dedup():
+    """validate webhook_dedup_window wiring in configure_discord_logger"""
+    log_builder = prosper_logging.ProsperLogger(
+        'discord_dedup_logger',
+        LOG_PATH,
+        config_obj=prosper_config.ProsperConfig(path.join(HERE, 'test_webhook_config.cfg'))
+    )
+    log_builder.configure_discord_logger(
+        discord_webhook='https://discordapp.com/api/webhooks/1234/some-key'
+    )
+    dedup_filter = log_builder.log_handlers[-1].filters[0]
+
+    assert isinstance(dedup_filter, prosper_logging.DuplicateAlertFilter)
+    assert dedup_filter.window == 30.0
+    assert dedup_filter.cache_size == 10
+    test_cleanup_log_directory(log_builder)
+
+class HelperStubWebhook(BaseHTTPRequestHandler):
+    """local webhook endpoint: replies from server.responses, then 204s"""
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.request_times.append(time.monotonic())
+        status, headers, body = (204, {}, b'')
+        if self.server.responses:
+            status, headers, body = self.server.responses.pop(0)
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass    #keep test output quiet
+
+def helper_stub_webhook(responses=None):
+    """start local stub webhook server
+
+    Args:
+        responses (:obj:`list`): (status, headers, body) to reply with, in order
+
+    Returns:
+        (:obj:`http.server.HTTPServer`): running server (call .shutdown() when done)
+        (str): webhook url
+
+    """
+    server = HTTPServer(('127.0.0.1', 0), HelperStubWebhook)
+    server.responses = list(responses or [])
+    server.request_times = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{0}/webhook'.format(server.server_port)
+
+def test_rate_limiter_retry_after():
+    """validate 429 + Retry-After is retried after the requested pause"""
+    server, url = helper_stub_webhook([
+        (429, {'Retry-After': '0.2'}, b''),
+        (429, {}, json.dumps({'retry_after': 0.1}).encode('utf-8')),
+    ])
+    handler = prosper_logging.HackySlackHandler(url, max_retries=3)
+
+    handler.send_msg_to_webhook({'text': 'hello'}, 'hello')
+    server.shutdown()
+
+    assert len(server.request_times) == 3
+    assert server.request_times[1] - server.request_times[0] >= 0.2
+    assert server.request_times[2] - server.request_times[1] >= 0.1
+    assert handler.rate_limiter.stats == {'sent': 1, 'retried': 2, 'dropped': 0}
+
+@patch('prosper.common.prosper_logging.warnings.warn')
+def test_rate_limiter_dropped(warn):
+    """validate message is dropped (with warning) once retries run out"""
+    server, url = helper_stub_webhook([(429, {'Retry-After': '0'}, b'')] * 3 + [(503, {}, b'')])
+    handler = prosper_logging.HackySlackHandler(url, max_retries=2)
+
+    handler.send_msg_to_webhook({'text': 'hello'}, 'hello')
+    handler.send_msg_to_webhook({'text': 'hello'}, 'hello') #503, then 204
+    server.shutdown()
+
+    assert warn.call_count == 1
+    assert handler.rate_limiter.stats == {'sent': 1, 'retried': 3, 'dropped': 1}
+
+def test_rate_limiter_token_bucket():
+    """validate steady-state posts are spaced by rate_limit"""
+    server, url = helper_stub_webhook()
+    handler = prosper_logging.HackySlackHandler(url, rate_limit=10, rate_burst=1)
+
+    for _ in range(3):
+        handler.send_msg_to_webhook({'text': 'hello'}, 'hello')
+    server.shutdown()
+
+    assert server.request_times[-1] - server.request_times[0] >= 0.19
+    assert handler.rate_limiter.stats['sent'] == 3
+
+def test_rate_limiter_reset_after():
+    """validate X-RateLimit-Remaining: 0 pauses until the window resets"""
+    server, url = helper_stub_webhook([
+        (204, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '0.3'}, b''),
+    ])
+    handler = prosper_logging.HackySlackHandler(url)
+
+    handler.send_msg_to_webhook({'text': 'hello'}, 'hello')
+    handler.send_msg_to_webhook({'text': 'hello'}, 'hello')
+    server.shutdown()
+
+    assert server.request_times[1] - server.request_times[0] >= 0.3
+
+def test_async_slack_handler():
+    """validate async handler never blocks emit and drains on aclose()"""
+    server, url = helper_stub_webhook()
+    payloads = []
+    original_post = prosper_async_logging.AsyncSlackHandler._post_blocking
+    def recording_post(handler, payload):
+        payloads.append(payload)
+        original_post(handler, payload)
+
+    async def run_service():
+        handler = prosper_async_logging.AsyncSlackHandler(url, loop=asyncio.get_running_loop())
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        test_logger = logging.getLogger('async_slack_logger')
+        test_logger.addHandler(handler)
+
+        start = time.monotonic()
+        for index in range(5):
+            test_logger.error('async message %d', index)
+        emit_time = time.monotonic() - start
+
+        await handler.aclose()
+        test_logger.removeHandler(handler)
+        return emit_time
+
+    with patch.object(prosper_async_logging.AsyncSlackHandler, '_post_blocking', recording_post):
+        emit_time = asyncio.run(run_service())
+    server.shutdown()
+
+    assert emit_time < 0.5
+    assert len(server.request_times) == 5
+    assert [payload['text'] for payload in payloads] == \
+        ['async message {0}'.format(index) for index in range(5)]
+
+def test_async_discord_handler_threaded_close():
+    """validate sync close() from another thread drains a loop running elsewhere"""
+    webhook = prosper_logging.DiscordWebhook()
+    webhook.api_keys(1234, 'some_key')
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+
+    posted = []
+    with patch.object(
+            prosper_async_logging.AsyncDiscordHandler,
+            '_post_blocking',
+            lambda handler, payload: posted.append(payload)
+    ):
+        handler = prosper_async_logging.AsyncDiscordHandler(webhook, loop=loop)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.handle(helper_make_record('from a worker thread'))
+        handler.close()
+        handler.close()
+
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join(5)
+    loop.close()
+
+    assert posted == [{'content': 'from a worker thread'}]
+
+def test_discord_logger_async(config=TEST_CONFIG):
+    """validate async_loop wiring in configure_discord_logger"""
+    async def build():
+        log_builder = prosper_logging.ProsperLogger(
+            'discord_async_logger',
+            LOG_PATH,
+            config_obj=config
+        )
+        log_builder.configure_discord_logger(
+            discord_webhook='https://discordapp.com/api/webhooks/1234/some-key',
+            async_loop=asyncio.get_running_loop(),
+            queued=True
+        )
+        discord_handler = log_builder.log_handlers[-1]
+        await log_builder.aclose_handles()
+        return discord_handler
+
+    discord_handler = asyncio.run(build())
+    assert isinstance(discord_handler, prosper_async_logging.AsyncDiscordHandler)
+    test_cleanup_log_directory()
+
 @patch('prosper.common.prosper_logging.warnings.warn')
 def test_prosper_logger_close_handles(warn, config=TEST_CONFIG):
     "test if warning is given when closing a handler exceptionlally"
@@ -545,5 +1639,182 @@ def test_prosper_logger_close_handles(warn, config=TEST_CONFIG):
 
     assert warn.called
 
+class HelperCollectingHandler(logging.Handler):
+    """Handler that stores formatted messages, optionally waiting on a gate"""
+    def __init__(self, gate=None):
+        logging.Handler.__init__(self)
+        self.messages = []
+        self.gate = gate
+        self.started = threading.Event()
+
+    def emit(self, record):
+        self.started.set()
+        if self.gate:
+            self.gate.wait(10)
+        self.messages.append(self.format(record))
+
+def helper_make_record(message, level=logging.ERROR):
+    """build a LogRecord without going through a logger"""
+    return logging.makeLogRecord({
+        'msg': message,
+        'levelno': level,
+        'levelname': logging.getLevelName(level)
+    })
+
+def test_queued_handler_delivery():
+    """validate QueuedHandler delivers everything and flushes on close"""
+    gate = threading.Event()
+    collector = HelperCollectingHandler(gate)
+    handler = prosper_logging.QueuedHandler(collector, queue_size=100)
+    handler.setFormatter(logging.Formatter('%(levelname)s:%(message)s'))
+    handler.setLevel('ERROR')
+
+    test_logger = logging.getLogger('queued_logger')
+    test_logger.addHandler(handler)
+    for index in range(10):
+        test_logger.error('message %d', index) #would hang if emit() blocked on the gate
+
+    assert collector.level == logging.ERROR
+    gate.set()
+    handler.close()
+    test_logger.removeHandler(handler)
+
+    assert collector.messages == ['ERROR:message {0}'.format(index) for index in range(10)]
+
+def test_queued_handler_exception():
+    """validate traceback survives the trip through the queue"""
+    collector = HelperCollectingHandler()
+    handler = prosper_logging.QueuedHandler(collector)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    test_logger = logging.getLogger('queued_exception_logger')
+    test_logger.addHandler(handler)
+    try:
+        raise ValueError('queued boom')
+    except ValueError:
+        test_logger.exception('caught')
+    handler.close()
+    test_logger.removeHandler(handler)
+
+    assert collector.messages[0].startswith('caught\nTraceback')
+    assert 'ValueError: queued boom' in collector.messages[0]
+
+@pytest.mark.parametrize('policy,expected', [
+    (prosper_logging.OverflowPolicy.DROP_OLDEST, ['0', '3', '4']),
+    (prosper_logging.OverflowPolicy.DROP_NEWEST, ['0', '1', '2']),
+])
+@patch('prosper.common.prosper_logging.warnings.warn')
+def test_queued_handler_overflow(warn, policy, expected):
+    """validate OverflowPolicy behavior on a full queue"""
+    gate = threading.Event()
+    collector = HelperCollectingHandler(gate)
+    handler = prosper_logging.QueuedHandler(collector, queue_size=2, overflow_policy=policy)
+
+    handler.handle(helper_make_record('0'))
+    assert collector.started.wait(5) #worker is now holding '0' and waiting on gate
+    for message in ['1', '2', '3', '4']:
+        handler.handle(helper_make_record(message))
+
+    assert handler.dropped == 2
+    assert warn.call_count == 1 #one warning per overflow episode, not per record
+    gate.set()
+    handler.close()
+
+    assert collector.messages == expected
+
+def test_queued_handler_overflow_block():
+    """validate OverflowPolicy.BLOCK waits for room instead of dropping"""
+    gate = threading.Event()
+    collector = HelperCollectingHandler(gate)
+    handler = prosper_logging.QueuedHandler(
+        collector,
+        queue_size=1,
+        overflow_policy=prosper_logging.OverflowPolicy.BLOCK
+    )
+
+    handler.handle(helper_make_record('0'))
+    assert collector.started.wait(5)
+    handler.handle(helper_make_record('1'))
+
+    producer = threading.Thread(target=handler.handle, args=(helper_make_record('2'),))
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive()  #queue is full, producer is waiting
+
+    gate.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    handler.close()
+
+    assert handler.dropped == 0
+    assert collector.messages == ['0', '1', '2']
+
+def test_queued_handler_bad_record():
+    """validate one broken record does not kill the worker"""
+    collector = HelperCollectingHandler()
+    collector.handleError = Mock()
+    handler = prosper_logging.QueuedHandler(collector)
+
+    handler.handle(logging.makeLogRecord({'msg': 'no level'})) #levelno=None
+    handler.handle(helper_make_record('good'))
+    handler.flush()
+
+    assert collector.handleError.called
+    assert collector.messages == ['good']
+    handler.close()
+
+def test_queued_handler_close_twice():
+    """validate close() is idempotent and records after close are discarded"""
+    collector = HelperCollectingHandler()
+    handler = prosper_logging.QueuedHandler(collector)
+
+    handler.handle(helper_make_record('before'))
+    handler.close()
+    handler.close() #logging.shutdown() does this at exit after close_handles()
+    handler.handle(helper_make_record('after'))
+
+    assert collector.messages == ['before']
+    assert handler.queue.empty()
+
+@patch('prosper.common.prosper_logging.warnings.warn')
+def test_get_overflow_policy(warn):
+    """validate config parsing for OverflowPolicy"""
+    policy = prosper_logging.OverflowPolicy
+    assert prosper_logging.get_overflow_policy('DROP_NEWEST') == policy.DROP_NEWEST
+    assert prosper_logging.get_overflow_policy('drop_newest') == policy.DROP_NEWEST
+    assert prosper_logging.get_overflow_policy('Block') == policy.BLOCK
+    assert prosper_logging.get_overflow_policy('') == policy.DROP_OLDEST
+    assert not warn.called
+
+    assert prosper_logging.get_overflow_policy('drop_everything') == policy.DROP_OLDEST
+    assert warn.called
+
+@patch('prosper.common.prosper_logging.HackyDiscordHandler.send_msg_to_webhook')
+def test_discord_logger_queued(send_msg, config=TEST_CONFIG):
+    """validate configure_discord_logger(queued=True) wiring"""
+    test_logname = 'discord_queued_logger'
+    log_builder = prosper_logging.ProsperLogger(
+        test_logname,
+        LOG_PATH,
+        config_obj=config
+    )
+    log_builder.configure_discord_logger(
+        discord_webhook='https://discordapp.com/api/webhooks/1234/some-key',
+        queued=True
+    )
+    queued_handler = log_builder.log_handlers[-1]
+    assert isinstance(queued_handler, prosper_logging.QueuedHandler)
+    assert isinstance(queued_handler.handler, prosper_logging.HackyDiscordHandler)
+    assert queued_handler.queue.maxsize == int(config.get_option('LOGGING', 'webhook_queue_size'))
+
+    test_logger = log_builder.get_logger()
+    test_logger.info('not sent')
+    test_logger.error('sent')
+    test_cleanup_log_directory(log_builder) #close_handles() drains queue
+
+    assert send_msg.call_count == 1
+    assert send_msg.call_args[0][0].endswith('sent')
+
+
 if __name__ == '__main__':
     test_rotating_file_handle()
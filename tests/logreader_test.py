@@ -0,0 +1,190 @@
+"""logreader_test.py
+
+Pytest functions for exercising prosper.common.prosper_logreader
+
+"""
+import os
+from os import path
+import gzip
+import logging
+from datetime import datetime, timedelta
+import pytest
+
+import prosper.common.prosper_logging as prosper_logging
+import prosper.common.prosper_config as prosper_config
+import prosper.common.prosper_logreader as prosper_logreader
+
+BASE_TIME = datetime(2026, 10, 18, 9, 0, 0)
+
+def helper_log_line(when, message, levelname='INFO', func_name='handle_order', lineno=12):
+    """one ReportingFormats.DEFAULT line"""
+    return '[{0},{1:03d};{2};orders.py;{3};{4}] {5}\n'.format(
+        when.strftime('%Y-%m-%d %H:%M:%S'), when.microsecond // 1000,
+        levelname, func_name, lineno, message
+    )
+
+def helper_write_log(file_path, lines, mtime=None, compress=False):
+    """write log lines, gzipped if asked, and backdate mtime"""
+    opener = gzip.open if compress else open
+    with opener(file_path, 'wt') as log_file:
+        log_file.write(''.join(lines))
+    if mtime:
+        os.utime(file_path, (mtime.timestamp(), mtime.timestamp()))
+
+def test_read_prosper_logger_output(tmpdir):
+    """reads what ProsperLogger writes, traceback kept with its record"""
+    config_path = str(tmpdir.join('reader.cfg'))
+    with open(config_path, 'w') as config_file:
+        config_file.write('[LOGGING]\n    log_level = DEBUG\n')
+    log_builder = prosper_logging.ProsperLogger(
+        'reader_logger',
+        str(tmpdir),
+        config_obj=prosper_config.ProsperConfig(config_path)
+    )
+    logger = log_builder.get_logger()
+    logger.info('starting')
+    try:
+        raise ValueError('bad order')
+    except ValueError:
+        logger.exception('order failed')
+    logger.debug('done')
+    log_builder.close_handles()
+
+    entries = list(prosper_logreader.read_log(str(tmpdir), 'reader_logger'))
+    assert [entry.levelname for entry in entries] == ['INFO', 'ERROR', 'DEBUG']
+    assert entries[1].funcName == 'test_read_prosper_logger_output'
+    assert entries[1].message.startswith('order failed\nTraceback (most recent call last):')
+    assert entries[1].message.endswith('ValueError: bad order')
+
+    with open(str(tmpdir.join('reader_logger.log'))) as log_file:
+        assert ''.join(str(entry) + '\n' for entry in entries) == log_file.read()
+
+def test_rotated_files_in_order(tmpdir):
+    """current file + plain and gzipped backups stream oldest first"""
+    log_path = str(tmpdir)
+    day = timedelta(days=1)
+    helper_write_log(
+        path.join(log_path, 'app.log.2026-10-16'),
+        [helper_log_line(BASE_TIME - 2 * day, 'day 1')],
+        mtime=BASE_TIME - 2 * day + timedelta(hours=12)
+    )
+    helper_write_log(
+        path.join(log_path, 'app.log.2026-10-16.gz'),
+        [helper_log_line(BASE_TIME - 3 * day, 'day 0')],
+        mtime=BASE_TIME - 3 * day + timedelta(hours=12),
+        compress=True
+    )
+    helper_write_log(
+        path.join(log_path, 'app.log.2026-10-17'),
+        [helper_log_line(BASE_TIME - day, 'day 2'), 'continued\n'],
+        mtime=BASE_TIME - day + timedelta(hours=12)
+    )
+    helper_write_log(path.join(log_path, 'app.log'), [helper_log_line(BASE_TIME, 'today')])
+    helper_write_log(path.join(log_path, 'app.log.2026-10-17.idx'), ['not a log'])
+    helper_write_log(path.join(log_path, 'other.log'), [helper_log_line(BASE_TIME, 'other')])
+
+    entries = list(prosper_logreader.read_log(log_path, 'app'))
+    assert [entry.message for entry in entries] == ['day 0', 'day 1', 'day 2\ncontinued', 'today']
+    assert entries[0].source.endswith('.gz')
+
+    recent = prosper_logreader.read_log(log_path, 'app', start=BASE_TIME - timedelta(hours=1))
+    assert [entry.message for entry in recent] == ['today']
+    window = prosper_logreader.read_log(
+        log_path, 'app',
+        start=BASE_TIME - 2 * day,
+        end=BASE_TIME - timedelta(hours=1)
+    )
+    assert [entry.message for entry in window] == ['day 1', 'day 2\ncontinued']
+
+def test_filters(tmpdir):
+    """level is a minimum, funcName is exact"""
+    lines = [
+        helper_log_line(BASE_TIME, 'a', 'DEBUG'),
+        helper_log_line(BASE_TIME, 'b', 'WARNING', func_name='settle'),
+        helper_log_line(BASE_TIME, 'c', 'ERROR'),
+        helper_log_line(BASE_TIME, 'd', 'CRITICAL', func_name='settle'),
+    ]
+    file_path = str(tmpdir.join('app.log'))
+    helper_write_log(file_path, lines)
+
+    assert [entry.message for entry in prosper_logreader.read_log_file(file_path, level='ERROR')] == ['c', 'd']
+    assert [entry.message for entry in prosper_logreader.read_log_file(file_path, func_name='settle')] == ['b', 'd']
+    assert [
+        entry.message for entry in prosper_logreader.read_log_file(file_path, level='warning', func_name='settle')
+    ] == ['b', 'd']
+
+def test_seek_timestamp():
+    """binary search lands on the first record at/after start, skipping continuation lines"""
+    lines = []
+    for index in range(2000):
+        lines.append(helper_log_line(BASE_TIME + timedelta(seconds=index), 'record {0}'.format(index)))
+        if index % 7 == 0:
+            lines.append('Traceback (most recent call last):\n  [not a header] line\n')
+    buffer = ''.join(lines).encode('utf-8')
+
+    for index in [0, 1, 777, 1999]:
+        offset = prosper_logreader.seek_timestamp(buffer, BASE_TIME + timedelta(seconds=index))
+        assert buffer[offset:].startswith(helper_log_line(
+            BASE_TIME + timedelta(seconds=index), 'record {0}'.format(index)
+        ).encode('utf-8'))
+    offset = prosper_logreader.seek_timestamp(buffer, BASE_TIME + timedelta(seconds=500.5))
+    assert buffer[offset:].startswith(
+        helper_log_line(BASE_TIME + timedelta(seconds=501), 'record 501').encode('utf-8')
+    )
+    assert prosper_logreader.seek_timestamp(buffer, BASE_TIME + timedelta(days=1)) == len(buffer)
+    assert prosper_logreader.seek_timestamp(b'', BASE_TIME) == 0
+
+def test_cli(tmpdir, capsys):
+    """prosper_logreader prints matching records"""
+    helper_write_log(str(tmpdir.join('app.log')), [
+        helper_log_line(BASE_TIME, 'early'),
+        helper_log_line(BASE_TIME + timedelta(minutes=5), 'boom', 'ERROR'),
+        'Traceback (most recent call last):\n',
+        helper_log_line(BASE_TIME + timedelta(minutes=10), 'late', 'ERROR'),
+    ])
+    prosper_logreader.main([
+        str(tmpdir), 'app',
+        '--start', '2026-10-18 09:01',
+        '--end', '2026-10-18 09:06:00',
+        '--level', 'ERROR'
+    ])
+    assert capsys.readouterr().out == (
+        helper_log_line(BASE_TIME + timedelta(minutes=5), 'boom', 'ERROR') +
+        'Traceback (most recent call last):\n'
+    )
+
+def test_indexed_query(tmpdir):
+    """with an .idx sidecar only blocks that can match are read"""
+    log_path = str(tmpdir.join('app.log'))
+    handler = prosper_logging.HybridRotatingFileHandler(log_path, index_block=1000)
+    handler.setFormatter(logging.Formatter(prosper_logging.ReportingFormats.DEFAULT.value))
+    for index in range(3000):
+        record = logging.makeLogRecord({
+            'msg': 'record {0}'.format(index),
+            'levelno': logging.ERROR if index % 1000 == 500 else logging.INFO,
+            'levelname': 'ERROR' if index % 1000 == 500 else 'INFO',
+            'funcName': 'handle_order',
+        })
+        record.created = (BASE_TIME + timedelta(seconds=index)).timestamp()
+        record.msecs = 0
+        handler.handle(record)
+    handler.close()
+    with open(log_path, 'a') as log_file:   #written without the index
+        log_file.write(helper_log_line(BASE_TIME + timedelta(hours=2), 'unindexed', 'ERROR'))
+    file_size = path.getsize(log_path)
+
+    start = BASE_TIME + timedelta(seconds=1200)
+    end = BASE_TIME + timedelta(seconds=1300)
+    byte_ranges = prosper_logreader.find_byte_ranges(log_path, start, end)
+    assert sum(range_end - range_start for range_start, range_end in byte_ranges) < file_size / 10
+    assert [
+        entry.message for entry in prosper_logreader.read_log_file(log_path, start=start, end=end)
+    ] == ['record {0}'.format(index) for index in range(1200, 1301)]
+
+    byte_ranges = prosper_logreader.find_byte_ranges(log_path, level='ERROR')
+    assert len(byte_ranges) == 4    #3 blocks + the unindexed tail
+    assert [
+        entry.message for entry in prosper_logreader.read_log_file(log_path, level='ERROR')
+    ] == ['record 500', 'record 1500', 'record 2500', 'unindexed']
+
+    assert prosper_logreader.find_byte_ranges(str(tmpdir.join('missing.log'))) is None